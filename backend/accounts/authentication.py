@@ -0,0 +1,84 @@
+import threading
+import time
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+MAX_CACHED_USERS = 10000
+
+# user id -> (expires at, token_version, is_active); per process
+_token_states = {}
+_lock = threading.Lock()
+
+
+def token_state_ttl():
+    return getattr(settings, 'AUTH_TOKEN_STATE_TTL', 30)
+
+
+def token_state(user_id):
+    """(token_version, is_active) for a user, from the DB at most once per AUTH_TOKEN_STATE_TTL seconds."""
+    now = time.monotonic()
+    entry = _token_states.get(user_id)
+    if entry is not None and entry[0] > now:
+        return entry[1:]
+    version, active = User.objects.filter(pk=user_id).values_list('token_version', 'is_active').first() or (None, False)
+    with _lock:
+        if len(_token_states) >= MAX_CACHED_USERS:
+            for key in [k for k, v in _token_states.items() if v[0] <= now] or list(_token_states):
+                del _token_states[key]
+        _token_states[user_id] = (now + token_state_ttl(), version, active)
+    return version, active
+
+
+def forget_token_state(user_id=None):
+    """Drop the cached state so this process sees a change at once (others within the TTL)."""
+    with _lock:
+        if user_id is None:
+            _token_states.clear()
+        else:
+            _token_states.pop(user_id, None)
+
+
+def token_user_id(token):
+    # simplejwt writes the id claim as a string
+    return User._meta.pk.to_python(token[api_settings.USER_ID_CLAIM])
+
+
+def claims_user(token):
+    """
+    A User built from the token's claims without a query. Other fields are
+    deferred and load on first access; `profile_id` is the student's
+    StudentProfile id, or None.
+    """
+    claims = {
+        'id': token_user_id(token), 'username': token['username'], 'role': token['role'],
+        'is_active': True, 'token_version': token['ver'],
+    }
+    names = [f.attname for f in User._meta.concrete_fields if f.attname in claims]
+    user = User.from_db(DEFAULT_DB_ALIAS, names, [claims[name] for name in names])
+    user.profile_id = token.get('profile_id')
+    return user
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that trusts the role/profile claims in the token and
+    only checks, through the cached token_state, that the user is active and
+    the token's version is current. Tokens without a "ver" claim (issued
+    before it existed) fall back to loading the user.
+    """
+
+    def get_user(self, validated_token):
+        if 'ver' not in validated_token:
+            return super().get_user(validated_token)
+        version, active = token_state(token_user_id(validated_token))
+        if not active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        if version != validated_token['ver']:
+            raise AuthenticationFailed('Token has been revoked', code='token_revoked')
+        return claims_user(validated_token)
@@ -1,5 +1,33 @@
-from django.contrib.auth.models import AbstractUser
-from django.db import models
+from django.contrib.auth.models import AbstractUser, UserManager as BaseUserManager
+from django.db import models, transaction
+from django.db.models import F
+
+# Changing any of these revokes the user's outstanding tokens
+TOKEN_FIELDS = ('role', 'is_active', 'password')
+
+
+def _forget_token_state(user_id=None):
+    from .authentication import forget_token_state
+    transaction.on_commit(lambda: forget_token_state(user_id))
+
+
+class UserQuerySet(models.QuerySet):
+    def update(self, **kwargs):
+        """
+        QuerySet.update() (and so bulk_update and admin actions) skips save(),
+        so writes to a token field bump token_version in the same UPDATE.
+        """
+        if 'token_version' not in kwargs and any(name in kwargs for name in TOKEN_FIELDS):
+            kwargs['token_version'] = F('token_version') + 1
+            _forget_token_state()
+        return super().update(**kwargs)
+
+    update.alters_data = True
+
+
+class UserManager(BaseUserManager.from_queryset(UserQuerySet)):
+    pass
+
 
 class User(AbstractUser):
     ROLE_CHOICES = (
@@ -9,6 +37,29 @@ class User(AbstractUser):
     )
     role = models.CharField(max_length=20, choices=ROLE_CHOICES, default='student')
     phone = models.CharField(max_length=15, blank=True, null=True)
+    # Embedded in access tokens as "ver"; a token with an older version is rejected
+    token_version = models.PositiveIntegerField(default=0)
+
+    objects = UserManager()
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._token_state = instance._token_fields()
+        return instance
+
+    def _token_fields(self):
+        return {name: self.__dict__[name] for name in TOKEN_FIELDS if name in self.__dict__}
+
+    def save(self, *args, **kwargs):
+        loaded = getattr(self, '_token_state', None)
+        if loaded and any(self.__dict__.get(name, value) != value for name, value in loaded.items()):
+            self.token_version += 1
+            if kwargs.get('update_fields') is not None:
+                kwargs['update_fields'] = {*kwargs['update_fields'], 'token_version'}
+            _forget_token_state(self.pk)
+        super().save(*args, **kwargs)
+        self._token_state = self._token_fields()
 
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import User
+from core.fieldsets import SparseFieldsetMixin
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username', 'email', 'role', 'phone', 'first_name', 'last_name', 'password']
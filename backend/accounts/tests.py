@@ -0,0 +1,105 @@
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from activity.models import StudentProfile
+from .authentication import forget_token_state
+from .models import User
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class ClaimsAuthenticationTests(TestCase):
+    def setUp(self):
+        forget_token_state()
+        self.user = User.objects.create_user(username='asha', password='pass12345')
+        self.profile = StudentProfile.objects.create(user=self.user)
+        self.client = APIClient()
+
+    def login(self, username='asha', password='pass12345'):
+        response = self.client.post('/api/accounts/login/', {'username': username, 'password': password})
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def get(self, token, url='/api/activity/leaves/'):
+        return self.client.get(url, HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def test_claims_replace_the_user_query(self):
+        tokens = self.login()
+        access = AccessToken(tokens['access'])
+        self.assertEqual((access['role'], access['profile_id'], access['ver']), ('student', self.profile.pk, 0))
+
+        legacy = str(AccessToken.for_user(self.user))
+        self.get(tokens['access'])  # warm the token-state cache
+        with CaptureQueriesContext(connection) as claims:
+            self.assertEqual(self.get(tokens['access']).status_code, 200)
+        with CaptureQueriesContext(connection) as loaded:
+            self.assertEqual(self.get(legacy).status_code, 200)
+        self.assertEqual(len(claims), len(loaded) - 1)
+
+        response = self.client.post('/api/activity/leaves/', {
+            'start_date': '2026-03-01', 'end_date': '2026-03-02', 'reason': 'Home',
+        }, HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.profile.leaves.count(), 1)
+
+    def test_role_change_and_deactivation_revoke_tokens(self):
+        tokens = self.login()
+        self.assertEqual(self.get(tokens['access']).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.role = 'manager'
+            self.user.save()
+        self.assertEqual(self.get(tokens['access']).status_code, 401)
+        refresh = self.client.post('/api/accounts/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(refresh.status_code, 401)
+
+        tokens = self.login()
+        self.assertEqual(AccessToken(tokens['access'])['role'], 'manager')
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            self.user.save(update_fields=['is_active'])
+        self.assertEqual(self.get(tokens['access']).status_code, 401)
+
+    def test_queryset_updates_revoke_tokens(self):
+        tokens = self.login()
+        self.assertEqual(self.get(tokens['access']).status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            User.objects.filter(pk=self.user.pk).update(role='staff')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.token_version, 1)
+        self.assertEqual(self.get(tokens['access']).status_code, 401)
+
+        tokens = self.login()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.is_active = False
+            User.objects.bulk_update([self.user], ['is_active'])
+        self.assertEqual(self.get(tokens['access']).status_code, 401)
+
+        User.objects.filter(pk=self.user.pk).update(first_name='Asha')
+        self.assertEqual(User.objects.get(pk=self.user.pk).token_version, 2)
+
+    def test_out_of_band_changes_apply_after_the_ttl(self):
+        tokens = self.login()
+        self.assertEqual(self.get(tokens['access']).status_code, 200)
+        # Not committed, so this process's cache stands in for another worker's: it notices after the TTL
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+        self.assertEqual(self.get(tokens['access']).status_code, 200)
+        with override_settings(AUTH_TOKEN_STATE_TTL=0):
+            forget_token_state(self.user.pk)
+            self.assertEqual(self.get(tokens['access']).status_code, 401)
+
+    def test_refresh_reads_current_claims(self):
+        self.profile.delete()
+        tokens = self.login()
+        self.assertIsNone(AccessToken(tokens['access'])['profile_id'])
+        profile = StudentProfile.objects.create(user=self.user)
+        response = self.client.post('/api/accounts/token/refresh/', {'refresh': tokens['refresh']})
+        self.assertEqual(AccessToken(response.data['access'])['profile_id'], profile.pk)
+
+        self.user.first_name = 'Asha'
+        self.user.save()
+        self.assertEqual(self.user.token_version, 0)
+        profile_response = self.get(response.data['access'], '/api/accounts/profile/')
+        self.assertEqual(profile_response.data['first_name'], 'Asha')
@@ -0,0 +1,39 @@
+from django.apps import apps
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+
+def add_claims(token, user):
+    """Role, username, student profile id and token version, read by ClaimsJWTAuthentication."""
+    StudentProfile = apps.get_model('activity', 'StudentProfile')
+    token['username'] = user.username
+    token['role'] = user.role
+    token['profile_id'] = StudentProfile.objects.filter(user=user).values_list('pk', flat=True).first()
+    token['ver'] = user.token_version
+    return token
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        return add_claims(super().get_token(user), user)
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    """
+    Issues the new access token with claims read from the user now, so a
+    profile created after login shows up; refresh tokens from before a role,
+    password or activation change are refused.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = User.objects.filter(pk=refresh.get(api_settings.USER_ID_CLAIM)).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+        if refresh.get('ver', user.token_version) != user.token_version:
+            raise AuthenticationFailed('Token has been revoked', 'token_revoked')
+        return {'access': str(add_claims(refresh.access_token, user))}
@@ -14,4 +14,5 @@ class ProfileView(generics.RetrieveUpdateAPIView):
     permission_classes = [permissions.IsAuthenticated]
 
     def get_object(self):
-        return self.request.user
+        # request.user only holds the token's claims
+        return User.objects.get(pk=self.request.user.pk)
@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import StudentProfile, Document, Rent, Payment, Complaint, LeaveApplication
+from .models import StudentProfile, Document, Rent, Payment, PaymentEvent, Complaint, LeaveApplication, Notification, StaffWorkload, UploadSession
 
 @admin.register(StudentProfile)
 class StudentProfileAdmin(admin.ModelAdmin):
@@ -11,6 +11,11 @@ class DocumentAdmin(admin.ModelAdmin):
     list_display = ['student', 'doc_type', 'status', 'uploaded_at']
     list_filter = ['status', 'doc_type']
 
+@admin.register(UploadSession)
+class UploadSessionAdmin(admin.ModelAdmin):
+    list_display = ['filename', 'student', 'doc_type', 'received', 'size', 'status', 'updated_at']
+    list_filter = ['status']
+
 @admin.register(Rent)
 class RentAdmin(admin.ModelAdmin):
     list_display = ['student', 'amount', 'month', 'status']
@@ -18,9 +23,14 @@ class RentAdmin(admin.ModelAdmin):
 
 @admin.register(Payment)
 class PaymentAdmin(admin.ModelAdmin):
-    list_display = ['rent', 'transaction_id', 'amount', 'status', 'payment_date']
+    list_display = ['rent', 'transaction_id', 'amount', 'status', 'payment_date', 'settled_at']
     list_filter = ['status']
 
+@admin.register(PaymentEvent)
+class PaymentEventAdmin(admin.ModelAdmin):
+    list_display = ['event_id', 'event_type', 'status', 'received_at', 'processed_at']
+    list_filter = ['status', 'event_type']
+
 @admin.register(Complaint)
 class ComplaintAdmin(admin.ModelAdmin):
     list_display = ['title', 'student', 'assigned_to', 'status', 'created_at']
@@ -30,3 +40,13 @@ class ComplaintAdmin(admin.ModelAdmin):
 class LeaveApplicationAdmin(admin.ModelAdmin):
     list_display = ['student', 'start_date', 'end_date', 'status']
     list_filter = ['status']
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ['subject', 'user', 'status', 'attempts', 'created_at', 'sent_at']
+    list_filter = ['status']
+
+@admin.register(StaffWorkload)
+class StaffWorkloadAdmin(admin.ModelAdmin):
+    list_display = ['staff', 'open_complaints', 'hostel', 'floor', 'accepts_assignments']
+    list_filter = ['accepts_assignments', 'hostel']
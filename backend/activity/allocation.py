@@ -0,0 +1,135 @@
+import threading
+import time
+from contextlib import nullcontext
+from collections import Counter, defaultdict
+from decimal import Decimal, InvalidOperation
+
+from django.db import IntegrityError, OperationalError, connection, transaction
+
+from hostel.models import Bed
+from hostel.occupancy import apply_occupied_deltas
+from .models import StudentProfile
+
+MAX_ATTEMPTS = 5
+
+# Databases without SELECT ... FOR UPDATE (SQLite) serialize writers anyway;
+# queueing batches in-process avoids lock errors between worker threads.
+_batch_lock = threading.Lock()
+
+
+class AllocationError(ValueError):
+    pass
+
+
+def normalize_requests(data):
+    """
+    Accept {"students": [ids or {student, hostel, room_type, max_rent}], <defaults>}
+    and return one preference dict per student. Per-student keys override defaults.
+    """
+    if not isinstance(data, dict) or not isinstance(data.get('students'), list) or not data['students']:
+        raise AllocationError("'students' must be a non-empty list.")
+    defaults = {key: data.get(key) for key in ('hostel', 'room_type', 'max_rent')}
+    requests, seen = [], set()
+    for item in data['students']:
+        pref = dict(defaults)
+        if isinstance(item, dict):
+            pref.update({key: item[key] for key in defaults if key in item})
+            item = item.get('student')
+        try:
+            pref['student'] = int(item)
+            pref['hostel'] = int(pref['hostel']) if pref['hostel'] not in (None, '') else None
+            pref['max_rent'] = Decimal(str(pref['max_rent'])) if pref['max_rent'] not in (None, '') else None
+        except (TypeError, ValueError, InvalidOperation):
+            raise AllocationError(f'Invalid allocation request: {item!r}')
+        if pref['room_type'] in ('', None):
+            pref['room_type'] = None
+        if pref['student'] in seen:
+            raise AllocationError(f"Student {pref['student']} appears more than once.")
+        seen.add(pref['student'])
+        requests.append(pref)
+    return requests
+
+
+def _free_beds(pref, limit, exclude):
+    beds = Bed.objects.filter(is_occupied=False, occupied_by__isnull=True).exclude(pk__in=exclude)
+    if pref['hostel']:
+        beds = beds.filter(room__floor__hostel_id=pref['hostel'])
+    if pref['room_type']:
+        beds = beds.filter(room__room_type=pref['room_type'])
+    if pref['max_rent'] is not None:
+        beds = beds.filter(room__rent_amount__lte=pref['max_rent'])
+    if connection.features.has_select_for_update:
+        beds = beds.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked, of=('self',))
+    # Pack rooms floor by floor so partially filled rooms fill up first
+    beds = beds.order_by('room__floor__hostel_id', 'room__floor__number', 'room__number', 'identifier')
+    return list(beds.values_list('pk', 'room_id')[:limit])
+
+
+def _allocate_once(requests):
+    allocated, unallocated = [], []
+    with transaction.atomic():
+        student_ids = [r['student'] for r in requests]
+        students = StudentProfile.objects.filter(pk__in=student_ids)
+        if connection.features.has_select_for_update:
+            students = students.select_for_update()
+        students = {s.pk: s for s in students.only('pk', 'is_verified', 'current_bed')}
+
+        groups = defaultdict(list)
+        for r in requests:
+            student = students.get(r['student'])
+            if student is None:
+                unallocated.append({'student': r['student'], 'reason': 'not_found'})
+            elif not student.is_verified:
+                unallocated.append({'student': r['student'], 'reason': 'not_verified'})
+            elif student.current_bed_id:
+                unallocated.append({'student': r['student'], 'reason': 'already_allocated', 'bed': student.current_bed_id})
+            else:
+                groups[(r['hostel'], r['room_type'], r['max_rent'])].append(student)
+
+        taken, to_update, room_deltas = set(), [], Counter()
+        for (hostel, room_type, max_rent), members in groups.items():
+            pref = {'hostel': hostel, 'room_type': room_type, 'max_rent': max_rent}
+            beds = _free_beds(pref, len(members), taken)
+            for student, (bed_id, room_id) in zip(members, beds):
+                student.current_bed_id = bed_id
+                to_update.append(student)
+                taken.add(bed_id)
+                room_deltas[room_id] += 1
+                allocated.append({'student': student.pk, 'bed': bed_id, 'room': room_id})
+            for student in members[len(beds):]:
+                unallocated.append({'student': student.pk, 'reason': 'no_bed'})
+
+        # bulk_update bypasses the per-save signals; the one-to-one on
+        # current_bed makes a concurrent double-booking fail the whole batch.
+        StudentProfile.objects.bulk_update(to_update, ['current_bed'], batch_size=500)
+        if taken:
+            claimed = Bed.objects.filter(pk__in=taken, is_occupied=False).update(is_occupied=True)
+            if claimed != len(taken):
+                raise IntegrityError('Bed claimed by a concurrent allocation')
+        apply_occupied_deltas(room_deltas)
+    return allocated, unallocated
+
+
+def allocate_beds(requests):
+    """
+    Assign free beds to a batch of verified students in one transaction.
+    Beds and students are row-locked where the database supports it; otherwise
+    the batch is retried if a concurrent allocation won the race.
+    """
+    started = time.perf_counter()
+    lock = nullcontext() if connection.features.has_select_for_update else _batch_lock
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        try:
+            with lock:
+                allocated, unallocated = _allocate_once(requests)
+            break
+        except (IntegrityError, OperationalError):
+            if attempt == MAX_ATTEMPTS:
+                raise
+            time.sleep(0.01 * attempt)
+    return {
+        'allocated': allocated,
+        'unallocated': unallocated,
+        'attempts': attempt,
+        'seconds': round(time.perf_counter() - started, 3),
+    }
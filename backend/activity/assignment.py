@@ -0,0 +1,157 @@
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Case, Count, F, IntegerField, OuterRef, Subquery, Value, When
+from django.db.models.functions import Coalesce
+
+from core.signals import rows_bulk_updated
+from .models import Complaint, StaffWorkload
+
+OPEN_STATUSES = ('pending', 'in_progress')
+
+
+def auto_assign_enabled():
+    return getattr(settings, 'COMPLAINT_AUTO_ASSIGN', True)
+
+
+def is_open(status):
+    return status in OPEN_STATUSES
+
+
+def adjust_open(deltas):
+    """Shift open counters by {staff_id: delta} in one UPDATE."""
+    deltas = {pk: d for pk, d in deltas.items() if pk and d}
+    if not deltas:
+        return
+    StaffWorkload.objects.filter(staff_id__in=deltas).update(open_complaints=F('open_complaints') + Case(
+        *(When(staff_id=pk, then=Value(delta)) for pk, delta in deltas.items()),
+        default=Value(0), output_field=IntegerField(),
+    ))
+
+
+def ensure_workloads(apps=global_apps):
+    """Create missing workload rows for staff users."""
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    StaffWorkload = apps.get_model('activity', 'StaffWorkload')
+    missing = User.objects.filter(role='staff', workload__isnull=True).values_list('pk', flat=True)
+    StaffWorkload.objects.bulk_create([StaffWorkload(staff_id=pk) for pk in missing], ignore_conflicts=True)
+
+
+def rebuild_workloads(apps=global_apps):
+    """Recount every open counter from the complaint table."""
+    Complaint = apps.get_model('activity', 'Complaint')
+    StaffWorkload = apps.get_model('activity', 'StaffWorkload')
+    with transaction.atomic():
+        ensure_workloads(apps)
+        open_complaints = (
+            Complaint.objects.filter(assigned_to=OuterRef('staff'), status__in=OPEN_STATUSES)
+            .order_by().values('assigned_to').annotate(n=Count('pk')).values('n')
+        )
+        StaffWorkload.objects.update(open_complaints=Coalesce(Subquery(open_complaints, output_field=IntegerField()), Value(0)))
+
+
+def complaint_location(complaint):
+    """(hostel_id, floor_id) of the student's bed, or (None, None)."""
+    bed = complaint.student.current_bed
+    if bed is None:
+        return None, None
+    return bed.room.floor.hostel_id, bed.room.floor_id
+
+
+def _covers(workload, hostel_id, floor_id):
+    """0 = floor match, 1 = hostel match, 2 = unscoped, None = not eligible."""
+    if workload.floor_id is not None:
+        return 0 if workload.floor_id == floor_id else None
+    if workload.hostel_id is not None:
+        return 1 if workload.hostel_id == hostel_id else None
+    return 2
+
+
+def _choose(workloads, hostel_id, floor_id, loads):
+    """Most specific scope first, then fewest open complaints, then lowest id."""
+    best, best_key = None, None
+    for workload in workloads:
+        scope = _covers(workload, hostel_id, floor_id)
+        if scope is None:
+            continue
+        key = (scope, loads[workload.staff_id], workload.staff_id)
+        if best_key is None or key < best_key:
+            best, best_key = workload, key
+    return best
+
+
+def _eligible_workloads():
+    # A user moved off the staff role keeps their workload row but takes no new work
+    workloads = StaffWorkload.objects.filter(accepts_assignments=True, staff__is_active=True, staff__role='staff')
+    if connection.features.has_select_for_update:
+        workloads = workloads.select_for_update(of=('self',))
+    return list(workloads)
+
+
+def assign_complaint(complaint):
+    """
+    Give an unassigned open complaint to the least loaded eligible staff
+    member. Returns the staff user id, or None if nobody is eligible.
+    """
+    if complaint.assigned_to_id or not is_open(complaint.status):
+        return complaint.assigned_to_id
+    hostel_id, floor_id = complaint_location(complaint)
+    with transaction.atomic():
+        workloads = _eligible_workloads()
+        chosen = _choose(workloads, hostel_id, floor_id, {w.staff_id: w.open_complaints for w in workloads})
+        if chosen is None:
+            return None
+        complaint.assigned_to_id = chosen.staff_id
+        # The post_save signal bumps the counter
+        complaint.save(update_fields=['assigned_to', 'updated_at'])
+    return chosen.staff_id
+
+
+def rebalance(move=True):
+    """
+    Assign every unassigned open complaint, then (with move) hand pending
+    complaints from the busiest staff to eligible staff with at least two
+    fewer open complaints. Counters are updated with a single UPDATE.
+    Returns {'assigned': n, 'moved': n, 'unassignable': n}.
+    """
+    stats = {'assigned': 0, 'moved': 0, 'unassignable': 0}
+    ensure_workloads()
+    with transaction.atomic():
+        workloads = _eligible_workloads()
+        if not workloads:
+            stats['unassignable'] = Complaint.objects.filter(assigned_to__isnull=True, status__in=OPEN_STATUSES).count()
+            return stats
+        loads = {w.staff_id: w.open_complaints for w in workloads}
+        initial = dict(loads)
+        located = Complaint.objects.select_related('student__current_bed__room__floor').order_by('created_at', 'pk')
+        changed = []
+
+        for complaint in located.filter(assigned_to__isnull=True, status__in=OPEN_STATUSES):
+            chosen = _choose(workloads, *complaint_location(complaint), loads)
+            if chosen is None:
+                stats['unassignable'] += 1
+                continue
+            complaint.assigned_to_id = chosen.staff_id
+            loads[chosen.staff_id] += 1
+            changed.append(complaint)
+            stats['assigned'] += 1
+
+        if move:
+            # Newest pending work moves first; in-progress work stays put
+            movable = located.filter(assigned_to__in=loads, status='pending').reverse()
+            for complaint in movable:
+                donor = complaint.assigned_to_id
+                target = _choose(workloads, *complaint_location(complaint), loads)
+                if target is None or loads[target.staff_id] + 1 >= loads[donor]:
+                    continue
+                complaint.assigned_to_id = target.staff_id
+                loads[donor] -= 1
+                loads[target.staff_id] += 1
+                changed.append(complaint)
+                stats['moved'] += 1
+
+        Complaint.objects.bulk_update(changed, ['assigned_to'], batch_size=500)
+        adjust_open({pk: loads[pk] - initial[pk] for pk in loads})
+        if changed:
+            rows_bulk_updated.send(sender=Complaint, pks=[c.pk for c in changed], fields=['assigned_to'])
+    return stats
@@ -0,0 +1,159 @@
+from collections import Counter
+from datetime import date
+from decimal import Decimal
+from functools import reduce
+from operator import or_
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, Q, Value, When
+from django.utils import timezone
+
+from .dashboard import invalidate_dashboard
+from .models import StudentProfile, Rent
+
+DEFAULT_DUE_DAY = 10
+DEFAULT_CHUNK_SIZE = 2000
+
+
+def month_range(start, end):
+    """First-of-month dates from start to end inclusive."""
+    month = start.replace(day=1)
+    while month <= end:
+        yield month
+        month += relativedelta(months=1)
+
+
+def generate_rents(months, due_day=DEFAULT_DUE_DAY, chunk_size=DEFAULT_CHUNK_SIZE, dry_run=False):
+    """
+    Create the missing Rent rows for every allocated student and month.
+    Students are walked in primary-key chunks; each chunk costs one read for
+    rent amounts, one for existing rents and one bulk INSERT per month.
+    Returns {month: rents created (or that would be created)}. Rows skipped
+    because a concurrent run inserted them first are not counted.
+    """
+    months = list(months)
+    created = {month: 0 for month in months}
+    allocated = StudentProfile.objects.filter(current_bed__isnull=False).order_by('pk')
+    last_pk = 0
+    while True:
+        chunk = list(
+            allocated.filter(pk__gt=last_pk).values_list('pk', 'current_bed__room__rent_amount')[:chunk_size]
+        )
+        if not chunk:
+            break
+        first_pk, last_pk = chunk[0][0], chunk[-1][0]
+        amounts = dict(chunk)
+
+        existing = set(
+            Rent.objects.filter(student_id__in=amounts, month__in=months).values_list('student_id', 'month')
+        )
+        for month in months:
+            due_date = month.replace(day=due_day)
+            pending = [
+                Rent(student_id=pk, amount=amount, month=month, due_date=due_date, status='unpaid')
+                for pk, amount in amounts.items() if (pk, month) not in existing
+            ]
+            if not pending or dry_run:
+                created[month] += len(pending)
+                continue
+            # The (student, month) constraint makes concurrent runs harmless. Rows
+            # it dropped are not ours: count only rows carrying the created_at
+            # this insert stamped on them.
+            started = timezone.now()
+            Rent.objects.bulk_create(pending, batch_size=chunk_size, ignore_conflicts=True)
+            ours = {(rent.student_id, rent.created_at) for rent in pending}
+            written = Rent.objects.filter(
+                student_id__gte=first_pk, student_id__lte=last_pk, month=month, created_at__gte=started,
+            ).values_list('student_id', 'created_at')
+            created[month] += sum(1 for key in written if key in ours)
+    if not dry_run and any(created.values()):
+        invalidate_dashboard()
+    return created
+
+
+class LateFeePolicyError(ValueError):
+    pass
+
+
+def get_late_fee_policy(**overrides):
+    policy = dict(getattr(settings, 'LATE_FEE_POLICY', {'mode': 'flat', 'amount': 200}))
+    policy.update({k: v for k, v in overrides.items() if v is not None})
+    if policy.get('mode') not in ('flat', 'per_day', 'tiered'):
+        raise LateFeePolicyError(f"Unknown late fee mode '{policy.get('mode')}'.")
+    if policy['mode'] == 'tiered' and not policy.get('tiers'):
+        raise LateFeePolicyError('Tiered late fees need at least one tier.')
+    return policy
+
+
+def late_fee_for(days_overdue, policy):
+    """Return (fee, tier label) for a rent that is days_overdue days late."""
+    mode = policy['mode']
+    if mode == 'flat':
+        fee, label = Decimal(str(policy['amount'])), 'flat'
+    elif mode == 'per_day':
+        fee, label = Decimal(str(policy['per_day'])) * days_overdue, 'per_day'
+    else:
+        tiers = sorted(policy['tiers'], key=lambda t: t['min_days'])
+        reached = [t for t in tiers if days_overdue >= t['min_days']]
+        if not reached:
+            return Decimal('0'), None
+        fee, label = Decimal(str(reached[-1]['fee'])), f"{reached[-1]['min_days']}+ days"
+    cap = policy.get('cap')
+    if cap is not None and fee > Decimal(str(cap)):
+        fee, label = Decimal(str(cap)), 'capped'
+    return fee.quantize(Decimal('0.01')), label
+
+
+def apply_late_fees(as_of, policy, chunk_size=None, dry_run=False):
+    """
+    Raise late_fee on overdue unpaid rents to what the policy charges as of
+    `as_of`. Fees only ever go up to the computed value, never accumulate, so
+    re-running is idempotent.
+
+    Overdue rents share a handful of due dates, so the fee is computed per due
+    date in Python and written with a single CASE UPDATE (one per pk chunk when
+    chunk_size is set). Returns {tier label: rents updated}.
+    """
+    overdue = Rent.objects.filter(status='unpaid', due_date__lt=as_of)
+    groups = overdue.values_list('due_date', 'late_fee').annotate(n=Count('pk')).order_by()
+
+    fees, counts = {}, Counter()
+    for due_date, late_fee, n in groups:
+        if due_date not in fees:
+            fees[due_date] = late_fee_for((as_of - due_date).days, policy)
+        fee, label = fees[due_date]
+        if label and late_fee < fee:
+            counts[label] += n
+    fees = {d: fee for d, (fee, label) in fees.items() if label}
+    if dry_run or not counts:
+        return dict(counts)
+
+    pending = overdue.filter(reduce(or_, (Q(due_date=d, late_fee__lt=fee) for d, fee in fees.items())))
+    new_fee = Case(
+        *(When(due_date=d, then=Value(fee)) for d, fee in fees.items()),
+        output_field=DecimalField(max_digits=10, decimal_places=2),
+    )
+    if not chunk_size:
+        pending.update(late_fee=new_fee)
+        transaction.on_commit(invalidate_dashboard)
+        return dict(counts)
+    # Each chunk commits on its own to keep lock times short; a partial run
+    # is safe to repeat because fees are set, not added.
+    last_pk = 0
+    while True:
+        bounds = list(pending.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[chunk_size - 1:chunk_size])
+        if not bounds:
+            pending.filter(pk__gt=last_pk).update(late_fee=new_fee)
+            break
+        pending.filter(pk__gt=last_pk, pk__lte=bounds[0]).update(late_fee=new_fee)
+        last_pk = bounds[0]
+    transaction.on_commit(invalidate_dashboard)
+    return dict(counts)
+
+
+def parse_month(value):
+    """'2026-03' -> date(2026, 3, 1)."""
+    year, month = value.split('-')[:2]
+    return date(int(year), int(month), 1)
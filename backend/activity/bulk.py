@@ -0,0 +1,71 @@
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from core.signals import rows_bulk_updated
+from .dashboard import invalidate_dashboard
+from .notifications import queue_notifications
+
+
+class BulkActionError(ValueError):
+    pass
+
+
+def parse_bulk_request(data, choices):
+    """Validate {"ids": [...], "status": ...}; returns (ids, status)."""
+    ids, target = data.get('ids'), data.get('status')
+    if target not in dict(choices):
+        raise BulkActionError(f"status must be one of: {', '.join(dict(choices))}")
+    if not isinstance(ids, list) or not ids:
+        raise BulkActionError('ids must be a non-empty list')
+    limit = getattr(settings, 'BULK_ACTION_MAX_IDS', 1000)
+    if len(ids) > limit:
+        raise BulkActionError(f'At most {limit} ids per request')
+    try:
+        ids = list(dict.fromkeys(int(pk) for pk in ids))
+    except (TypeError, ValueError):
+        raise BulkActionError('ids must be integers')
+    return ids, target
+
+
+def bulk_set_status(queryset, ids, target, fields=(), extra=None, notification=None, after_update=None):
+    """
+    Move the rows of `queryset` with these ids to `target` in one UPDATE.
+
+    Runs one locking SELECT (id, status, student's user and `fields`), one
+    UPDATE and one bulk insert of notifications, whatever the number of ids.
+    `notification` is (subject, message template) formatted with the row's
+    `fields` and `status`. `after_update(rows)` gets the changed rows as
+    they were before, for counters the UPDATE bypasses. Returns per-id results.
+    """
+    with transaction.atomic():
+        rows = queryset.filter(pk__in=ids).order_by()
+        if connection.features.has_select_for_update:
+            rows = rows.select_for_update(of=('self',))
+        rows = {row['pk']: row for row in rows.values('pk', 'status', 'student__user_id', *fields)}
+
+        changed = [pk for pk, row in rows.items() if row['status'] != target]
+        if changed:
+            changes = {'status': target, **(extra or {})}
+            if any(f.name == 'updated_at' for f in queryset.model._meta.concrete_fields):
+                changes['updated_at'] = timezone.now()
+            queryset.model.objects.filter(pk__in=changed).update(**changes)
+            if after_update is not None:
+                after_update([rows[pk] for pk in changed])
+            rows_bulk_updated.send(sender=queryset.model, pks=changed, fields=list(changes))
+            if notification is not None:
+                subject, template = notification
+                label = dict(queryset.model._meta.get_field('status').choices)[target]
+                queue_notifications(
+                    (rows[pk]['student__user_id'], subject, template.format(**{**rows[pk], 'status': label.lower()}))
+                    for pk in changed
+                )
+            invalidate_dashboard()
+
+    results = {}
+    for pk in ids:
+        if pk not in rows:
+            results[pk] = 'not_found'
+        else:
+            results[pk] = 'updated' if rows[pk]['status'] != target else 'unchanged'
+    return results
@@ -0,0 +1,104 @@
+from datetime import datetime, time
+
+from dateutil.relativedelta import relativedelta
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q, Sum, Value
+from django.db.models.functions import Coalesce, TruncMonth
+from django.utils import timezone
+
+from hostel.cache import get_structure_version
+from hostel.models import Hostel
+from .models import StudentProfile, Rent, Payment, Complaint, LeaveApplication
+
+RECENT_ACTIVITY_LIMIT = 5
+REVENUE_MONTHS = 6
+
+
+def _cache_key():
+    # Bed occupancy changes bump the structure version, which retires the entry
+    return f'activity:dashboard:{get_structure_version()}'
+
+
+def invalidate_dashboard():
+    cache.delete(_cache_key())
+
+
+def _display_name(user):
+    return user.get_full_name() or user.username
+
+
+def _recent_activity():
+    leaves = LeaveApplication.objects.select_related('student__user').order_by('-id')[:RECENT_ACTIVITY_LIMIT]
+    complaints = Complaint.objects.select_related('student__user').order_by('-id')[:RECENT_ACTIVITY_LIMIT]
+    payments = Payment.objects.select_related('rent__student__user').order_by('-id')[:RECENT_ACTIVITY_LIMIT]
+    events = (
+        [{'user': _display_name(l.student.user), 'action': 'applied for Leave', 'date': l.applied_at,
+          'status': l.status, 'id': f'LV-{l.id}'} for l in leaves]
+        + [{'user': _display_name(c.student.user), 'action': 'submitted a Complaint', 'date': c.created_at,
+            'status': c.status, 'id': f'CP-{c.id}'} for c in complaints]
+        + [{'user': _display_name(p.rent.student.user), 'action': 'paid Monthly Rent', 'date': p.payment_date,
+            'status': 'confirmed' if p.status == 'captured' else p.status, 'id': f'PY-{p.id}'} for p in payments]
+    )
+    events.sort(key=lambda e: e['date'], reverse=True)
+    return events[:RECENT_ACTIVITY_LIMIT]
+
+
+def compute_dashboard(today=None):
+    """Every dashboard figure from a fixed set of aggregate queries."""
+    today = today or timezone.localdate()
+    this_month = today.replace(day=1)
+    first_month = this_month - relativedelta(months=REVENUE_MONTHS - 1)
+    zero = Value(0)
+
+    students = StudentProfile.objects.aggregate(
+        total=Count('pk'),
+        active=Count('pk', filter=Q(current_bed__isnull=False)),
+        unverified=Count('pk', filter=Q(is_verified=False)),
+    )
+    # Occupancy comes from the maintained hostel counters (hostel.occupancy)
+    beds = Hostel.objects.aggregate(total=Coalesce(Sum('total_beds'), zero), occupied=Coalesce(Sum('occupied_beds'), zero))
+    rents = Rent.objects.filter(month=this_month).aggregate(
+        billed=Coalesce(Sum('amount'), zero, output_field=Rent._meta.get_field('amount')),
+        late_fees=Coalesce(Sum('late_fee'), zero, output_field=Rent._meta.get_field('late_fee')),
+        paid=Count('pk', filter=Q(status='paid')),
+        unpaid=Count('pk', filter=Q(status='unpaid')),
+    )
+    revenue = dict(
+        Payment.objects.filter(status='captured', payment_date__gte=timezone.make_aware(datetime.combine(first_month, time.min)))
+        .annotate(month=TruncMonth('payment_date')).values('month')
+        .annotate(total=Sum('amount')).values_list('month', 'total')
+    )
+    revenue = {m.date() if hasattr(m, 'date') else m: total for m, total in revenue.items()}
+    complaints = Complaint.objects.aggregate(
+        pending=Count('pk', filter=Q(status='pending')),
+        in_progress=Count('pk', filter=Q(status='in_progress')),
+        unassigned=Count('pk', filter=Q(assigned_to__isnull=True) & ~Q(status='resolved')),
+    )
+    pending_leaves = LeaveApplication.objects.filter(status='pending').count()
+
+    months = [first_month + relativedelta(months=i) for i in range(REVENUE_MONTHS)]
+    return {
+        'active_students': students['active'],
+        'total_students': students['total'],
+        'unverified_students': students['unverified'],
+        'beds': {'total': beds['total'], 'occupied': beds['occupied'], 'free': beds['total'] - beds['occupied']},
+        'occupancy_rate': round(100 * beds['occupied'] / beds['total'], 1) if beds['total'] else 0,
+        'monthly_revenue': revenue.get(this_month, 0),
+        'revenue_by_month': [{'month': m.strftime('%Y-%m'), 'total': revenue.get(m, 0)} for m in months],
+        'rents': rents,
+        'open_issues': complaints['pending'] + complaints['in_progress'],
+        'complaints': complaints,
+        'pending_leaves': pending_leaves,
+        'recent_activity': _recent_activity(),
+        'generated_at': timezone.now(),
+    }
+
+
+def get_dashboard():
+    key = _cache_key()
+    data = cache.get(key)
+    if data is None:
+        data = compute_dashboard()
+        cache.set(key, data, getattr(settings, 'DASHBOARD_CACHE_TIMEOUT', 60))
+    return data
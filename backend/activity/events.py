@@ -0,0 +1,84 @@
+import json
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+
+from core.pubsub import SubscriptionLost, get_broker
+from .models import Complaint, LeaveApplication, Rent
+
+# model -> (event type, extra fields sent with the status)
+STATUS_EVENTS = {
+    Complaint: ('complaint.status', ('title',)),
+    LeaveApplication: ('leave.status', ('start_date', 'end_date')),
+    Rent: ('rent.status', ('month',)),
+}
+
+
+def user_channel(user_id):
+    return f'user.{user_id}'
+
+
+def _recipients(model, row):
+    users = {row['student__user_id']}
+    if model is Complaint and row.get('assigned_to_id'):
+        users.add(row['assigned_to_id'])
+    return users
+
+
+def publish_status_changes(model, rows):
+    """
+    Push a status event to the student (and, for complaints, the assigned
+    staff) for each row once the surrounding transaction commits. Rows are
+    dicts with id, status, student__user_id and the model's extra fields.
+    """
+    event_type, fields = STATUS_EVENTS[model]
+    messages = []
+    for row in rows:
+        message = {'type': event_type, 'id': row['id'], 'status': row['status'],
+                   **{field: row[field] for field in fields}}
+        # Round-trip once so every backend delivers the same plain JSON types
+        message = json.loads(json.dumps(message, cls=DjangoJSONEncoder))
+        messages.extend((user_channel(user_id), message) for user_id in _recipients(model, row) if user_id)
+    if messages:
+        transaction.on_commit(lambda: [get_broker().publish(channel, message) for channel, message in messages])
+
+
+def status_rows(model, pks):
+    _, fields = STATUS_EVENTS[model]
+    columns = ['id', 'status', 'student__user_id', *fields]
+    if model is Complaint:
+        columns.append('assigned_to_id')
+    return model.objects.filter(pk__in=pks).values(*columns)
+
+
+def instance_row(instance):
+    _, fields = STATUS_EVENTS[type(instance)]
+    row = {'id': instance.pk, 'status': instance.status, 'student__user_id': instance.student.user_id,
+           **{field: getattr(instance, field) for field in fields}}
+    if isinstance(instance, Complaint):
+        row['assigned_to_id'] = instance.assigned_to_id
+    return row
+
+
+def format_event(message):
+    return f"event: {message['type']}\ndata: {json.dumps(message)}\n\n"
+
+
+async def event_stream(user_id):
+    """
+    Server-Sent Events for one user. A comment line goes out every
+    EVENT_STREAM_HEARTBEAT_SECONDS so proxies keep the connection open and a
+    vanished client is noticed on the next write.
+    """
+    heartbeat = getattr(settings, 'EVENT_STREAM_HEARTBEAT_SECONDS', 20)
+    async with get_broker().subscribe(user_channel(user_id)) as subscription:
+        yield f"retry: {getattr(settings, 'EVENT_STREAM_RETRY_MS', 5000)}\n: connected\n\n"
+        while True:
+            try:
+                message = await subscription.get(timeout=heartbeat)
+            except SubscriptionLost:
+                # The client reconnects and reloads, which is cheaper than replaying
+                yield 'event: reset\ndata: {}\n\n'
+                return
+            yield ': ping\n\n' if message is None else format_event(message)
@@ -0,0 +1,162 @@
+import csv
+import os
+import tempfile
+
+from django.db.models import Count, F, Q, Sum, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import Rent, Payment
+
+CHUNK_SIZE = 2000
+# Rents only link to the student, so location columns and the hostel filter
+# follow the student's *current* bed: a student who moved is reported under
+# the new hostel for all months, and one who left has no hostel
+HOSTEL = 'student__current_bed__room__floor__hostel'
+
+
+class ExportError(ValueError):
+    pass
+
+
+def _student_columns(prefix=''):
+    return [
+        ('student_id', f'{prefix}student_id'),
+        ('username', f'{prefix}student__user__username'),
+        ('first_name', f'{prefix}student__user__first_name'),
+        ('last_name', f'{prefix}student__user__last_name'),
+        ('current_hostel', f'{prefix}{HOSTEL}__name'),
+        ('current_floor', f'{prefix}student__current_bed__room__floor__number'),
+        ('current_room', f'{prefix}student__current_bed__room__number'),
+        ('current_bed', f'{prefix}student__current_bed__identifier'),
+    ]
+
+
+def _filter(queryset, prefix, filters):
+    if filters.get('start'):
+        queryset = queryset.filter(**{f'{prefix}month__gte': filters['start']})
+    if filters.get('end'):
+        queryset = queryset.filter(**{f'{prefix}month__lte': filters['end']})
+    if filters.get('hostel'):
+        queryset = queryset.filter(**{f'{prefix}{HOSTEL}': filters['hostel']})
+    if filters.get('status'):
+        queryset = queryset.filter(status=filters['status'])
+    return queryset
+
+
+def rent_rows(filters):
+    columns = [('rent_id', 'id'), ('month', 'month'), ('due_date', 'due_date'), ('amount', 'amount'),
+               ('late_fee', 'late_fee'), ('status', 'status')] + _student_columns()
+    queryset = _filter(Rent.objects.order_by('month', 'id'), '', filters)
+    return columns, queryset
+
+
+def payment_rows(filters):
+    columns = [('payment_id', 'id'), ('transaction_id', 'transaction_id'), ('payment_date', 'payment_date'),
+               ('amount', 'amount'), ('status', 'status'), ('method', 'method'), ('rent_id', 'rent_id'),
+               ('month', 'rent__month')] + _student_columns('rent__')
+    queryset = _filter(Payment.objects.order_by('payment_date', 'id'), 'rent__', filters)
+    return columns, queryset
+
+
+def collection_rows(filters):
+    """Per month and current hostel of the student: billed vs collected, aggregated in the database."""
+    zero = Value(0)
+    queryset = (
+        _filter(Rent.objects.all(), '', filters)
+        .values('month', f'{HOSTEL}__name')
+        .annotate(
+            rents=Count('id'),
+            paid=Count('id', filter=Q(status='paid')),
+            billed=Coalesce(Sum('amount'), zero, output_field=Rent._meta.get_field('amount')),
+            late_fees=Coalesce(Sum('late_fee'), zero, output_field=Rent._meta.get_field('late_fee')),
+            collected=Coalesce(Sum(F('amount') + F('late_fee'), filter=Q(status='paid')), zero,
+                               output_field=Rent._meta.get_field('amount')),
+        )
+        .order_by('month', f'{HOSTEL}__name')
+    )
+    columns = [('month', 'month'), ('current_hostel', f'{HOSTEL}__name'), ('rents', 'rents'), ('paid', 'paid'),
+               ('billed', 'billed'), ('late_fees', 'late_fees'), ('collected', 'collected')]
+    return columns, queryset
+
+
+EXPORTS = {
+    'rents': rent_rows,
+    'payments': payment_rows,
+    'collections': collection_rows,
+}
+
+
+def export_rows(kind, filters):
+    """Return (header, row iterator); rows stream from a server-side cursor."""
+    if kind not in EXPORTS:
+        raise ExportError(f"Unknown export '{kind}'. Choose from: {', '.join(EXPORTS)}.")
+    columns, queryset = EXPORTS[kind](filters)
+    header = [name for name, _ in columns]
+    rows = queryset.values_list(*[field for _, field in columns]).iterator(chunk_size=CHUNK_SIZE)
+    return header, rows
+
+
+class _Echo:
+    """csv.writer target that hands each line straight back."""
+
+    def write(self, value):
+        return value
+
+
+def iter_csv(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def _xlsx_value(value):
+    # Excel has no time zones: write aware datetimes as local wall-clock time
+    if getattr(value, 'tzinfo', None) is not None:
+        return timezone.localtime(value).replace(tzinfo=None)
+    return value
+
+
+def iter_xlsx(header, rows, sheet='Export'):
+    """
+    openpyxl's write-only mode keeps constant memory; the workbook is spooled
+    to a temporary file (XLSX is a ZIP and needs a seekable target) and then
+    streamed back in chunks. Nothing is built until the first chunk is asked
+    for, and the file is removed even if the download is aborted.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportError('XLSX export requires openpyxl (pip install openpyxl).')
+    return _stream_xlsx(Workbook, header, rows, sheet)
+
+
+def _stream_xlsx(Workbook, header, rows, sheet):
+    fd, path = tempfile.mkstemp(suffix='.xlsx')
+    os.close(fd)
+    try:
+        workbook = Workbook(write_only=True)
+        worksheet = workbook.create_sheet(sheet)
+        worksheet.append(header)
+        for row in rows:
+            worksheet.append([_xlsx_value(v) for v in row])
+        workbook.save(path)
+        with open(path, 'rb') as f:
+            while chunk := f.read(64 * 1024):
+                yield chunk
+    finally:
+        os.unlink(path)
+
+
+CONTENT_TYPES = {
+    'csv': 'text/csv',
+    'xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+}
+
+
+def render_export(kind, ext, filters):
+    if ext not in CONTENT_TYPES:
+        raise ExportError(f"Unknown format '{ext}'. Use csv or xlsx.")
+    header, rows = export_rows(kind, filters)
+    return iter_csv(header, rows) if ext == 'csv' else iter_xlsx(header, rows, sheet=kind)
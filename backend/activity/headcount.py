@@ -0,0 +1,87 @@
+from datetime import date, timedelta
+
+from django.utils import timezone
+
+from hostel.models import Hostel
+from .models import LeaveApplication
+
+MAX_DAYS = 366
+
+
+class HeadcountError(ValueError):
+    pass
+
+
+def parse_range(start, end):
+    try:
+        start, end = date.fromisoformat(start), date.fromisoformat(end)
+    except (TypeError, ValueError):
+        raise HeadcountError('from and to must be dates (YYYY-MM-DD)')
+    if end < start:
+        raise HeadcountError('to must not be before from')
+    if start < timezone.localdate():
+        # Only current allocations are stored, so past populations are unknown
+        raise HeadcountError('from must not be in the past')
+    if (end - start).days >= MAX_DAYS:
+        raise HeadcountError(f'At most {MAX_DAYS} days per request')
+    return start, end
+
+
+def daily_headcount(start, end, hostel_id=None):
+    """
+    Present/away students per hostel for each day in [start, end].
+
+    Approved leaves overlapping the range come back in one range scan of
+    leave_interval_idx; each student's intervals are merged, clipped and
+    swept into a per-day difference array. The population is the hostel's
+    maintained occupied_beds counter, i.e. today's residents, so the counts
+    are a forecast that assumes current allocations; parse_range keeps
+    callers from asking about past days. Cost is O(leaves + days).
+    """
+    hostels = Hostel.objects.order_by('name')
+    if hostel_id is not None:
+        hostels = hostels.filter(pk=hostel_id)
+    hostels = list(hostels.values('id', 'name', 'occupied_beds'))
+    days = (end - start).days + 1
+
+    leaves = (
+        LeaveApplication.objects
+        .filter(status='approved', start_date__lte=end, end_date__gte=start, student__current_bed__isnull=False)
+        .values_list('student__current_bed__room__floor__hostel_id', 'student_id', 'start_date', 'end_date')
+        .order_by('student_id', 'start_date')
+    )
+    if hostel_id is not None:
+        leaves = leaves.filter(student__current_bed__room__floor__hostel_id=hostel_id)
+
+    away = {h['id']: [0] * (days + 1) for h in hostels}
+    current = None  # (hostel, student, first day index, last day index)
+
+    def close(interval):
+        if interval is not None and interval[0] in away:
+            diff = away[interval[0]]
+            diff[interval[2]] += 1
+            diff[interval[3] + 1] -= 1
+
+    for hostel, student, leave_start, leave_end in leaves:
+        first = max((leave_start - start).days, 0)
+        last = min((leave_end - start).days, days - 1)
+        if current and current[1] == student and first <= current[3] + 1:
+            # Overlapping or back-to-back leaves of one student count once
+            current = (hostel, student, current[2], max(current[3], last))
+            continue
+        close(current)
+        current = (hostel, student, first, last)
+    close(current)
+
+    results = []
+    for h in hostels:
+        diff, running, series = away[h['id']], 0, []
+        for offset in range(days):
+            running += diff[offset]
+            series.append({
+                'date': start + timedelta(days=offset),
+                'present': h['occupied_beds'] - running,
+                'away': running,
+            })
+        results.append({'hostel': h['id'], 'name': h['name'], 'population': h['occupied_beds'], 'days': series})
+    return results
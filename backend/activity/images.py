@@ -0,0 +1,154 @@
+import io
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+# (app_label.Model, image field, JSON field holding the variant names)
+IMAGE_FIELDS = (
+    ('activity.StudentProfile', 'photo', 'photo_variants'),
+    ('activity.Complaint', 'image', 'image_variants'),
+)
+DEFAULT_VARIANTS = {'thumb': 160, 'medium': 640}
+MAX_ORIGINAL_SIZE = 2048
+REENCODE_FORMATS = {'JPEG': 'JPEG', 'MPO': 'JPEG', 'PNG': 'PNG', 'WEBP': 'WEBP'}
+
+_executor = None
+
+
+def get_variants():
+    return getattr(settings, 'IMAGE_VARIANTS', DEFAULT_VARIANTS)
+
+
+def variant_name(name, variant):
+    """student_photos/a.jpg -> student_photos/variants/a_thumb.webp"""
+    folder, filename = os.path.split(name)
+    return os.path.join(folder, 'variants', f'{os.path.splitext(filename)[0]}_{variant}.webp')
+
+
+def validate_reencodable(upload):
+    """
+    Field validator for uploads: only formats process_file re-encodes are
+    accepted, since anything else (GIF, HEIC, TIFF...) would be stored with
+    its metadata intact.
+    """
+    from PIL import Image
+
+    image = getattr(upload, 'image', None)  # set by Django's ImageField validation
+    if image is None:
+        upload.seek(0)
+        image = Image.open(upload)
+        upload.seek(0)
+    if image.format not in REENCODE_FORMATS:
+        raise ValidationError(
+            f"{image.format or 'This'} images are not supported; upload a JPEG, PNG or WebP.", code='invalid_image_format',
+        )
+
+
+def _replace(storage, name, content):
+    if storage.exists(name):
+        storage.delete(name)
+    return storage.save(name, ContentFile(content))
+
+
+def _encode(image, fmt, **options):
+    buffer = io.BytesIO()
+    image.save(buffer, fmt, **options)
+    return buffer.getvalue()
+
+
+def process_file(storage, name):
+    """
+    Re-encode the image without metadata (EXIF, GPS, ICC) at most
+    MAX_ORIGINAL_SIZE px on the long side, and write one WebP per
+    variant. Returns (stored original name, {variant: name}).
+    """
+    from PIL import Image, ImageOps
+
+    with storage.open(name, 'rb') as f:
+        source = Image.open(f)
+        fmt = REENCODE_FORMATS.get(source.format)
+        image = ImageOps.exif_transpose(source)
+        image.load()
+
+    if image.mode not in ('RGB', 'RGBA'):
+        image = image.convert('RGBA' if 'transparency' in image.info or image.mode in ('LA', 'PA') else 'RGB')
+    # A fresh image carries pixels only, so nothing from the upload's metadata survives
+    clean = Image.new(image.mode, image.size)
+    clean.paste(image)
+    clean.thumbnail((MAX_ORIGINAL_SIZE, MAX_ORIGINAL_SIZE), Image.LANCZOS)
+
+    if fmt:
+        if fmt == 'JPEG' and clean.mode == 'RGBA':
+            clean = clean.convert('RGB')
+        options = {'quality': 85, 'optimize': True} if fmt in ('JPEG', 'WEBP') else {'optimize': True}
+        name = _replace(storage, name, _encode(clean, fmt, **options))
+
+    variants = {}
+    for variant, size in get_variants().items():
+        thumb = clean.copy()
+        thumb.thumbnail((size, size), Image.LANCZOS)
+        variants[variant] = _replace(storage, variant_name(name, variant), _encode(thumb, 'WEBP', quality=80, method=4))
+    return name, variants
+
+
+def process_instance(model_label, pk, field_name, variants_field):
+    """Process one row's image if it changed since it was last processed."""
+    model = apps.get_model(model_label)
+    instance = model.objects.filter(pk=pk).only('pk', field_name, variants_field).first()
+    if instance is None:
+        return False
+    image = getattr(instance, field_name)
+    current = getattr(instance, variants_field) or {}
+    if not image or current.get('source') == image.name:
+        return False
+
+    name, variants = process_file(image.storage, image.name)
+    variants['source'] = name
+    for key, old in current.items():
+        if key != 'source' and old not in variants.values():
+            image.storage.delete(old)
+    # Only write if the upload hasn't been replaced meanwhile
+    updated = model.objects.filter(pk=pk, **{field_name: image.name}).update(**{field_name: name, variants_field: variants})
+    return bool(updated)
+
+
+def _run(model_label, pk, field_name, variants_field):
+    close_old_connections()
+    try:
+        process_instance(model_label, pk, field_name, variants_field)
+    except Exception:
+        logger.exception('Image processing failed for %s %s.%s', model_label, pk, field_name)
+    finally:
+        close_old_connections()
+
+
+def schedule(model_label, pk, field_name, variants_field):
+    """
+    Process after the current transaction commits: on a small thread pool,
+    or inline when IMAGE_PROCESSING_ASYNC is off. `manage.py process_images`
+    picks up anything a restart dropped.
+    """
+    global _executor
+    if not getattr(settings, 'IMAGE_PROCESSING_ASYNC', True):
+        transaction.on_commit(lambda: process_instance(model_label, pk, field_name, variants_field))
+        return
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'IMAGE_WORKERS', 2), thread_name_prefix='images')
+    transaction.on_commit(lambda: _executor.submit(_run, model_label, pk, field_name, variants_field))
+
+
+def pending(model_label, field_name, variants_field):
+    """Primary keys whose image has not been processed in its current form."""
+    model = apps.get_model(model_label)
+    rows = model.objects.exclude(**{field_name: ''}).exclude(**{f'{field_name}__isnull': True})
+    for pk, name, variants in rows.values_list('pk', field_name, variants_field).iterator():
+        if (variants or {}).get('source') != name:
+            yield pk
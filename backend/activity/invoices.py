@@ -0,0 +1,173 @@
+import hashlib
+import os
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+
+from django.conf import settings
+from reportlab.pdfgen import canvas
+
+from .models import Rent
+
+INVOICE_RELATED = ('student__user', 'student__current_bed__room__floor__hostel')
+
+
+def invoice_context(rent):
+    """Plain, picklable values an invoice is drawn from (rent must use INVOICE_RELATED)."""
+    bed = rent.student.current_bed
+    return {
+        'id': rent.id,
+        'hostel': bed.room.floor.hostel.name if bed else 'N/A',
+        'student': rent.student.user.get_full_name() or rent.student.user.username,
+        'month': rent.month.strftime('%B %Y'),
+        'date': rent.created_at.strftime('%d-%m-%Y'),
+        'amount': str(rent.amount),
+        'late_fee': str(rent.late_fee),
+        'total': str(rent.amount + rent.late_fee),
+        'status': rent.get_status_display(),
+    }
+
+
+def invoice_version(context):
+    """Changes whenever anything printed on the invoice (amount, late fee, status...) changes."""
+    payload = '|'.join(f'{key}={context[key]}' for key in sorted(context))
+    return hashlib.sha1(payload.encode()).hexdigest()[:16]
+
+
+def render_invoice(context):
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer)
+
+    p.setFont("Helvetica-Bold", 16)
+    p.drawString(100, 800, "RENT INVOICE")
+
+    p.setFont("Helvetica", 12)
+    p.drawString(100, 770, f"Hostel: {context['hostel']}")
+    p.drawString(100, 755, f"Student: {context['student']}")
+    p.drawString(100, 740, f"Month: {context['month']}")
+    p.drawString(100, 725, f"Date: {context['date']}")
+
+    p.line(100, 715, 500, 715)
+
+    p.drawString(100, 690, "Description")
+    p.drawString(400, 690, "Amount")
+
+    p.drawString(100, 670, f"Monthly Rent for {context['month']}")
+    p.drawString(400, 670, f"INR {context['amount']}")
+
+    if float(context['late_fee']) > 0:
+        p.drawString(100, 650, "Late Fee")
+        p.drawString(400, 650, f"INR {context['late_fee']}")
+
+    p.line(100, 640, 500, 640)
+
+    p.setFont("Helvetica-Bold", 12)
+    p.drawString(100, 620, "Total")
+    p.drawString(400, 620, f"INR {context['total']}")
+
+    p.setFont("Helvetica", 10)
+    p.drawString(100, 580, f"Status: {context['status']}")
+
+    p.showPage()
+    p.save()
+    return buffer.getvalue()
+
+
+def _cache_dir():
+    path = Path(getattr(settings, 'INVOICE_CACHE_DIR', settings.BASE_DIR / 'invoice_cache'))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def cached_path(context):
+    return _cache_dir() / f"{context['id']}-{invoice_version(context)}.pdf"
+
+
+def _store(context, pdf):
+    path = cached_path(context)
+    # Write then rename so readers never see a partial file
+    tmp = path.with_suffix(f'.{os.getpid()}.tmp')
+    tmp.write_bytes(pdf)
+    os.replace(tmp, path)
+    for stale in path.parent.glob(f"{context['id']}-*.pdf"):
+        if stale != path:
+            stale.unlink(missing_ok=True)
+    return path
+
+
+def get_invoice_pdf(rent):
+    context = invoice_context(rent)
+    path = cached_path(context)
+    if path.exists():
+        return path.read_bytes()
+    pdf = render_invoice(context)
+    _store(context, pdf)
+    return pdf
+
+
+def month_rents(month):
+    return Rent.objects.filter(month=month).select_related(*INVOICE_RELATED).order_by('pk')
+
+
+def iter_month(month, workers=None):
+    """
+    Yield (filename, path) for every invoice of `month` in rent order as soon
+    as it is on disk. Cached invoices come straight away; missing ones are
+    rendered across a process pool and yielded as their turn comes, so a ZIP
+    built from this starts streaming before the whole month is rendered.
+    """
+    contexts = [invoice_context(rent) for rent in month_rents(month).iterator(chunk_size=2000)]
+    missing = [c for c in contexts if not cached_path(c).exists()]
+    workers = workers or getattr(settings, 'INVOICE_WORKERS', None) or os.cpu_count() or 1
+    pool = ProcessPoolExecutor(max_workers=workers) if len(missing) > 1 and workers > 1 else None
+    rendered = pool.map(render_invoice, missing, chunksize=32) if pool else map(render_invoice, missing)
+    missing_ids = {c['id'] for c in missing}
+    finished = False
+    try:
+        for context in contexts:
+            path = _store(context, next(rendered)) if context['id'] in missing_ids else cached_path(context)
+            yield f"invoice_{context['id']}_{month.strftime('%Y_%m')}.pdf", path
+        finished = True
+    finally:
+        if pool:
+            # An aborted download should not wait for the rest of the month
+            pool.shutdown(wait=finished, cancel_futures=not finished)
+
+
+def render_month(month, workers=None):
+    """Make sure every invoice for `month` is on disk. Returns [(filename, path)] in rent order."""
+    return list(iter_month(month, workers))
+
+
+class _ZipStream:
+    """Write-only file object zipfile can target; collects bytes for the generator."""
+
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        chunks, self.chunks = self.chunks, []
+        return b''.join(chunks)
+
+
+def stream_zip(files):
+    """Yield a ZIP archive of [(name, path)] file by file without buffering it all."""
+    sink = _ZipStream()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_STORED) as archive:
+        for name, path in files:
+            archive.write(path, arcname=name)
+            yield sink.drain()
+    yield sink.drain()
@@ -1,26 +1,32 @@
-from django.core.management.base import BaseCommand
-from activity.models import Rent
 from datetime import date
-from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from activity.billing import LateFeePolicyError, apply_late_fees, get_late_fee_policy
 
 class Command(BaseCommand):
     help = 'Apply late fees to overdue unpaid rent records'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--as-of', help='Evaluate overdue days as of this date (YYYY-MM-DD, default: today)')
+        parser.add_argument('--policy', choices=['flat', 'per_day', 'tiered'], help='Override settings.LATE_FEE_POLICY mode')
+        parser.add_argument('--chunk-size', type=int, help='Update at most this many rents per statement')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would change without writing')
+
     def handle(self, *args, **options):
-        today = date.today()
-        # Find unpaid rents where due date has passed and late fee is not yet applied
-        overdue_rents = Rent.objects.filter(
-            status='unpaid', 
-            due_date__lt=today,
-            late_fee=0
-        )
-        
-        count = 0
-        LATE_FEE_AMOUNT = Decimal('200.00') # Fixed late fee
+        try:
+            as_of = date.fromisoformat(options['as_of']) if options['as_of'] else date.today()
+        except ValueError:
+            raise CommandError('--as-of must be a date in YYYY-MM-DD format.')
+        try:
+            policy = get_late_fee_policy(mode=options['policy'])
+        except LateFeePolicyError as e:
+            raise CommandError(str(e))
+
+        counts = apply_late_fees(as_of, policy, chunk_size=options['chunk_size'], dry_run=options['dry_run'])
 
-        for rent in overdue_rents:
-            rent.late_fee = LATE_FEE_AMOUNT
-            rent.save()
-            count += 1
-        
-        self.stdout.write(self.style.SUCCESS(f'Successfully applied late fees to {count} overdue rent records.'))
+        for label, count in sorted(counts.items()):
+            self.stdout.write(f'  {label}: {count}')
+        verb = 'Would apply' if options['dry_run'] else 'Successfully applied'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {policy["mode"]} late fees to {sum(counts.values())} overdue rent records as of {as_of}.'
+        ))
@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+from activity.assignment import rebalance, rebuild_workloads
+from activity.models import StaffWorkload
+
+class Command(BaseCommand):
+    help = 'Assign unassigned complaints and rebalance staff queues by open workload'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rebuild', action='store_true', help='Recount open complaint counters first')
+        parser.add_argument('--no-move', action='store_true', help='Only assign unassigned complaints')
+        parser.add_argument('--loop', action='store_true', help='Keep rebalancing')
+        parser.add_argument('--interval', type=float, default=60, help='Seconds between runs with --loop')
+
+    def handle(self, *args, **options):
+        if options['rebuild']:
+            rebuild_workloads()
+        while True:
+            started = time.perf_counter()
+            stats = rebalance(move=not options['no_move'])
+            self.stdout.write(self.style.SUCCESS(
+                f"Assigned {stats['assigned']}, moved {stats['moved']}, "
+                f"{stats['unassignable']} without eligible staff ({time.perf_counter() - started:.2f}s)"
+            ))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
+
+        if options['verbosity'] > 1:
+            for workload in StaffWorkload.objects.select_related('staff').order_by('-open_complaints'):
+                self.stdout.write(f'  {workload}')
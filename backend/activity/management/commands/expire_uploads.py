@@ -0,0 +1,14 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from activity.uploads import expire_uploads
+
+class Command(BaseCommand):
+    help = 'Delete resumable uploads that have been idle too long, with their partial files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--hours', type=float, default=24, help='Idle time after which an upload is dropped')
+
+    def handle(self, *args, **options):
+        count = expire_uploads(timedelta(hours=options['hours']))
+        self.stdout.write(self.style.SUCCESS(f'Expired {count} idle uploads.'))
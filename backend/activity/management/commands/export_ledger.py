@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from activity.billing import parse_month
+from activity.exports import EXPORTS, ExportError, render_export
+
+class Command(BaseCommand):
+    help = ('Stream a rents, payments or collections export to CSV or XLSX. Hostel, floor, room and bed '
+            'come from the student\'s current allocation, not the one at the time of the rent')
+
+    def add_arguments(self, parser):
+        parser.add_argument('kind', choices=sorted(EXPORTS))
+        parser.add_argument('--from', dest='start', help='First month (YYYY-MM)')
+        parser.add_argument('--to', dest='end', help='Last month (YYYY-MM)')
+        parser.add_argument('--hostel', type=int, help="Hostel id, matched on the student's current bed")
+        parser.add_argument('--status', help='Rent/payment status')
+        parser.add_argument('--format', choices=['csv', 'xlsx'], default='csv')
+        parser.add_argument('--output', help='File to write (default: stdout, CSV only)')
+
+    def handle(self, *args, **options):
+        try:
+            filters = {
+                'start': parse_month(options['start']) if options['start'] else None,
+                'end': parse_month(options['end']) if options['end'] else None,
+                'hostel': options['hostel'],
+                'status': options['status'],
+            }
+        except ValueError:
+            raise CommandError('Months must be given as YYYY-MM.')
+        if options['format'] == 'xlsx' and not options['output']:
+            raise CommandError('--output is required for XLSX exports.')
+
+        try:
+            stream = render_export(options['kind'], options['format'], filters)
+        except ExportError as e:
+            raise CommandError(str(e))
+
+        if not options['output']:
+            for chunk in stream:
+                self.stdout.write(chunk, ending='')
+            return
+        mode = 'w' if options['format'] == 'csv' else 'wb'
+        with open(options['output'], mode, newline='' if mode == 'w' else None) as out:
+            for chunk in stream:
+                out.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f'Wrote {options["output"]}'))
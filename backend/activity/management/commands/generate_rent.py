@@ -1,29 +1,46 @@
-from django.core.management.base import BaseCommand
-from activity.models import StudentProfile, Rent
+import time
 from datetime import date
-from dateutil.relativedelta import relativedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from activity.billing import DEFAULT_CHUNK_SIZE, DEFAULT_DUE_DAY, generate_rents, month_range, parse_month
 
 class Command(BaseCommand):
     help = 'Generate monthly rent for all students with active room allocation'
 
+    def add_arguments(self, parser):
+        parser.add_argument('--month', help='Month to bill as YYYY-MM (default: current month)')
+        parser.add_argument('--from', dest='start', help='Back-fill from this month (YYYY-MM)')
+        parser.add_argument('--to', dest='end', help='Back-fill up to this month (YYYY-MM, default: --from or current month)')
+        parser.add_argument('--due-day', type=int, default=DEFAULT_DUE_DAY, help='Day of month rent is due')
+        parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help='Students per batch')
+        parser.add_argument('--dry-run', action='store_true', help='Report what would be created without writing')
+
     def handle(self, *args, **options):
-        today = date.today()
-        first_day_of_month = today.replace(day=1)
-        due_date = first_day_of_month + relativedelta(days=9) # Due on 10th
+        try:
+            if options['start']:
+                start = parse_month(options['start'])
+                end = parse_month(options['end']) if options['end'] else date.today().replace(day=1)
+            else:
+                start = end = parse_month(options['month']) if options['month'] else date.today().replace(day=1)
+        except ValueError:
+            raise CommandError('Months must be given as YYYY-MM.')
+        if end < start:
+            raise CommandError('--to must not be before --from.')
+        if not 1 <= options['due_day'] <= 28:
+            raise CommandError('--due-day must be between 1 and 28.')
 
-        students = StudentProfile.objects.filter(current_bed__isnull=False)
-        count = 0
+        started = time.perf_counter()
+        created = generate_rents(
+            month_range(start, end),
+            due_day=options['due_day'],
+            chunk_size=options['chunk_size'],
+            dry_run=options['dry_run'],
+        )
+        elapsed = time.perf_counter() - started
 
-        for student in students:
-            # Check if rent already exists for this student and month
-            if not Rent.objects.filter(student=student, month=first_day_of_month).exists():
-                Rent.objects.create(
-                    student=student,
-                    amount=student.current_bed.room.rent_amount,
-                    month=first_day_of_month,
-                    due_date=due_date,
-                    status='unpaid'
-                )
-                count += 1
-        
-        self.stdout.write(self.style.SUCCESS(f'Successfully generated {count} rent records for {first_day_of_month.strftime("%B %Y")}'))
+        verb = 'Would generate' if options['dry_run'] else 'Generated'
+        for month, count in created.items():
+            self.stdout.write(f'{verb} {count} rent records for {month.strftime("%B %Y")}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Successfully {"checked" if options["dry_run"] else "generated"} {sum(created.values())} rent records in {elapsed:.2f}s'
+        ))
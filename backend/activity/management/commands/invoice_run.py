@@ -0,0 +1,34 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from activity.billing import parse_month
+from activity.invoices import render_month, stream_zip
+
+class Command(BaseCommand):
+    help = 'Render (and cache) every rent invoice for a month, optionally bundling them into a ZIP'
+
+    def add_arguments(self, parser):
+        parser.add_argument('month', help='Month to render as YYYY-MM')
+        parser.add_argument('--workers', type=int, help='Rendering processes (default: one per CPU)')
+        parser.add_argument('--output', help='Write a ZIP of the invoices to this path')
+
+    def handle(self, *args, **options):
+        try:
+            month = parse_month(options['month'])
+        except ValueError:
+            raise CommandError('Month must be given as YYYY-MM.')
+
+        started = time.perf_counter()
+        files = render_month(month, workers=options['workers'])
+        elapsed = time.perf_counter() - started
+        rate = len(files) / elapsed if elapsed else 0
+
+        if options['output']:
+            with open(options['output'], 'wb') as out:
+                for chunk in stream_zip(files):
+                    out.write(chunk)
+            self.stdout.write(f'Wrote {options["output"]}')
+
+        self.stdout.write(self.style.SUCCESS(
+            f'Rendered {len(files)} invoices for {month.strftime("%B %Y")} in {elapsed:.2f}s ({rate:.0f}/s)'
+        ))
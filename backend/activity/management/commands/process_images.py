@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+from activity.images import IMAGE_FIELDS, pending, process_instance
+
+class Command(BaseCommand):
+    help = 'Generate stripped, resized originals and WebP variants for unprocessed uploads'
+
+    def handle(self, *args, **options):
+        for label, field_name, variants_field in IMAGE_FIELDS:
+            done = failed = 0
+            for pk in list(pending(label, field_name, variants_field)):
+                try:
+                    done += process_instance(label, pk, field_name, variants_field)
+                except Exception as e:
+                    failed += 1
+                    self.stderr.write(f'{label} {pk}: {e}')
+            self.stdout.write(self.style.SUCCESS(f'{label}.{field_name}: {done} processed, {failed} failed'))
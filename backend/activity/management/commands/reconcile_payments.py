@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from activity.reconciliation import DEFAULT_BATCH_SIZE, import_settlements, process_events
+
+class Command(BaseCommand):
+    help = 'Apply pending payment webhook events and reconcile settlement CSV files'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Events per transaction')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the inbox')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop')
+        parser.add_argument('--settlements', nargs='+', default=[], metavar='CSV', help='Settlement report files to import')
+
+    def handle(self, *args, **options):
+        for path in options['settlements']:
+            try:
+                with open(path, newline='', encoding='utf-8-sig') as f:
+                    report = import_settlements(f)
+            except OSError as e:
+                raise CommandError(str(e))
+            self.stdout.write(
+                f"{path}: {report['rows']} rows, {report['matched']} matched, "
+                f"{len(report['missing'])} unknown payments, {len(report['mismatched'])} amount mismatches"
+            )
+            for payment_id in report['missing']:
+                self.stdout.write(f'  missing: {payment_id}')
+            for row in report['mismatched']:
+                self.stdout.write(f"  mismatch: {row['transaction_id']} settled {row['settled']}, recorded {row['recorded']}")
+
+        while True:
+            started = time.perf_counter()
+            stats, _ = process_events(batch_size=options['batch_size'])
+            if stats or not options['loop']:
+                summary = ', '.join(f'{count} {name}' for name, count in sorted(stats.items())) or 'no pending events'
+                self.stdout.write(self.style.SUCCESS(f'Reconciled webhook events: {summary} ({time.perf_counter() - started:.2f}s)'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,23 @@
+import time
+
+from django.core.management.base import BaseCommand
+from activity.notifications import DEFAULT_BATCH_SIZE, deliver_pending
+
+class Command(BaseCommand):
+    help = 'Deliver queued notifications from the outbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE, help='Messages per mail connection')
+        parser.add_argument('--loop', action='store_true', help='Keep polling the outbox')
+        parser.add_argument('--interval', type=float, default=5, help='Seconds between polls with --loop')
+
+    def handle(self, *args, **options):
+        while True:
+            started = time.perf_counter()
+            stats = deliver_pending(batch_size=options['batch_size'])
+            if any(stats.values()) or not options['loop']:
+                summary = ', '.join(f'{count} {name}' for name, count in stats.items())
+                self.stdout.write(self.style.SUCCESS(f'Delivered notifications: {summary} ({time.perf_counter() - started:.2f}s)'))
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
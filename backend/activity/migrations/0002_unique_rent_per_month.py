@@ -0,0 +1,45 @@
+# Generated by Django 4.2.27 on 2026-10-18 08:47
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def merge_duplicate_rents(apps, schema_editor):
+    """
+    Duplicate (student, month) rents could be created through the API or by
+    racing generate_rent runs. Keep one per pair, preferring a paid rent,
+    then one with payments, then the oldest, and move every payment onto it.
+    """
+    Rent = apps.get_model('activity', 'Rent')
+    Payment = apps.get_model('activity', 'Payment')
+
+    pairs = (
+        Rent.objects.values('student_id', 'month').annotate(n=Count('pk')).filter(n__gt=1)
+        .values_list('student_id', 'month')
+    )
+    for student_id, month in list(pairs):
+        rents = list(
+            Rent.objects.filter(student_id=student_id, month=month)
+            .annotate(payment_count=Count('payments')).order_by('pk')
+        )
+        keeper = min(rents, key=lambda r: (r.status != 'paid', r.payment_count == 0, r.pk))
+        others = [r.pk for r in rents if r.pk != keeper.pk]
+        Payment.objects.filter(rent_id__in=others).update(rent_id=keeper.pk)
+        if keeper.status != 'paid' and Payment.objects.filter(rent_id=keeper.pk).exists():
+            Rent.objects.filter(pk=keeper.pk).update(status='paid')
+        Rent.objects.filter(pk__in=others).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(merge_duplicate_rents, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='rent',
+            constraint=models.UniqueConstraint(fields=('student', 'month'), name='unique_rent_per_student_month'),
+        ),
+    ]
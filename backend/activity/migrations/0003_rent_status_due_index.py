@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 08:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0002_unique_rent_per_month'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='rent',
+            index=models.Index(fields=['status', 'due_date'], name='rent_status_due_idx'),
+        ),
+    ]
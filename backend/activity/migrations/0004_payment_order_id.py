@@ -0,0 +1,18 @@
+# Generated by Django 4.2.27 on 2026-10-18 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0003_rent_status_due_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='order_id',
+            field=models.CharField(blank=True, db_index=True, max_length=100, null=True),
+        ),
+    ]
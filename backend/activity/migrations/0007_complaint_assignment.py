@@ -0,0 +1,65 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:01
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def rebuild_workloads(apps, schema_editor):
+    # Frozen copy of activity.assignment.rebuild_workloads as of this migration
+    User = apps.get_model(settings.AUTH_USER_MODEL)
+    Complaint = apps.get_model('activity', 'Complaint')
+    StaffWorkload = apps.get_model('activity', 'StaffWorkload')
+    staff = User.objects.filter(role='staff').values_list('pk', flat=True)
+    StaffWorkload.objects.bulk_create([StaffWorkload(staff_id=pk) for pk in staff], ignore_conflicts=True)
+    open_complaints = (
+        Complaint.objects.filter(assigned_to=OuterRef('staff'), status__in=('pending', 'in_progress'))
+        .order_by().values('assigned_to').annotate(n=Count('pk')).values('n')
+    )
+    StaffWorkload.objects.update(open_complaints=Coalesce(Subquery(open_complaints, output_field=IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0006_notification_outbox'),
+        ('hostel', '0003_floor_plan_constraints'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StaffWorkload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('open_complaints', models.IntegerField(default=0, editable=False)),
+                ('accepts_assignments', models.BooleanField(default=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='complaint',
+            index=models.Index(fields=['assigned_to', 'status'], name='complaint_queue_idx'),
+        ),
+        migrations.AddField(
+            model_name='staffworkload',
+            name='floor',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hostel.floor'),
+        ),
+        migrations.AddField(
+            model_name='staffworkload',
+            name='hostel',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='hostel.hostel'),
+        ),
+        migrations.AddField(
+            model_name='staffworkload',
+            name='staff',
+            field=models.OneToOneField(limit_choices_to={'role': 'staff'}, on_delete=django.db.models.deletion.CASCADE, related_name='workload', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='staffworkload',
+            index=models.Index(fields=['accepts_assignments', 'open_complaints'], name='workload_pick_idx'),
+        ),
+        migrations.RunPython(rebuild_workloads, migrations.RunPython.noop),
+    ]
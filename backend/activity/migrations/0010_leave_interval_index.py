@@ -0,0 +1,17 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0009_chunked_uploads'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='leaveapplication',
+            index=models.Index(fields=['status', 'end_date', 'start_date'], name='leave_interval_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.27 on 2026-10-18 09:46
+
+import activity.images
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('activity', '0010_leave_interval_index'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='complaint',
+            name='image',
+            field=models.ImageField(blank=True, null=True, upload_to='complaint_images/', validators=[activity.images.validate_reencodable]),
+        ),
+        migrations.AlterField(
+            model_name='studentprofile',
+            name='photo',
+            field=models.ImageField(blank=True, null=True, upload_to='student_photos/', validators=[activity.images.validate_reencodable]),
+        ),
+    ]
@@ -1,10 +1,16 @@
+import uuid
+
 from django.db import models
 from django.conf import settings
-from hostel.models import Bed
+from django.utils import timezone
+from hostel.models import Bed, Floor, Hostel
+from .images import validate_reencodable
 
 class StudentProfile(models.Model):
     user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='student_profile')
-    photo = models.ImageField(upload_to='student_photos/', blank=True, null=True)
+    photo = models.ImageField(upload_to='student_photos/', blank=True, null=True, validators=[validate_reencodable])
+    # {"source": <processed photo name>, "thumb": ..., "medium": ...}; see activity/images.py
+    photo_variants = models.JSONField(default=dict, blank=True, editable=False)
     id_proof = models.FileField(upload_to='id_proofs/', blank=True, null=True)
     address = models.TextField(blank=True, null=True)
     current_bed = models.OneToOneField(Bed, on_delete=models.SET_NULL, null=True, blank=True, related_name='occupied_by')
@@ -27,12 +33,36 @@ class Document(models.Model):
     student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='documents')
     doc_type = models.CharField(max_length=20, choices=DOC_TYPES)
     file = models.FileField(upload_to='student_documents/')
+    # Files are stored under their SHA-256 (activity/uploads.py), so rows with
+    # identical content share one blob
+    sha256 = models.CharField(max_length=64, blank=True, null=True, db_index=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     uploaded_at = models.DateTimeField(auto_now_add=True)
 
     def __str__(self):
         return f"{self.student.user.username} - {self.doc_type}"
 
+class UploadSession(models.Model):
+    """A resumable document upload; chunks are appended to a temp file until completed."""
+    STATUS_CHOICES = (
+        ('open', 'Open'),
+        ('complete', 'Complete'),
+    )
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    student = models.ForeignKey(StudentProfile, on_delete=models.CASCADE, related_name='upload_sessions')
+    doc_type = models.CharField(max_length=20, choices=Document.DOC_TYPES)
+    filename = models.CharField(max_length=255)
+    size = models.BigIntegerField()
+    received = models.BigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, null=True)
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='open')
+    document = models.ForeignKey(Document, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size}) - {self.status}"
+
 class Rent(models.Model):
     STATUS_CHOICES = (
         ('paid', 'Paid'),
@@ -46,20 +76,55 @@ class Rent(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='unpaid')
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['student', 'month'], name='unique_rent_per_student_month'),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'due_date'], name='rent_status_due_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.user.username} - {self.month.strftime('%B %Y')}"
 
 class Payment(models.Model):
     rent = models.ForeignKey(Rent, on_delete=models.CASCADE, related_name='payments')
     transaction_id = models.CharField(max_length=100, unique=True)
+    order_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
     amount = models.DecimalField(max_digits=10, decimal_places=2)
     status = models.CharField(max_length=20) # e.g., 'captured', 'failed'
     payment_date = models.DateTimeField(auto_now_add=True)
     method = models.CharField(max_length=50, blank=True, null=True)
+    settlement_id = models.CharField(max_length=100, blank=True, null=True)
+    settled_at = models.DateTimeField(blank=True, null=True)
 
     def __str__(self):
         return f"Payment {self.transaction_id} for {self.rent}"
 
+class PaymentEvent(models.Model):
+    """Inbox of gateway webhook events, applied later by `manage.py reconcile_payments`."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('processed', 'Processed'),
+        ('ignored', 'Ignored'),
+        ('failed', 'Failed'),
+    )
+    event_id = models.CharField(max_length=100, unique=True)
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    error = models.TextField(blank=True, null=True)
+    received_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'id'], name='payment_event_status_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.event_type} ({self.event_id}) - {self.status}"
+
 class Complaint(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -70,15 +135,41 @@ class Complaint(models.Model):
     assigned_to = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, blank=True, limit_choices_to={'role': 'staff'})
     title = models.CharField(max_length=200)
     description = models.TextField()
-    image = models.ImageField(upload_to='complaint_images/', blank=True, null=True)
+    image = models.ImageField(upload_to='complaint_images/', blank=True, null=True, validators=[validate_reencodable])
+    image_variants = models.JSONField(default=dict, blank=True, editable=False)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     remarks = models.TextField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['assigned_to', 'status'], name='complaint_queue_idx'),
+        ]
+
     def __str__(self):
         return f"{self.title} - {self.status}"
 
+class StaffWorkload(models.Model):
+    """
+    Per-staff open complaint counter used by the assignment engine. Kept in
+    step by signals; `manage.py assign_complaints --rebuild` recounts it.
+    Optional hostel/floor limit the complaints a staff member is given.
+    """
+    staff = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='workload', limit_choices_to={'role': 'staff'})
+    open_complaints = models.IntegerField(default=0, editable=False)
+    hostel = models.ForeignKey(Hostel, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    floor = models.ForeignKey(Floor, on_delete=models.SET_NULL, null=True, blank=True, related_name='+')
+    accepts_assignments = models.BooleanField(default=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['accepts_assignments', 'open_complaints'], name='workload_pick_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.staff.username}: {self.open_complaints} open"
+
 class LeaveApplication(models.Model):
     STATUS_CHOICES = (
         ('pending', 'Pending'),
@@ -92,5 +183,36 @@ class LeaveApplication(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     applied_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Overlap lookups (end_date >= from AND start_date <= to) for the headcount
+            models.Index(fields=['status', 'end_date', 'start_date'], name='leave_interval_idx'),
+        ]
+
     def __str__(self):
         return f"{self.student.user.username} - {self.start_date} to {self.end_date}"
+
+class Notification(models.Model):
+    """Outbox row; delivered in batches by `manage.py send_notifications`."""
+    STATUS_CHOICES = (
+        ('pending', 'Pending'),
+        ('sent', 'Sent'),
+        ('dead', 'Dead'),
+    )
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='notifications')
+    subject = models.CharField(max_length=200)
+    message = models.TextField()
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, null=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(blank=True, null=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='notification_due_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} to {self.user} - {self.status}"
@@ -0,0 +1,115 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Notification
+
+DEFAULT_BATCH_SIZE = 200
+FANOUT_CHUNK = 2000
+
+
+def send_notification(user, subject, message):
+    """
+    Queue a notification in the outbox. Runs in the caller's transaction, so
+    it is only delivered if the change it announces commits.
+    """
+    return Notification.objects.create(user=user, subject=subject, message=message)
+
+
+def queue_notifications(items):
+    """Bulk-queue (user_id, subject, message) tuples. Returns how many were queued."""
+    queued, batch = 0, []
+    for user_id, subject, message in items:
+        batch.append(Notification(user_id=user_id, subject=subject, message=message))
+        if len(batch) >= FANOUT_CHUNK:
+            Notification.objects.bulk_create(batch)
+            queued, batch = queued + len(batch), []
+    if batch:
+        Notification.objects.bulk_create(batch)
+        queued += len(batch)
+    return queued
+
+
+def broadcast(user_ids, subject, message):
+    return queue_notifications((user_id, subject, message) for user_id in user_ids)
+
+
+def _retry_delay(attempts):
+    base = getattr(settings, 'NOTIFICATION_RETRY_BASE_SECONDS', 60)
+    return timedelta(seconds=base * 2 ** (attempts - 1))
+
+
+def _claim(batch_size):
+    with transaction.atomic():
+        due = Notification.objects.filter(status='pending', next_attempt_at__lte=timezone.now()).order_by('id')
+        if connection.features.has_select_for_update:
+            due = due.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked, of=('self',))
+        batch = list(due.select_related('user')[:batch_size])
+        # Push the claimed rows out of the due window so a parallel worker skips them
+        lease = timezone.now() + timedelta(minutes=5)
+        Notification.objects.filter(pk__in=[n.pk for n in batch]).update(next_attempt_at=lease)
+    return batch
+
+
+def deliver_pending(batch_size=DEFAULT_BATCH_SIZE, max_batches=None):
+    """
+    Deliver due notifications over one reused mail connection per batch.
+    Failures back off exponentially; after NOTIFICATION_MAX_ATTEMPTS the
+    row is dead-lettered. Returns counts by outcome.
+    """
+    max_attempts = getattr(settings, 'NOTIFICATION_MAX_ATTEMPTS', 5)
+    from_email = getattr(settings, 'DEFAULT_FROM_EMAIL', None)
+    stats = {'sent': 0, 'retry': 0, 'dead': 0}
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        batch = _claim(batch_size)
+        if not batch:
+            break
+        batches += 1
+        now = timezone.now()
+        mail = get_connection(fail_silently=False)
+        handled = set()
+        try:
+            mail.open()
+            for notification in batch:
+                handled.add(notification.pk)
+                notification.attempts += 1
+                try:
+                    if not notification.user.email:
+                        raise ValueError('User has no email address')
+                    EmailMessage(notification.subject, notification.message, from_email,
+                                 [notification.user.email], connection=mail).send()
+                except Exception as e:
+                    notification.last_error = str(e)
+                    if notification.attempts >= max_attempts or isinstance(e, ValueError):
+                        notification.status = 'dead'
+                        stats['dead'] += 1
+                    else:
+                        notification.next_attempt_at = now + _retry_delay(notification.attempts)
+                        stats['retry'] += 1
+                else:
+                    notification.status, notification.sent_at, notification.last_error = 'sent', now, None
+                    stats['sent'] += 1
+        except Exception as e:
+            # Could not even open the connection: the rows not tried yet count
+            # it as a failed attempt, so a broken mail setup still dead-letters
+            for notification in batch:
+                if notification.pk in handled:
+                    continue
+                notification.attempts += 1
+                notification.last_error = str(e)
+                if notification.attempts >= max_attempts:
+                    notification.status = 'dead'
+                    stats['dead'] += 1
+                else:
+                    notification.next_attempt_at = now + _retry_delay(notification.attempts)
+                    stats['retry'] += 1
+        finally:
+            mail.close()
+        Notification.objects.bulk_update(
+            batch, ['status', 'attempts', 'next_attempt_at', 'last_error', 'sent_at'], batch_size=500
+        )
+    return stats
@@ -0,0 +1,192 @@
+import hashlib
+import hmac
+import itertools
+import threading
+import time
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils.module_loading import import_string
+from requests.adapters import HTTPAdapter
+
+from .models import Rent, Payment
+
+ORDER_CACHE_TIMEOUT = 15 * 60
+
+
+class PaymentVerificationError(Exception):
+    pass
+
+
+class _TimeoutSession(requests.Session):
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class RazorpayGateway:
+    """Razorpay over one pooled, keep-alive HTTP session shared by the process."""
+
+    def __init__(self, key_id, key_secret, timeout=(3.05, 10), pool_size=20):
+        import razorpay
+
+        session = _TimeoutSession(timeout)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        self.key_secret = key_secret
+        self.client = razorpay.Client(session=session, auth=(key_id, key_secret))
+
+    def create_order(self, amount, currency, receipt, notes=None):
+        return self.client.order.create({
+            'amount': amount,
+            'currency': currency,
+            'receipt': receipt,
+            'payment_capture': '1',
+            'notes': notes or {},
+        })
+
+    def fetch_order(self, order_id):
+        return self.client.order.fetch(order_id)
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        try:
+            self.client.utility.verify_payment_signature({
+                'razorpay_order_id': order_id,
+                'razorpay_payment_id': payment_id,
+                'razorpay_signature': signature
+            })
+        except Exception as e:
+            raise PaymentVerificationError(str(e) or 'Signature mismatch')
+
+    def verify_webhook_signature(self, body, signature, secret):
+        try:
+            self.client.utility.verify_webhook_signature(body, signature, secret)
+        except Exception as e:
+            raise PaymentVerificationError(str(e) or 'Signature mismatch')
+
+
+class FakeGateway:
+    """
+    Offline stand-in with Razorpay's signature scheme, for local runs and
+    benchmarks. `latency` (seconds) simulates the network round trip.
+    """
+
+    def __init__(self, key_id='test', key_secret='test', latency=0, **kwargs):
+        self.key_secret = key_secret
+        self.latency = latency
+        self._ids = itertools.count(1)
+        self._orders = {}
+
+    @staticmethod
+    def _hmac(secret, message):
+        return hmac.new(secret.encode(), message.encode(), hashlib.sha256).hexdigest()
+
+    def sign(self, order_id, payment_id):
+        return self._hmac(self.key_secret, f'{order_id}|{payment_id}')
+
+    def create_order(self, amount, currency, receipt, notes=None):
+        if self.latency:
+            time.sleep(self.latency)
+        order = {'id': f'order_fake{next(self._ids)}', 'entity': 'order', 'amount': amount,
+                 'currency': currency, 'receipt': receipt, 'notes': notes or {}, 'status': 'created'}
+        self._orders[order['id']] = order
+        return order
+
+    def fetch_order(self, order_id):
+        if order_id not in self._orders:
+            raise KeyError(order_id)
+        return self._orders[order_id]
+
+    def verify_webhook_signature(self, body, signature, secret):
+        if not hmac.compare_digest(self._hmac(secret, body), signature or ''):
+            raise PaymentVerificationError('Razorpay Signature Verification Failed')
+
+    def verify_payment_signature(self, order_id, payment_id, signature):
+        if not hmac.compare_digest(self.sign(order_id, payment_id), signature or ''):
+            raise PaymentVerificationError('Razorpay Signature Verification Failed')
+
+
+_gateway = None
+_gateway_lock = threading.Lock()
+
+
+def get_gateway():
+    """Process-wide gateway built from settings.PAYMENT_GATEWAY on first use."""
+    global _gateway
+    if _gateway is None:
+        with _gateway_lock:
+            if _gateway is None:
+                gateway_class = import_string(getattr(settings, 'PAYMENT_GATEWAY', 'activity.payments.RazorpayGateway'))
+                _gateway = gateway_class(
+                    key_id=getattr(settings, 'RAZORPAY_KEY_ID', 'test'),
+                    key_secret=getattr(settings, 'RAZORPAY_KEY_SECRET', 'test'),
+                    **getattr(settings, 'PAYMENT_GATEWAY_OPTIONS', {}),
+                )
+    return _gateway
+
+
+def reset_gateway():
+    global _gateway
+    _gateway = None
+
+
+def create_order(rent):
+    """
+    Create (or reuse) the gateway order for a rent. A double-clicked "Pay"
+    gets the same order back as long as the amount hasn't changed.
+    """
+    amount = int((rent.amount + rent.late_fee) * 100)
+    key = f'payment:order:{rent.id}:{amount}'
+    order = cache.get(key)
+    if order is None:
+        order = get_gateway().create_order(amount, 'INR', f'rent_{rent.id}', notes={'rent_id': str(rent.id)})
+        cache.set(key, order, ORDER_CACHE_TIMEOUT)
+    return order
+
+
+def record_payment(rent, order_id, payment_id, signature=None, verify=True, method='razorpay'):
+    """
+    Mark the rent paid and store its Payment exactly once per payment id.
+    Returns (payment, created). The rent row is locked for the duration, and a
+    replay or concurrent duplicate gets the existing payment back.
+    """
+    if verify:
+        get_gateway().verify_payment_signature(order_id, payment_id, signature)
+
+    existing = Payment.objects.filter(transaction_id=payment_id).first()
+    if existing is not None:
+        return _same_rent(existing, rent), False
+    try:
+        with transaction.atomic():
+            rent = Rent.objects.select_for_update().get(pk=rent.pk)
+            existing = Payment.objects.filter(transaction_id=payment_id).first()
+            if existing is not None:
+                return _same_rent(existing, rent), False
+            if rent.status != 'paid':
+                rent.status = 'paid'
+                rent.save(update_fields=['status'])
+            payment = Payment.objects.create(
+                rent=rent,
+                transaction_id=payment_id,
+                order_id=order_id,
+                amount=rent.amount + rent.late_fee,
+                status='captured',
+                method=method
+            )
+    except IntegrityError:
+        # Lost a race on the unique transaction_id to a concurrent duplicate
+        return _same_rent(Payment.objects.get(transaction_id=payment_id), rent), False
+    return payment, True
+
+
+def _same_rent(payment, rent):
+    if payment.rent_id != rent.pk:
+        raise PaymentVerificationError(f'Payment {payment.transaction_id} belongs to another rent.')
+    return payment
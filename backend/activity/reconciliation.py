@@ -0,0 +1,273 @@
+import csv
+import hashlib
+import io
+import json
+from collections import Counter
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from core.signals import rows_bulk_updated
+from .dashboard import invalidate_dashboard
+from .models import Rent, Payment, PaymentEvent, StudentProfile
+from .notifications import queue_notifications
+from .payments import PaymentVerificationError, get_gateway
+
+CAPTURE_EVENTS = ('payment.captured', 'order.paid')
+DEFAULT_BATCH_SIZE = 500
+SETTLEMENT_CHUNK = 1000
+
+
+def ingest_event(body, signature, event_id=None):
+    """
+    Verify a webhook delivery and append it to the inbox. Redeliveries of the
+    same event id are dropped by the unique constraint. Returns the event id.
+    """
+    secret = getattr(settings, 'RAZORPAY_WEBHOOK_SECRET', '')
+    if not secret:
+        raise PaymentVerificationError('Webhook secret is not configured')
+    text = body.decode('utf-8') if isinstance(body, bytes) else body
+    get_gateway().verify_webhook_signature(text, signature, secret)
+    try:
+        payload = json.loads(text)
+    except ValueError:
+        raise PaymentVerificationError('Webhook body is not JSON')
+
+    event_id = event_id or hashlib.sha256(text.encode()).hexdigest()
+    PaymentEvent.objects.bulk_create(
+        [PaymentEvent(event_id=event_id, event_type=str(payload.get('event', ''))[:50], payload=payload)],
+        ignore_conflicts=True,
+    )
+    return event_id
+
+
+def _entities(event):
+    body = event.payload.get('payload', {})
+    payment = body.get('payment', {}).get('entity') or {}
+    order = body.get('order', {}).get('entity') or {}
+    return payment, order
+
+
+def _rent_id_from(*sources):
+    for source in sources:
+        notes = source.get('notes') or {}
+        if isinstance(notes, dict) and str(notes.get('rent_id', '')).isdigit():
+            return int(notes['rent_id'])
+        receipt = source.get('receipt') or ''
+        if receipt.startswith('rent_') and receipt[5:].isdigit():
+            return int(receipt[5:])
+    return None
+
+
+def _resolve_rent_ids(captures):
+    """payment id -> rent id, from notes/receipts, known orders, then the gateway."""
+    resolved, unknown_orders = {}, {}
+    for payment_id, (event, payment, order) in captures.items():
+        rent_id = _rent_id_from(payment, order)
+        if rent_id:
+            resolved[payment_id] = rent_id
+        elif payment.get('order_id'):
+            unknown_orders[payment_id] = payment['order_id']
+    if unknown_orders:
+        known = dict(
+            Payment.objects.filter(order_id__in=set(unknown_orders.values())).values_list('order_id', 'rent_id')
+        )
+        for payment_id, order_id in unknown_orders.items():
+            rent_id = known.get(order_id)
+            if rent_id is None:
+                try:
+                    rent_id = _rent_id_from(get_gateway().fetch_order(order_id))
+                except Exception:
+                    rent_id = None
+            if rent_id:
+                resolved[payment_id] = rent_id
+    return resolved
+
+
+def _insert_payments(payments):
+    """
+    Insert the payments and return those actually written. If one lost a
+    race on its transaction_id, fall back to row-by-row inserts so only the
+    rows that landed are reported and notified.
+    """
+    try:
+        with transaction.atomic():
+            Payment.objects.bulk_create(payments)
+        return payments
+    except IntegrityError:
+        inserted = []
+        for payment in payments:
+            payment.pk = None
+            try:
+                with transaction.atomic():
+                    payment.save(force_insert=True)
+            except IntegrityError:
+                continue
+            inserted.append(payment)
+        return inserted
+
+
+def _apply_batch(events):
+    stats = Counter()
+    now = timezone.now()
+    captures = {}
+    for event in events:
+        payment, order = _entities(event)
+        if event.event_type not in CAPTURE_EVENTS or not payment.get('id'):
+            event.status, event.error = 'ignored', None
+        elif payment['id'] in captures:
+            event.status, event.error = 'processed', 'duplicate delivery in batch'
+        else:
+            captures[payment['id']] = (event, payment, order)
+        event.processed_at = now
+
+    # Cheap pre-check so payments we already hold are not looked up at the gateway
+    known = set(Payment.objects.filter(transaction_id__in=captures).values_list('transaction_id', flat=True))
+    rent_ids = _resolve_rent_ids({pid: c for pid, c in captures.items() if pid not in known})
+    rents = Rent.objects.filter(pk__in=set(rent_ids.values()))
+    if connection.features.has_select_for_update:
+        rents = rents.select_for_update()
+    rents = rents.in_bulk()
+    # Re-read under the rent locks: verify_payment may have committed one of these meanwhile
+    existing = set(Payment.objects.filter(transaction_id__in=captures).values_list('transaction_id', flat=True))
+
+    new_payments, paid_in_batch = [], set()
+    for payment_id, (event, payment, order) in captures.items():
+        event.status, event.error = 'processed', None
+        if payment_id in existing:
+            stats['already_recorded'] += 1
+            continue
+        rent = rents.get(rent_ids.get(payment_id))
+        if rent is None:
+            event.status, event.error = 'failed', 'No rent matches this payment'
+            stats['unmatched'] += 1
+            continue
+        if rent.pk in paid_in_batch:
+            event.status, event.error = 'failed', 'Rent already paid by another capture in this batch'
+            stats['duplicate_rent'] += 1
+            continue
+        amount = Decimal(payment.get('amount', 0)) / 100
+        due = rent.amount + rent.late_fee
+        if amount < due:
+            event.status, event.error = 'failed', f'Amount mismatch: paid {amount}, due {due}'
+            stats['amount_mismatch'] += 1
+            continue
+        new_payments.append(Payment(
+            rent=rent, transaction_id=payment_id, order_id=payment.get('order_id'),
+            amount=amount, status='captured', method=payment.get('method') or 'razorpay',
+        ))
+        paid_in_batch.add(rent.pk)
+
+    new_payments = _insert_payments(new_payments)
+    stats['recorded'] += len(new_payments)
+    if len(new_payments) < len(paid_in_batch):
+        stats['already_recorded'] += len(paid_in_batch) - len(new_payments)
+    paid_rents = {p.rent_id for p in new_payments}
+    student_users = dict(StudentProfile.objects.filter(
+        pk__in={p.rent.student_id for p in new_payments}).values_list('id', 'user_id'))
+    queue_notifications(
+        (student_users[p.rent.student_id], "Rent Payment Received", f"Your payment of ₹{p.amount} has been confirmed.")
+        for p in new_payments
+    )
+    newly_paid = list(Rent.objects.filter(pk__in=paid_rents).exclude(status='paid').values_list('pk', flat=True))
+    if newly_paid:
+        Rent.objects.filter(pk__in=newly_paid).update(status='paid')
+        rows_bulk_updated.send(sender=Rent, pks=newly_paid, fields=['status'])
+    PaymentEvent.objects.bulk_update(events, ['status', 'error', 'processed_at'])
+    ignored = sum(1 for e in events if e.status == 'ignored')
+    if ignored:
+        stats['ignored'] += ignored
+    return stats, new_payments
+
+
+def process_events(batch_size=DEFAULT_BATCH_SIZE, max_batches=None):
+    """
+    Apply pending inbox events in id order, one transaction per batch.
+    Returns (stats, recorded payments).
+    """
+    stats, recorded, batches = Counter(), [], 0
+    while max_batches is None or batches < max_batches:
+        with transaction.atomic():
+            events = PaymentEvent.objects.filter(status='pending').order_by('id')
+            if connection.features.has_select_for_update:
+                events = events.select_for_update(skip_locked=connection.features.has_select_for_update_skip_locked)
+            events = list(events[:batch_size])
+            if not events:
+                break
+            batch_stats, payments = _apply_batch(events)
+        stats.update(batch_stats)
+        recorded += payments
+        batches += 1
+    if recorded:
+        invalidate_dashboard()
+    return stats, recorded
+
+
+def _pick(row, *names):
+    for name in names:
+        if row.get(name):
+            return row[name].strip()
+    return ''
+
+
+def _parse_settled_at(value):
+    if not value:
+        return None
+    if value.isdigit():
+        return datetime.fromtimestamp(int(value), tz=dt_timezone.utc)
+    parsed = parse_datetime(value)
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def import_settlements(stream):
+    """
+    Match a gateway settlement CSV against recorded payments in chunks,
+    storing settlement id/time and reporting payments we don't know about
+    or whose amounts differ.
+    """
+    if isinstance(stream, bytes):
+        stream = io.StringIO(stream.decode('utf-8-sig'))
+    reader = csv.DictReader(stream)
+    reader.fieldnames = [(name or '').strip().lower() for name in reader.fieldnames or []]
+    report = {'rows': 0, 'matched': 0, 'missing': [], 'mismatched': []}
+
+    def flush(chunk):
+        payments = Payment.objects.filter(transaction_id__in=chunk).in_bulk(field_name='transaction_id')
+        updated = []
+        for payment_id, row in chunk.items():
+            payment = payments.get(payment_id)
+            if payment is None:
+                report['missing'].append(payment_id)
+                continue
+            try:
+                amount = Decimal(_pick(row, 'amount', 'credit') or '0')
+            except InvalidOperation:
+                amount = None
+            if amount != payment.amount:
+                report['mismatched'].append({'transaction_id': payment_id, 'settled': str(amount), 'recorded': str(payment.amount)})
+                continue
+            payment.settlement_id = _pick(row, 'settlement_id') or payment.settlement_id
+            payment.settled_at = _parse_settled_at(_pick(row, 'settled_at')) or payment.settled_at or timezone.now()
+            updated.append(payment)
+        Payment.objects.bulk_update(updated, ['settlement_id', 'settled_at'])
+        report['matched'] += len(updated)
+
+    chunk = {}
+    for row in reader:
+        payment_id = _pick(row, 'payment_id', 'transaction_id', 'entity_id')
+        if not payment_id:
+            continue
+        report['rows'] += 1
+        chunk[payment_id] = row
+        if len(chunk) >= SETTLEMENT_CHUNK:
+            flush(chunk)
+            chunk = {}
+    if chunk:
+        flush(chunk)
+    return report
@@ -2,6 +2,21 @@ from rest_framework import serializers
 from .models import StudentProfile, Document, Rent, Payment, Complaint, LeaveApplication
 from accounts.serializers import UserSerializer
 from hostel.serializers import BedSerializer
+from core.fieldsets import SparseFieldsetMixin
+
+class ImageVariantsField(serializers.ReadOnlyField):
+    """Variant names from activity/images.py as URLs: {"thumb": url, "medium": url}."""
+    def to_representation(self, value):
+        from django.core.files.storage import default_storage
+
+        request = self.context.get('request')
+        urls = {}
+        for variant, name in (value or {}).items():
+            if variant == 'source':
+                continue
+            url = default_storage.url(name)
+            urls[variant] = request.build_absolute_uri(url) if request is not None else url
+        return urls
 
 class DocumentSerializer(serializers.ModelSerializer):
     class Meta:
@@ -13,20 +28,23 @@ class PaymentSerializer(serializers.ModelSerializer):
         model = Payment
         fields = '__all__'
 
-class RentSerializer(serializers.ModelSerializer):
+class RentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     payments = PaymentSerializer(many=True, read_only=True)
     
     class Meta:
         model = Rent
         fields = '__all__'
+        expandable = ['payments']
+        related = {'payments': 'payments'}
 
 class ComplaintSerializer(serializers.ModelSerializer):
     student_name = serializers.CharField(source='student.user.username', read_only=True)
     assigned_to_name = serializers.CharField(source='assigned_to.username', read_only=True)
+    image_variants = ImageVariantsField()
 
     class Meta:
         model = Complaint
-        fields = ['id', 'student', 'student_name', 'assigned_to', 'assigned_to_name', 'title', 'description', 'status', 'remarks', 'created_at', 'updated_at']
+        fields = ['id', 'student', 'student_name', 'assigned_to', 'assigned_to_name', 'title', 'description', 'image', 'image_variants', 'status', 'remarks', 'created_at', 'updated_at']
         read_only_fields = ['student', 'assigned_to']
 
     def validate(self, data):
@@ -48,12 +66,21 @@ class LeaveApplicationSerializer(serializers.ModelSerializer):
         fields = ['id', 'student', 'student_name', 'start_date', 'end_date', 'reason', 'status', 'applied_at']
         read_only_fields = ['student']
 
-class StudentProfileSerializer(serializers.ModelSerializer):
+class StudentProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
+    """Supports ?fields= and ?expand= (user, current_bed_details, documents, rents, rents.payments)."""
     user = UserSerializer(read_only=True)
     current_bed_details = BedSerializer(source='current_bed', read_only=True)
     documents = DocumentSerializer(many=True, read_only=True)
     rents = RentSerializer(many=True, read_only=True)
+    photo_variants = ImageVariantsField()
 
     class Meta:
         model = StudentProfile
         fields = '__all__'
+        expandable = ['user', 'current_bed_details', 'documents', 'rents']
+        related = {
+            'user': 'user',
+            'current_bed_details': 'current_bed__room__floor__hostel',
+            'documents': 'documents',
+            'rents': 'rents',
+        }
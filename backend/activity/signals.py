@@ -0,0 +1,134 @@
+from django.conf import settings
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from core.signals import rows_bulk_updated
+from hostel.occupancy import set_bed_occupied
+from .assignment import adjust_open, is_open
+from .dashboard import invalidate_dashboard
+from .events import STATUS_EVENTS, instance_row, publish_status_changes, status_rows
+from .images import IMAGE_FIELDS, schedule
+from .models import StudentProfile, Rent, Payment, Complaint, LeaveApplication, StaffWorkload
+
+
+@receiver(pre_save, sender=StudentProfile)
+def remember_current_bed(sender, instance, raw=False, **kwargs):
+    instance._previous_bed_id = None
+    if instance.pk and not raw:
+        instance._previous_bed_id = (
+            StudentProfile.objects.filter(pk=instance.pk).values_list('current_bed_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=StudentProfile)
+def sync_bed_occupancy(sender, instance, raw=False, **kwargs):
+    """Keep Bed.is_occupied (and so the occupancy counters) in step with allocations."""
+    if raw:
+        return
+    previous = getattr(instance, '_previous_bed_id', None)
+    if previous == instance.current_bed_id:
+        return
+    if previous:
+        set_bed_occupied(previous, False)
+    if instance.current_bed_id:
+        set_bed_occupied(instance.current_bed_id, True)
+
+
+@receiver(post_delete, sender=StudentProfile)
+def release_bed_on_delete(sender, instance, **kwargs):
+    if instance.current_bed_id:
+        set_bed_occupied(instance.current_bed_id, False)
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+def create_staff_workload(sender, instance, raw=False, **kwargs):
+    if not raw and instance.role == 'staff':
+        StaffWorkload.objects.get_or_create(staff=instance)
+
+
+@receiver(pre_save, sender=Complaint)
+def remember_assignment(sender, instance, raw=False, **kwargs):
+    instance._previous_assignment = (None, None)
+    if instance.pk and not raw:
+        instance._previous_assignment = (
+            Complaint.objects.filter(pk=instance.pk).values_list('assigned_to_id', 'status').first() or (None, None)
+        )
+
+
+@receiver(post_save, sender=Complaint)
+def sync_open_complaints(sender, instance, raw=False, **kwargs):
+    """Keep StaffWorkload.open_complaints in step with assignments and status changes."""
+    if raw:
+        return
+    previous_staff, previous_status = getattr(instance, '_previous_assignment', (None, None))
+    deltas = {}
+    if previous_staff and is_open(previous_status):
+        deltas[previous_staff] = -1
+    if instance.assigned_to_id and is_open(instance.status):
+        deltas[instance.assigned_to_id] = deltas.get(instance.assigned_to_id, 0) + 1
+    adjust_open(deltas)
+
+
+@receiver(post_delete, sender=Complaint)
+def release_open_complaint(sender, instance, **kwargs):
+    if instance.assigned_to_id and is_open(instance.status):
+        adjust_open({instance.assigned_to_id: -1})
+
+
+@receiver(post_save, sender=StudentProfile)
+@receiver(post_save, sender=Rent)
+@receiver(post_save, sender=Payment)
+@receiver(post_save, sender=Complaint)
+@receiver(post_save, sender=LeaveApplication)
+@receiver(post_delete, sender=StudentProfile)
+@receiver(post_delete, sender=Rent)
+@receiver(post_delete, sender=Payment)
+@receiver(post_delete, sender=Complaint)
+@receiver(post_delete, sender=LeaveApplication)
+def refresh_dashboard(sender, raw=False, **kwargs):
+    if not raw:
+        invalidate_dashboard()
+
+
+@receiver(pre_save, sender=LeaveApplication)
+@receiver(pre_save, sender=Rent)
+def remember_status(sender, instance, raw=False, update_fields=None, **kwargs):
+    instance._previous_status = None
+    if instance.pk and not raw and (update_fields is None or 'status' in update_fields):
+        instance._previous_status = sender.objects.filter(pk=instance.pk).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Complaint)
+@receiver(post_save, sender=LeaveApplication)
+@receiver(post_save, sender=Rent)
+def push_status_change(sender, instance, created, raw=False, update_fields=None, **kwargs):
+    """Notify connected clients when a complaint, leave or rent changes status."""
+    if raw or created or (update_fields is not None and 'status' not in update_fields):
+        return
+    if sender is Complaint:
+        previous = getattr(instance, '_previous_assignment', (None, None))[1]
+    else:
+        previous = getattr(instance, '_previous_status', None)
+    if previous is not None and previous != instance.status:
+        publish_status_changes(sender, [instance_row(instance)])
+
+
+@receiver(rows_bulk_updated)
+def push_bulk_status_change(sender, pks, fields=(), **kwargs):
+    if sender in STATUS_EVENTS and 'status' in fields:
+        publish_status_changes(sender, status_rows(sender, pks))
+
+
+def _schedule_image_processing(sender, instance, raw=False, **kwargs):
+    """Queue thumbnail/WebP generation when an image was uploaded or replaced."""
+    if raw:
+        return
+    for label, field_name, variants_field in IMAGE_FIELDS:
+        if label == sender._meta.label:
+            image = getattr(instance, field_name)
+            if image and (getattr(instance, variants_field) or {}).get('source') != image.name:
+                schedule(label, instance.pk, field_name, variants_field)
+
+
+post_save.connect(_schedule_image_processing, sender=StudentProfile, dispatch_uid='student_photo_variants')
+post_save.connect(_schedule_image_processing, sender=Complaint, dispatch_uid='complaint_image_variants')
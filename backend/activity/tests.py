@@ -1,3 +1,1192 @@
-from django.test import TestCase
+import os
+import threading
+from importlib.util import find_spec
+from unittest import skipUnless
+from datetime import date
+from decimal import Decimal
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from hostel.models import Hostel, Floor, Room, Bed
+from .allocation import allocate_beds, normalize_requests
+from .models import StudentProfile, Rent
+
+
+def make_rooms(hostel_name='Hostel Alpha', rooms=5, capacity=2, room_type='double', rent='4000'):
+    hostel = Hostel.objects.create(name=hostel_name, address='Campus')
+    floor = Floor.objects.create(hostel=hostel, number=1)
+    for r in range(rooms):
+        room = Room.objects.create(floor=floor, number=f'1{r:02d}', room_type=room_type,
+                                   rent_amount=Decimal(rent), capacity=capacity)
+        for b in range(capacity):
+            Bed.objects.create(room=room, identifier=chr(65 + b))
+    return hostel
+
+
+def make_students(count, prefix='student', verified=True):
+    users = User.objects.bulk_create(User(username=f'{prefix}{i}') for i in range(count))
+    return StudentProfile.objects.bulk_create(StudentProfile(user=u, is_verified=verified) for u in users)
+
+
+class AllocationTests(TestCase):
+    def setUp(self):
+        self.hostel = make_rooms(rooms=2, capacity=2)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='manager', role='manager'))
+
+    def test_batch_allocation_respects_preferences(self):
+        cheap = make_rooms('Hostel Beta', rooms=1, capacity=3, room_type='triple', rent='2500')
+        students = make_students(6)
+        unverified = make_students(1, prefix='pending', verified=False)[0]
+        response = self.client.post('/api/activity/profiles/allocate/', {
+            'students': [s.pk for s in students[:5]] + [{'student': students[5].pk, 'hostel': cheap.pk}, unverified.pk],
+            'max_rent': '4000',
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['allocated']), 6)
+        reasons = {u['student']: u['reason'] for u in response.data['unallocated']}
+        self.assertEqual(reasons, {unverified.pk: 'not_verified'})
+
+        beds = StudentProfile.objects.filter(current_bed__isnull=False).values_list('current_bed', flat=True)
+        self.assertEqual(len(set(beds)), 6)
+        self.assertEqual(Bed.objects.filter(is_occupied=True).count(), 6)
+        self.hostel.refresh_from_db()
+        cheap.refresh_from_db()
+        self.assertEqual(self.hostel.occupied_beds + cheap.occupied_beds, 6)
+        self.assertEqual(Room.objects.filter(is_available=False).count(), 2)
+
+    def test_reports_students_without_a_bed(self):
+        students = make_students(5)
+        result = allocate_beds(normalize_requests({'students': [s.pk for s in students]}))
+        self.assertEqual(len(result['allocated']), 4)
+        self.assertEqual(result['unallocated'], [{'student': students[4].pk, 'reason': 'no_bed'}])
+
+    def test_students_cannot_allocate(self):
+        self.client.force_authenticate(User.objects.create_user(username='someone'))
+        response = self.client.post('/api/activity/profiles/allocate/', {'students': [1]}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class ConcurrentAllocationTests(TransactionTestCase):
+    """Parallel batches competing for the same beds must never double-book."""
+
+    def test_parallel_batches_do_not_double_book(self):
+        make_rooms(rooms=25, capacity=2)
+        students = make_students(200)
+        batches = [students[i::8] for i in range(8)]
+        errors = []
+
+        def run(batch):
+            try:
+                allocate_beds(normalize_requests({'students': [s.pk for s in batch]}))
+            except Exception as e:  # pragma: no cover - surfaced below
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=run, args=(batch,)) for batch in batches]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(errors, [])
+        beds = list(StudentProfile.objects.filter(current_bed__isnull=False).values_list('current_bed', flat=True))
+        self.assertEqual(len(beds), 50)
+        self.assertEqual(len(set(beds)), 50)
+        self.assertEqual(Bed.objects.filter(is_occupied=True).count(), 50)
+        self.assertEqual(Hostel.objects.get().occupied_beds, 50)
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        profile = make_students(1)[0]
+        Rent.objects.bulk_create(
+            Rent(student=profile, amount=Decimal('4000'), month=date(2020 + i // 12, i % 12 + 1, 1), due_date=date(2020, 1, 10))
+            for i in range(25)
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='manager', role='manager'))
+
+    def test_unpaginated_by_default(self):
+        response = self.client.get('/api/activity/rents/')
+        self.assertEqual(len(response.data), 25)
+
+    def test_cursor_pages_cover_every_row_once(self):
+        url, seen, pages = '/api/activity/rents/?page_size=10', [], 0
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [r['id'] for r in response.data['results']]
+            url, pages = response.data['next'], pages + 1
+        self.assertEqual(pages, 3)
+        self.assertEqual(seen, sorted(Rent.objects.values_list('id', flat=True), reverse=True))
+
+
+class GenerateRentTests(TestCase):
+    def setUp(self):
+        make_rooms(rooms=3, capacity=2)
+        self.students = make_students(5)
+        allocate_beds(normalize_requests({'students': [s.pk for s in self.students]}))
+        make_students(2, prefix='unallocated')
+
+    def run_command(self, *args):
+        from io import StringIO
+        from django.core.management import call_command
+        out = StringIO()
+        call_command('generate_rent', *args, stdout=out)
+        return out.getvalue()
+
+    def test_backfill_is_idempotent(self):
+        out = self.run_command('--from', '2026-01', '--to', '2026-03', '--dry-run')
+        self.assertIn('Would generate 5 rent records for January 2026', out)
+        self.assertEqual(Rent.objects.count(), 0)
+
+        self.run_command('--from', '2026-01', '--to', '2026-03', '--chunk-size', '2')
+        self.assertEqual(Rent.objects.count(), 15)
+        rent = Rent.objects.get(student=self.students[0], month=date(2026, 2, 1))
+        self.assertEqual((rent.amount, rent.due_date), (Decimal('4000'), date(2026, 2, 10)))
+
+        out = self.run_command('--month', '2026-02')
+        self.assertIn('Generated 0 rent records for February 2026', out)
+        self.assertEqual(Rent.objects.count(), 15)
+
+    def test_rows_inserted_by_a_concurrent_run_are_not_counted(self):
+        from unittest import mock
+        from .billing import generate_rents
+
+        month = date(2026, 4, 1)
+        bulk_create = Rent.objects.bulk_create
+
+        def race(rents, **kwargs):
+            # Another run commits the first student's rent between our read and insert
+            Rent.objects.create(student=self.students[0], amount=Decimal('4000'), month=month, due_date=month)
+            return bulk_create(rents, **kwargs)
+
+        with mock.patch.object(Rent.objects, 'bulk_create', side_effect=race):
+            created = generate_rents([month])
+        self.assertEqual(created, {month: 4})
+        self.assertEqual(Rent.objects.filter(month=month).count(), 5)
+
+
+class LateFeeTests(TestCase):
+    def setUp(self):
+        profile = make_students(1)[0]
+        self.rents = Rent.objects.bulk_create([
+            Rent(student=profile, amount=Decimal('4000'), month=date(2026, m, 1), due_date=date(2026, m, 10))
+            for m in range(1, 5)
+        ])
+        Rent.objects.filter(month=date(2026, 1, 1)).update(status='paid')
+
+    def fees(self):
+        return list(Rent.objects.order_by('month').values_list('late_fee', flat=True))
+
+    def test_tiered_policy_is_idempotent(self):
+        from .billing import apply_late_fees, get_late_fee_policy
+
+        policy = get_late_fee_policy(mode='tiered', cap=None, tiers=[
+            {'min_days': 1, 'fee': 100}, {'min_days': 30, 'fee': 300},
+        ])
+        # Feb rent 41 days late, Mar 13 days, Apr not yet due
+        as_of = date(2026, 3, 23)
+        with self.assertNumQueries(2):  # grouped counts, then one UPDATE
+            counts = apply_late_fees(as_of, policy)
+        self.assertEqual(counts, {'30+ days': 1, '1+ days': 1})
+        self.assertEqual(self.fees(), [0, 300, 100, 0])
+        self.assertEqual(apply_late_fees(as_of, policy), {})
+
+    def test_per_day_with_cap_and_chunks(self):
+        from .billing import apply_late_fees, get_late_fee_policy
+
+        policy = get_late_fee_policy(mode='per_day', per_day=10, cap=250)
+        self.assertEqual(apply_late_fees(date(2026, 3, 15), policy, dry_run=True), {'capped': 1, 'per_day': 1})
+        self.assertEqual(self.fees(), [0, 0, 0, 0])
+        apply_late_fees(date(2026, 3, 15), policy, chunk_size=1)
+        self.assertEqual(self.fees(), [0, 250, 50, 0])
+
+    def test_dashboard_is_invalidated_after_the_fees_are_written(self):
+        from django.core.cache import cache
+        from .billing import apply_late_fees, get_late_fee_policy
+        from .dashboard import _cache_key
+
+        cache.set(_cache_key(), 'stale')
+        with self.captureOnCommitCallbacks() as callbacks:
+            apply_late_fees(date(2026, 3, 15), get_late_fee_policy(mode='flat', amount=200))
+            self.assertEqual(cache.get(_cache_key()), 'stale')
+        for callback in callbacks:
+            callback()
+        self.assertIsNone(cache.get(_cache_key()))
+
+
+class DashboardTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        cache.clear()
+        make_rooms(rooms=2, capacity=2)
+        students = make_students(3)
+        allocate_beds(normalize_requests({'students': [s.pk for s in students]}))
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='manager', role='manager'))
+
+    def test_dashboard_aggregates_and_caches(self):
+        from django.utils import timezone
+        from .models import Complaint, Payment
+
+        student = StudentProfile.objects.first()
+        rent = Rent.objects.create(student=student, amount=Decimal('4000'), month=timezone.localdate().replace(day=1),
+                                   due_date=timezone.localdate(), status='paid')
+        Payment.objects.create(rent=rent, transaction_id='pay_1', amount=Decimal('4000'), status='captured')
+        Complaint.objects.create(student=student, title='Fan', description='Broken')
+
+        with self.assertNumQueries(9):
+            response = self.client.get('/api/activity/dashboard/')
+        data = response.data
+        self.assertEqual(data['active_students'], 3)
+        self.assertEqual(data['beds'], {'total': 4, 'occupied': 3, 'free': 1})
+        self.assertEqual(data['occupancy_rate'], 75.0)
+        self.assertEqual(data['monthly_revenue'], Decimal('4000'))
+        self.assertEqual(data['open_issues'], 1)
+        self.assertEqual(len(data['recent_activity']), 2)
+
+        with self.assertNumQueries(0):
+            self.client.get('/api/activity/dashboard/')
+        Complaint.objects.create(student=student, title='Tap', description='Leaking')
+        self.assertEqual(self.client.get('/api/activity/dashboard/').data['open_issues'], 2)
+
+
+class InvoiceTests(TestCase):
+    def setUp(self):
+        import tempfile
+        from django.test import override_settings
+
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        settings_override = override_settings(INVOICE_CACHE_DIR=self.tmp.name, INVOICE_WORKERS=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+        make_rooms(rooms=2, capacity=2)
+        self.students = make_students(3)
+        allocate_beds(normalize_requests({'students': [s.pk for s in self.students]}))
+        self.rents = Rent.objects.bulk_create(
+            Rent(student=s, amount=Decimal('4000'), month=date(2026, 3, 1), due_date=date(2026, 3, 10))
+            for s in self.students
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='manager', role='manager'))
+
+    def cached_files(self):
+        from pathlib import Path
+        return sorted(p.name for p in Path(self.tmp.name).glob('*.pdf'))
+
+    def test_invoice_is_cached_until_content_changes(self):
+        url = f'/api/activity/generate-invoice/{self.rents[0].pk}/'
+        first = self.client.get(url)
+        self.assertEqual(first['Content-Type'], 'application/pdf')
+        self.assertEqual(len(self.cached_files()), 1)
+        self.assertEqual(self.client.get(url).content, first.content)
+
+        Rent.objects.filter(pk=self.rents[0].pk).update(late_fee=Decimal('200'))
+        self.assertNotEqual(self.client.get(url).content, first.content)
+        self.assertEqual(len(self.cached_files()), 1)
+
+    def test_invoice_run_streams_zip(self):
+        import zipfile
+        from io import BytesIO
+
+        response = self.client.get('/api/activity/invoice-run/', {'month': '2026-03'})
+        self.assertEqual(response.status_code, 200)
+        archive = zipfile.ZipFile(BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 3)
+        self.assertTrue(archive.read(archive.namelist()[0]).startswith(b'%PDF'))
+        self.assertEqual(len(self.cached_files()), 3)
+
+    def test_invoice_run_renders_while_streaming(self):
+        response = self.client.get('/api/activity/invoice-run/', {'month': '2026-03'})
+        self.assertEqual(self.cached_files(), [])  # nothing is rendered before the first chunk
+        first = next(iter(response.streaming_content))
+        self.assertIn(f'invoice_{self.rents[0].pk}_2026_03.pdf'.encode(), first)
+        response.close()  # an aborted download stops the pool without waiting for it
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        make_rooms(rooms=2, capacity=2)
+        self.students = make_students(3)
+        allocate_beds(normalize_requests({'students': [s.pk for s in self.students]}))
+        for month in (1, 2):
+            Rent.objects.bulk_create(
+                Rent(student=s, amount=Decimal('4000'), month=date(2026, month, 1), due_date=date(2026, month, 10),
+                     status='paid' if i == 0 else 'unpaid')
+                for i, s in enumerate(self.students)
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='manager', role='manager'))
+
+    def read_csv(self, response):
+        import csv
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        return list(csv.DictReader(lines))
+
+    def test_rent_csv_streams_with_filters(self):
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/activity/exports/rents.csv', {'from': '2026-02', 'status': 'unpaid'})
+            rows = self.read_csv(response)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['current_hostel'], 'Hostel Alpha')
+        self.assertEqual(rows[0]['month'], '2026-02-01')
+
+    def test_collections_are_aggregated(self):
+        rows = self.read_csv(self.client.get('/api/activity/exports/collections.csv'))
+        self.assertEqual([(r['month'], r['rents'], r['paid'], Decimal(r['collected'])) for r in rows],
+                         [('2026-01-01', '3', '1', Decimal('4000')), ('2026-02-01', '3', '1', Decimal('4000'))])
+
+    @skipUnless(find_spec('openpyxl'), 'openpyxl is not installed')
+    def test_xlsx_export(self):
+        from io import BytesIO
+        from openpyxl import load_workbook
+
+        response = self.client.get('/api/activity/exports/payments.xlsx')
+        self.assertEqual(response.status_code, 200)
+        sheet = load_workbook(BytesIO(b''.join(response.streaming_content))).active
+        self.assertEqual(sheet.cell(1, 2).value, 'transaction_id')
+
+    @skipUnless(find_spec('openpyxl'), 'openpyxl is not installed')
+    def test_xlsx_is_built_lazily_in_local_time_and_cleaned_up(self):
+        import os
+        import tempfile
+        from datetime import datetime, timezone as dt_timezone
+        from io import BytesIO
+        from unittest import mock
+        from django.test import override_settings
+        from openpyxl import load_workbook
+        from .exports import iter_xlsx
+
+        read = []
+
+        def rows():
+            read.append(True)
+            yield 1, datetime(2026, 3, 1, 20, 0, tzinfo=dt_timezone.utc)
+
+        with tempfile.TemporaryDirectory() as spool, mock.patch.object(tempfile, 'tempdir', spool):
+            chunks = iter_xlsx(['id', 'paid_at'], rows())
+            self.assertEqual((read, os.listdir(spool)), ([], []))
+            with override_settings(TIME_ZONE='Asia/Kolkata'):
+                sheet = load_workbook(BytesIO(b''.join(chunks))).active
+            self.assertEqual(sheet.cell(2, 2).value, datetime(2026, 3, 2, 1, 30))
+
+            aborted = iter_xlsx(['id'], iter([(1,), (2,)]))
+            next(aborted)
+            aborted.close()
+            self.assertEqual(os.listdir(spool), [])
+
+    def test_unknown_export(self):
+        self.assertEqual(self.client.get('/api/activity/exports/leaves.csv').status_code, 400)
+
+
+class PaymentTests(TestCase):
+    def setUp(self):
+        from django.core.cache import cache
+        from django.test import override_settings
+        from .payments import reset_gateway
+
+        cache.clear()
+        settings_override = override_settings(PAYMENT_GATEWAY='activity.payments.FakeGateway', PAYMENT_GATEWAY_OPTIONS={})
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_gateway()
+        self.addCleanup(reset_gateway)
+
+        self.profile = make_students(1)[0]
+        self.rent = Rent.objects.create(student=self.profile, amount=Decimal('4000'), month=date(2026, 3, 1),
+                                        due_date=date(2026, 3, 10), late_fee=Decimal('200'))
+        self.client = APIClient()
+        self.client.force_authenticate(self.profile.user)
+
+    def test_order_is_reused_and_verification_is_idempotent(self):
+        from .models import Payment
+        from .payments import get_gateway
+
+        url = f'/api/activity/rents/{self.rent.pk}'
+        order = self.client.post(f'{url}/create-payment/').data
+        self.assertEqual(order['amount'], 420000)
+        self.assertEqual(self.client.post(f'{url}/create-payment/').data['id'], order['id'])
+
+        payload = {'razorpay_order_id': order['id'], 'razorpay_payment_id': 'pay_123',
+                   'razorpay_signature': get_gateway().sign(order['id'], 'pay_123')}
+        first = self.client.post(f'{url}/verify-payment/', payload)
+        self.assertEqual(first.data, {'status': 'payment verification successful'})
+        again = self.client.post(f'{url}/verify-payment/', payload)
+        self.assertEqual(again.status_code, 200)
+        self.assertEqual(again.data, {'status': 'payment already verified'})
+
+        payment = Payment.objects.get()
+        self.assertEqual((payment.order_id, payment.amount), (order['id'], Decimal('4200')))
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.status, 'paid')
+
+    def test_bad_signature_is_rejected(self):
+        with self.assertLogs('activity.views', 'WARNING') as logs:
+            response = self.client.post(f'/api/activity/rents/{self.rent.pk}/verify-payment/', {
+                'razorpay_order_id': 'order_x', 'razorpay_payment_id': 'pay_x', 'razorpay_signature': 'nope'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(logs.records[0].rent_id, self.rent.pk)
+        self.rent.refresh_from_db()
+        self.assertEqual(self.rent.status, 'unpaid')
+
+
+class ReconciliationTests(TestCase):
+    def setUp(self):
+        from django.test import override_settings
+        from .payments import reset_gateway
+
+        settings_override = override_settings(PAYMENT_GATEWAY='activity.payments.FakeGateway',
+                                              PAYMENT_GATEWAY_OPTIONS={}, RAZORPAY_WEBHOOK_SECRET='whsec')
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        reset_gateway()
+        self.addCleanup(reset_gateway)
+
+        students = make_students(2)
+        self.rents = [
+            Rent.objects.create(student=s, amount=Decimal('4000'), month=date(2026, 3, 1), due_date=date(2026, 3, 10))
+            for s in students
+        ]
+        self.client = APIClient()
+
+    def deliver(self, event_id, payment_id, rent, amount=400000, event='payment.captured'):
+        import json
+        from .payments import get_gateway
+
+        body = json.dumps({'event': event, 'payload': {'payment': {'entity': {
+            'id': payment_id, 'order_id': f'order_{rent.pk}', 'amount': amount, 'method': 'upi',
+            'notes': {'rent_id': str(rent.pk)},
+        }}}})
+        return self.client.generic('POST', '/api/activity/payments/webhook/', body, content_type='application/json',
+                                   HTTP_X_RAZORPAY_SIGNATURE=get_gateway()._hmac('whsec', body),
+                                   HTTP_X_RAZORPAY_EVENT_ID=event_id)
+
+    def test_webhook_inbox_and_batch_apply(self):
+        from .models import Payment, PaymentEvent
+        from .reconciliation import process_events
+
+        self.assertEqual(self.deliver('evt_1', 'pay_1', self.rents[0]).status_code, 200)
+        self.deliver('evt_1', 'pay_1', self.rents[0])  # redelivery
+        self.deliver('evt_2', 'pay_2', self.rents[1], amount=100)
+        self.deliver('evt_3', 'pay_1', self.rents[0], event='order.paid')
+        self.assertEqual(PaymentEvent.objects.count(), 3)
+        self.assertEqual(Payment.objects.count(), 0)
+
+        stats, recorded = process_events(batch_size=2)
+        self.assertEqual(stats, {'recorded': 1, 'amount_mismatch': 1, 'already_recorded': 1})
+        self.assertEqual(Payment.objects.get().transaction_id, 'pay_1')
+        self.assertEqual(Rent.objects.get(pk=self.rents[0].pk).status, 'paid')
+        self.assertEqual(Rent.objects.get(pk=self.rents[1].pk).status, 'unpaid')
+        self.assertEqual(PaymentEvent.objects.get(event_id='evt_2').status, 'failed')
+
+    def test_second_capture_for_a_paid_rent_fails(self):
+        from .models import Notification, Payment, PaymentEvent
+        from .reconciliation import process_events
+
+        self.deliver('evt_1', 'pay_1', self.rents[0])
+        self.deliver('evt_2', 'pay_2', self.rents[0])
+        stats, recorded = process_events()
+        self.assertEqual(stats, {'recorded': 1, 'duplicate_rent': 1})
+        self.assertEqual([p.transaction_id for p in recorded], ['pay_1'])
+        self.assertEqual(Payment.objects.filter(rent=self.rents[0]).count(), 1)
+        self.assertEqual(PaymentEvent.objects.get(event_id='evt_2').status, 'failed')
+        self.assertEqual(Notification.objects.filter(user=self.rents[0].student.user).count(), 1)
+
+    def test_bad_signature(self):
+        response = self.client.post('/api/activity/payments/webhook/', {'event': 'payment.captured'}, format='json',
+                                    HTTP_X_RAZORPAY_SIGNATURE='bad')
+        self.assertEqual(response.status_code, 400)
+
+    def test_settlement_import(self):
+        from .models import Payment
+        from .reconciliation import import_settlements
+
+        Payment.objects.create(rent=self.rents[0], transaction_id='pay_1', amount=Decimal('4000'), status='captured')
+        Payment.objects.create(rent=self.rents[1], transaction_id='pay_2', amount=Decimal('4000'), status='captured')
+        report = import_settlements(
+            b"payment_id,amount,settlement_id,settled_at\n"
+            b"pay_1,4000.00,setl_1,2026-03-12T10:00:00\npay_2,3900,setl_1,\npay_9,100,setl_1,\n"
+        )
+        self.assertEqual((report['rows'], report['matched'], report['missing']), (3, 1, ['pay_9']))
+        self.assertEqual(report['mismatched'][0]['transaction_id'], 'pay_2')
+        self.assertEqual(Payment.objects.get(transaction_id='pay_1').settlement_id, 'setl_1')
+
+
+class NotificationTests(TestCase):
+    def setUp(self):
+        from django.test import override_settings
+
+        settings_override = override_settings(EMAIL_BACKEND='django.core.mail.backends.locmem.EmailBackend',
+                                              NOTIFICATION_MAX_ATTEMPTS=2)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.hostel = make_rooms(rooms=2)
+        self.profiles = make_students(3)
+        User.objects.filter(pk__in=[p.user_id for p in self.profiles[:2]]).update(email='s@example.com')
+
+    def test_verify_queues_instead_of_sending(self):
+        from django.core import mail
+        from .models import Notification
+        from .notifications import deliver_pending
+
+        manager = User.objects.create(username='warden', role='manager')
+        client = APIClient()
+        client.force_authenticate(manager)
+        client.post(f'/api/activity/profiles/{self.profiles[0].pk}/verify/')
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(Notification.objects.get().status, 'pending')
+
+        self.assertEqual(deliver_pending(), {'sent': 1, 'retry': 0, 'dead': 0})
+        self.assertEqual(mail.outbox[0].subject, 'Account Verified')
+        self.assertEqual(Notification.objects.get().status, 'sent')
+
+    def test_broadcast_and_batched_delivery(self):
+        from django.core import mail
+        from .models import Notification
+        from .notifications import deliver_pending
+
+        manager = User.objects.create(username='warden', role='manager')
+        client = APIClient()
+        client.force_authenticate(manager)
+        response = client.post('/api/activity/notifications/broadcast/', {'subject': 'Water', 'message': 'Off at 9'})
+        self.assertEqual((response.status_code, response.data), (202, {'queued': 3}))
+
+        Bed.objects.filter(identifier='A').update(is_occupied=True)
+        StudentProfile.objects.filter(pk=self.profiles[0].pk).update(current_bed=Bed.objects.first())
+        response = client.post('/api/activity/notifications/broadcast/',
+                               {'hostel': self.hostel.pk, 'subject': 'Fire drill', 'message': 'Today'})
+        self.assertEqual(response.data, {'queued': 1})
+
+        # Per batch: claim (savepoint, select joined to user, lease update,
+        # release) and one bulk update; plus the final empty claim
+        with self.assertNumQueries(13):
+            stats = deliver_pending(batch_size=2)
+        self.assertEqual(stats, {'sent': 3, 'retry': 0, 'dead': 1})
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertEqual(Notification.objects.filter(status='dead').count(), 1)
+
+    def test_failed_sends_back_off_then_dead_letter(self):
+        from unittest import mock
+        from django.utils import timezone
+        from .models import Notification
+        from .notifications import deliver_pending, send_notification
+
+        notification = send_notification(self.profiles[0].user, 'Hello', 'World')
+        with mock.patch('django.core.mail.EmailMessage.send', side_effect=OSError('smtp down')):
+            self.assertEqual(deliver_pending(), {'sent': 0, 'retry': 1, 'dead': 0})
+            notification.refresh_from_db()
+            self.assertEqual((notification.status, notification.attempts), ('pending', 1))
+            self.assertGreater(notification.next_attempt_at, timezone.now())
+            self.assertEqual(deliver_pending(), {'sent': 0, 'retry': 0, 'dead': 0})
+
+            Notification.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_pending(), {'sent': 0, 'retry': 0, 'dead': 1})
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.last_error), ('dead', 'smtp down'))
+
+    def test_unreachable_mail_server_counts_as_an_attempt(self):
+        from unittest import mock
+        from django.utils import timezone
+        from .models import Notification
+        from .notifications import deliver_pending, send_notification
+
+        notification = send_notification(self.profiles[0].user, 'Hello', 'World')
+        with mock.patch('django.core.mail.backends.locmem.EmailBackend.open', side_effect=OSError('connection refused')):
+            self.assertEqual(deliver_pending(), {'sent': 0, 'retry': 1, 'dead': 0})
+            notification.refresh_from_db()
+            self.assertEqual((notification.status, notification.attempts), ('pending', 1))
+            self.assertGreater(notification.next_attempt_at, timezone.now())
+
+            Notification.objects.update(next_attempt_at=timezone.now())
+            self.assertEqual(deliver_pending(), {'sent': 0, 'retry': 0, 'dead': 1})
+        notification.refresh_from_db()
+        self.assertEqual((notification.status, notification.attempts, notification.last_error),
+                         ('dead', 2, 'connection refused'))
+
+    def test_non_manager_cannot_broadcast(self):
+        client = APIClient()
+        client.force_authenticate(self.profiles[0].user)
+        response = client.post('/api/activity/notifications/broadcast/', {'subject': 'x', 'message': 'y'})
+        self.assertEqual(response.status_code, 403)
+
+
+class SparseFieldsetTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create(username='warden', role='manager')
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def add_students(self, count, offset):
+        from .models import Document, Payment
+
+        make_rooms(hostel_name=f'Hostel {offset}', rooms=count, capacity=1)
+        beds = list(Bed.objects.filter(room__floor__hostel__name=f'Hostel {offset}'))
+        profiles = make_students(count, prefix=f's{offset}_')
+        for profile, bed in zip(profiles, beds):
+            profile.current_bed = bed
+            profile.save()
+            Document.objects.create(student=profile, doc_type='aadhar', file='documents/a.pdf')
+            for month in (1, 2):
+                rent = Rent.objects.create(student=profile, amount=Decimal('4000'), month=date(2026, month, 1),
+                                           due_date=date(2026, month, 10))
+                Payment.objects.create(rent=rent, transaction_id=f'pay_{profile.pk}_{month}', amount=rent.amount)
+
+    def count_queries(self, url):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(ctx), response.data
+
+    def test_query_count_is_constant(self):
+        sparse = '/api/activity/profiles/?fields=id,is_verified,current_bed,user,current_bed_details&expand=user,current_bed_details'
+        self.add_students(2, 1)
+        small = [self.count_queries(url)[0] for url in ('/api/activity/profiles/', sparse)]
+        self.add_students(8, 2)
+        large = [self.count_queries(url)[0] for url in ('/api/activity/profiles/', sparse)]
+        self.assertEqual(small, large)
+        # Profiles joined to user and the bed chain, then documents, rents, payments
+        self.assertEqual(large, [4, 1])
+
+    def test_shape(self):
+        self.add_students(1, 1)
+        _, data = self.count_queries('/api/activity/profiles/?fields=id,user.username,rents&expand=rents')
+        self.assertEqual(set(data[0]), {'id', 'user', 'rents'})
+        self.assertIsInstance(data[0]['user'], int)
+        self.assertNotIn('payments', data[0]['rents'][0])
+
+        _, data = self.count_queries('/api/activity/profiles/?fields=user.username,rents.month&expand=user,rents.payments')
+        self.assertEqual(data[0]['user'], {'username': 's1_0'})
+        self.assertEqual(set(data[0]['rents'][0]), {'month'})
+
+        _, data = self.count_queries('/api/activity/profiles/')
+        self.assertEqual(len(data[0]['rents'][0]['payments']), 1)
+        self.assertEqual(data[0]['current_bed_details']['hostel_name'], 'Hostel 1')
+
+    def test_unknown_fields_are_rejected(self):
+        self.assertEqual(self.client.get('/api/activity/profiles/?fields=nope').status_code, 400)
+        self.assertEqual(self.client.get('/api/activity/profiles/?expand=is_verified').status_code, 400)
+
+
+class ComplaintAssignmentTests(TestCase):
+    def setUp(self):
+        from .models import StaffWorkload
+
+        self.hostel = make_rooms(rooms=2, capacity=1)
+        self.beds = list(Bed.objects.order_by('pk'))
+        self.students = make_students(2)
+        for profile, bed in zip(self.students, self.beds):
+            profile.current_bed = bed
+            profile.save()
+        self.staff = [User.objects.create(username=f'fixer{i}', role='staff') for i in range(3)]
+        self.workloads = {w.staff_id: w for w in StaffWorkload.objects.all()}
+
+    def file(self, student, title='Leak'):
+        client = APIClient()
+        client.force_authenticate(student.user)
+        response = client.post('/api/activity/complaints/', {'title': title, 'description': 'Help'})
+        self.assertEqual(response.status_code, 201)
+        return response.data['id']
+
+    def open_counts(self):
+        from .models import StaffWorkload
+        return dict(StaffWorkload.objects.values_list('staff__username', 'open_complaints'))
+
+    def test_new_complaints_spread_by_workload(self):
+        from .models import Complaint
+
+        for i in range(6):
+            self.file(self.students[i % 2])
+        self.assertEqual(self.open_counts(), {'fixer0': 2, 'fixer1': 2, 'fixer2': 2})
+
+        client = APIClient()
+        client.force_authenticate(self.staff[0])
+        queue = client.get('/api/activity/complaints/').data
+        self.assertEqual(len(queue), 2)
+
+        # With nobody eligible the complaint stays unassigned but visible to every staff member
+        from .models import StaffWorkload
+        StaffWorkload.objects.update(accepts_assignments=False)
+        orphan = self.file(self.students[0])
+        self.assertIsNone(Complaint.objects.get(pk=orphan).assigned_to_id)
+        self.assertIn(orphan, [c['id'] for c in client.get('/api/activity/complaints/').data])
+        StaffWorkload.objects.update(accepts_assignments=True)
+        Complaint.objects.filter(pk=orphan).delete()
+
+        complaint = Complaint.objects.filter(assigned_to=self.staff[0]).first()
+        complaint.status = 'resolved'
+        complaint.save()
+        complaint.delete()
+        Complaint.objects.filter(assigned_to=self.staff[1]).first().delete()
+        self.assertEqual(self.open_counts(), {'fixer0': 1, 'fixer1': 1, 'fixer2': 2})
+
+    def test_scope_prefers_matching_floor_staff(self):
+        from .models import Complaint, StaffWorkload
+
+        floor = self.beds[0].room.floor
+        StaffWorkload.objects.filter(staff=self.staff[2]).update(floor=floor)
+        other = make_rooms(hostel_name='Hostel Beta', rooms=1, capacity=1)
+        StaffWorkload.objects.filter(staff=self.staff[1]).update(hostel=other)
+        for _ in range(3):
+            self.file(self.students[0])
+        self.assertEqual(set(Complaint.objects.values_list('assigned_to__username', flat=True)), {'fixer2'})
+
+        # A former staff member keeps the row but gets no new work
+        self.staff[2].role = 'manager'
+        self.staff[2].save()
+        self.file(self.students[0])
+        self.assertEqual(Complaint.objects.filter(assigned_to=self.staff[2]).count(), 3)
+
+    def test_rebalance_assigns_backlog_and_moves_pending_work(self):
+        from .assignment import rebalance
+        from .models import Complaint, StaffWorkload
+
+        with self.settings(COMPLAINT_AUTO_ASSIGN=False):
+            self.file(self.students[0], title='Backlog')
+        for title in ('Fan', 'Door', 'Bulb', 'Lock'):
+            Complaint.objects.create(student=self.students[1], title=title, description='x', assigned_to=self.staff[0])
+        Complaint.objects.create(student=self.students[1], title='Tap', description='x', assigned_to=self.staff[0],
+                                 status='in_progress')
+        StaffWorkload.objects.filter(staff=self.staff[2]).update(accepts_assignments=False)
+        self.assertEqual(self.open_counts(), {'fixer0': 5, 'fixer1': 0, 'fixer2': 0})
+
+        # 8 for the rebalance itself, 5 to refresh the moved complaints' search documents
+        with self.assertNumQueries(13):
+            stats = rebalance()
+        self.assertEqual(stats, {'assigned': 1, 'moved': 2, 'unassignable': 0})
+        self.assertEqual(self.open_counts(), {'fixer0': 3, 'fixer1': 3, 'fixer2': 0})
+        self.assertEqual(Complaint.objects.get(title='Tap').assigned_to, self.staff[0])
+        self.assertEqual(set(Complaint.objects.filter(assigned_to=self.staff[1]).values_list('title', flat=True)),
+                         {'Backlog', 'Lock', 'Bulb'})
+
+        StaffWorkload.objects.update(open_complaints=99)
+        from .assignment import rebuild_workloads
+        rebuild_workloads()
+        self.assertEqual(self.open_counts(), {'fixer0': 3, 'fixer1': 3, 'fixer2': 0})
+
+
+class ImagePipelineTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media, IMAGE_PROCESSING_ASYNC=False)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.profile = make_students(1)[0]
+        self.client = APIClient()
+        self.client.force_authenticate(self.profile.user)
+
+    def upload(self, size=(3000, 2000)):
+        import io
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'
+        exif[0x0112] = 6  # rotated 90 degrees
+        buffer = io.BytesIO()
+        Image.new('RGB', size, 'red').save(buffer, 'JPEG', exif=exif, quality=95)
+        return SimpleUploadedFile('photo.jpg', buffer.getvalue(), content_type='image/jpeg')
+
+    def test_upload_is_stripped_resized_and_gets_variants(self):
+        from PIL import Image
+        from django.core.files.storage import default_storage
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(f'/api/activity/profiles/{self.profile.pk}/', {'photo': self.upload()},
+                                         format='multipart')
+        self.assertEqual(response.status_code, 200)
+
+        self.profile.refresh_from_db()
+        variants = self.profile.photo_variants
+        self.assertEqual(variants['source'], self.profile.photo.name)
+        with default_storage.open(self.profile.photo.name) as f:
+            original = Image.open(f)
+            self.assertEqual(original.size, (1365, 2048))  # EXIF rotation applied, long side capped
+            self.assertEqual(len(original.getexif()), 0)
+        with default_storage.open(variants['thumb']) as f:
+            thumb = Image.open(f)
+            self.assertEqual((thumb.format, thumb.size), ('WEBP', (107, 160)))
+
+        data = self.client.get(f'/api/activity/profiles/{self.profile.pk}/').data
+        self.assertTrue(data['photo_variants']['medium'].endswith('_medium.webp'))
+        self.assertEqual(set(data['photo_variants']), {'thumb', 'medium'})
+
+    def test_formats_that_are_not_reencoded_are_rejected(self):
+        import io
+        from PIL import Image
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        buffer = io.BytesIO()
+        Image.new('RGB', (40, 40), 'red').save(buffer, 'GIF', comment=b'taken at home')
+        gif = SimpleUploadedFile('photo.gif', buffer.getvalue(), content_type='image/gif')
+        response = self.client.post('/api/activity/complaints/', {'title': 'Fan', 'description': 'Broken', 'image': gif},
+                                    format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('upload a JPEG, PNG or WebP', str(response.data['image']))
+
+        response = self.client.post('/api/activity/complaints/', {'title': 'Fan', 'description': 'Broken',
+                                    'image': self.upload(size=(40, 40))}, format='multipart')
+        self.assertEqual(response.status_code, 201)
+
+    def test_command_processes_backlog_once(self):
+        from io import StringIO
+        from django.core.files.storage import default_storage
+        from django.core.management import call_command
+        from .models import StudentProfile
+
+        name = StudentProfile._meta.get_field('photo').generate_filename(self.profile, 'legacy.jpg')
+        stored = default_storage.save(name, self.upload(size=(400, 300)))
+        StudentProfile.objects.filter(pk=self.profile.pk).update(photo=stored)
+
+        out = StringIO()
+        call_command('process_images', stdout=out)
+        self.assertIn('activity.StudentProfile.photo: 1 processed', out.getvalue())
+        call_command('process_images', stdout=out)
+        self.assertIn('activity.StudentProfile.photo: 0 processed', out.getvalue())
+
+
+class ChunkedUploadTests(TestCase):
+    def setUp(self):
+        import shutil
+        import tempfile
+        from django.test import override_settings
+
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        settings_override = override_settings(MEDIA_ROOT=media, DOCUMENT_UPLOAD_TEMP_DIR=f'{media}/tmp',
+                                              DOCUMENT_UPLOAD_CHUNK_SIZE=1000)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.students = make_students(2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.students[0].user)
+        self.content = bytes(range(256)) * 10  # 2560 bytes
+
+    def put(self, session_id, start, data):
+        return self.client.generic('PUT', f'/api/activity/uploads/{session_id}/', data,
+                                   content_type='application/octet-stream',
+                                   HTTP_CONTENT_RANGE=f'bytes {start}-{start + len(data) - 1}/{len(self.content)}')
+
+    def test_resumable_upload_and_dedup(self):
+        import hashlib
+        from django.core.files.storage import default_storage
+        from .models import Document
+
+        session = self.client.post('/api/activity/uploads/', {'doc_type': 'aadhar', 'filename': 'scan.PDF',
+                                                              'size': len(self.content)}, format='json').data
+        self.assertEqual((session['received'], session['chunk_size']), (0, 1000))
+
+        self.assertEqual(self.put(session['id'], 0, self.content[:1000]).data['received'], 1000)
+        # A retried chunk after a lost response is rejected with the current offset
+        retry = self.put(session['id'], 0, self.content[:1000])
+        self.assertEqual((retry.status_code, retry.data['received']), (409, 1000))
+        self.assertEqual(self.client.get(f"/api/activity/uploads/{session['id']}/").data['received'], 1000)
+        self.assertEqual(self.put(session['id'], 1000, self.content[1000:2000]).status_code, 200)
+        early = self.client.post(f"/api/activity/uploads/{session['id']}/complete/")
+        self.assertEqual(early.status_code, 409)
+        self.put(session['id'], 2000, self.content[2000:])
+
+        done = self.client.post(f"/api/activity/uploads/{session['id']}/complete/")
+        self.assertEqual(done.status_code, 201)
+        digest = hashlib.sha256(self.content).hexdigest()
+        document = Document.objects.get()
+        self.assertEqual((document.sha256, document.file.name), (digest, f'student_documents/sha256/{digest[:2]}/{digest}.pdf'))
+        with default_storage.open(document.file.name) as f:
+            self.assertEqual(f.read(), self.content)
+
+        # Claiming a known hash gets nothing for free: the bytes must still be sent,
+        # and only then is the stored blob shared
+        other = APIClient()
+        other.force_authenticate(self.students[1].user)
+        claimed = other.post('/api/activity/uploads/', {'doc_type': 'college_id', 'filename': 'id.pdf',
+                                                        'size': len(self.content), 'sha256': digest}, format='json').data
+        self.assertEqual((claimed['status'], claimed['received'], claimed['document']), ('open', 0, None))
+        self.assertFalse(Document.objects.filter(student=self.students[1]).exists())
+        for start in range(0, len(self.content), 1000):
+            other.generic('PUT', f"/api/activity/uploads/{claimed['id']}/", self.content[start:start + 1000],
+                          content_type='application/octet-stream', HTTP_UPLOAD_OFFSET=str(start))
+        self.assertEqual(other.post(f"/api/activity/uploads/{claimed['id']}/complete/").data['status'], 'complete')
+        self.assertEqual(Document.objects.filter(file=document.file.name).count(), 2)
+        self.assertEqual(len(default_storage.listdir(f'student_documents/sha256/{digest[:2]}')[1]), 1)
+
+        # Sessions are private to their student
+        self.assertEqual(other.get(f"/api/activity/uploads/{session['id']}/").status_code, 404)
+
+    def test_single_request_upload_is_deduplicated(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+        from .models import Document
+
+        for name in ('a.pdf', 'b.pdf'):
+            response = self.client.post('/api/activity/documents/', {
+                'doc_type': 'aadhar', 'student': self.students[0].pk,
+                'file': SimpleUploadedFile(name, self.content, content_type='application/pdf'),
+            }, format='multipart')
+            self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(set(Document.objects.values_list('file', flat=True))), 1)
+
+    def test_bad_requests(self):
+        start = self.client.post('/api/activity/uploads/', {'doc_type': 'aadhar', 'filename': 'x.pdf', 'size': 10 ** 9},
+                                 format='json')
+        self.assertEqual(start.status_code, 400)
+        session = self.client.post('/api/activity/uploads/', {'doc_type': 'aadhar', 'filename': 'x.pdf', 'size': 5000,
+                                                              'sha256': '0' * 64}, format='json').data
+        self.assertEqual(self.put(session['id'], 0, b'x' * 1001).status_code, 413)
+        self.assertEqual(self.put(session['id'], 0, b'x' * 1000).status_code, 200)
+        # A declared hash that doesn't match the bytes is refused at completion
+        session = self.client.post('/api/activity/uploads/', {'doc_type': 'aadhar', 'filename': 'y.pdf', 'size': 10,
+                                                              'sha256': '0' * 64}, format='json').data
+        self.put(session['id'], 0, b'y' * 10)
+        self.assertEqual(self.client.post(f"/api/activity/uploads/{session['id']}/complete/").status_code, 400)
+        # ...and the session, which could never complete, is gone with its temp file
+        from .models import UploadSession
+        from .uploads import temp_path
+        self.assertFalse(UploadSession.objects.filter(pk=session['id']).exists())
+        self.assertFalse(os.path.exists(temp_path(UploadSession(pk=session['id']))))
+
+    def test_expiry_spares_sessions_resumed_meanwhile(self):
+        from datetime import timedelta
+        from unittest import mock
+        from django.utils import timezone
+        from .models import UploadSession
+        from .uploads import expire_uploads, temp_path
+
+        ids = [self.client.post('/api/activity/uploads/', {'doc_type': 'aadhar', 'filename': f'{n}.pdf',
+                                                           'size': len(self.content)}, format='json').data['id']
+               for n in range(2)]
+        for session_id in ids:
+            self.put(session_id, 0, self.content[:1000])
+        UploadSession.objects.update(updated_at=timezone.now() - timedelta(days=2))
+
+        values_list = type(UploadSession.objects.all()).values_list
+
+        def resume_second(qs, *args, **kwargs):
+            # The second session gets a chunk between the scan and the DELETE
+            rows = values_list(qs, *args, **kwargs)
+            UploadSession.objects.filter(pk=ids[1]).update(updated_at=timezone.now())
+            return rows
+
+        with mock.patch.object(type(UploadSession.objects.all()), 'values_list', resume_second):
+            self.assertEqual(expire_uploads(), 1)
+        self.assertEqual(list(UploadSession.objects.values_list('pk', flat=True)), [ids[1]])
+        self.assertFalse(os.path.exists(temp_path(UploadSession(pk=ids[0]))))
+        self.assertTrue(os.path.exists(temp_path(UploadSession(pk=ids[1]))))
+        self.assertEqual(self.put(ids[1], 1000, self.content[1000:2000]).status_code, 200)
+
+
+class HeadcountTests(TestCase):
+    def setUp(self):
+        from datetime import timedelta
+        from django.utils import timezone
+        from .models import LeaveApplication
+
+        make_rooms(hostel_name='Hostel Alpha', rooms=3, capacity=1)
+        self.beta = make_rooms(hostel_name='Hostel Beta', rooms=1, capacity=1)
+        students = make_students(4)
+        for profile, bed in zip(students, Bed.objects.order_by('pk')):
+            profile.current_bed = bed
+            profile.save()
+        unhoused = make_students(1, prefix='unhoused')[0]
+        self.today = timezone.localdate()
+        self.day = lambda n: self.today + timedelta(days=n)
+
+        def leave(student, start, end, status='approved'):
+            LeaveApplication.objects.create(student=student, start_date=self.day(start), end_date=self.day(end),
+                                            reason='Home', status=status)
+
+        leave(students[0], 1, 3)
+        leave(students[0], 3, 5)   # overlaps the first, counted once
+        leave(students[1], 4, 4)
+        leave(students[2], 2, 9, status='rejected')
+        leave(students[3], 2, 2)   # Hostel Beta
+        leave(unhoused, 1, 9)
+        self.manager = User.objects.create(username='warden', role='manager')
+
+    def test_daily_counts(self):
+        from .headcount import daily_headcount
+
+        with self.assertNumQueries(2):
+            alpha, beta = daily_headcount(self.day(2), self.day(6))
+        self.assertEqual((alpha['name'], alpha['population']), ('Hostel Alpha', 3))
+        self.assertEqual([d['away'] for d in alpha['days']], [1, 1, 2, 1, 0])
+        self.assertEqual([d['present'] for d in alpha['days']], [2, 2, 1, 2, 3])
+        self.assertEqual([d['away'] for d in beta['days']], [1, 0, 0, 0, 0])
+
+    def test_endpoint(self):
+        url = '/api/activity/leaves/headcount/'
+        client = APIClient()
+        client.force_authenticate(self.manager)
+        response = client.get(url, {'from': self.day(1), 'to': self.day(2), 'hostel': self.beta.pk})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([h['name'] for h in response.data['hostels']], ['Hostel Beta'])
+        self.assertEqual(response.data['hostels'][0]['days'][1], {'date': self.day(2), 'present': 0, 'away': 1})
+
+        self.assertEqual(client.get(url, {'from': self.day(5), 'to': self.day(1)}).status_code, 400)
+        self.assertEqual(client.get(url, {'from': self.today, 'to': self.day(400)}).status_code, 400)
+        # Past populations are not stored, so past days are refused
+        self.assertEqual(client.get(url, {'from': self.day(-1), 'to': self.day(1)}).status_code, 400)
+        client.force_authenticate(User.objects.get(username='student0'))
+        self.assertEqual(client.get(url, {'from': self.day(1), 'to': self.day(2)}).status_code, 403)
+
+
+class BulkStatusTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create(username='warden', role='manager')
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+        self.students = make_students(3)
+
+    def make_leaves(self, count):
+        from .models import LeaveApplication
+        return LeaveApplication.objects.bulk_create(
+            LeaveApplication(student=self.students[i % 3], start_date=date(2026, 3, 1), end_date=date(2026, 3, 2),
+                             reason='Home') for i in range(count)
+        )
+
+    def bulk(self, resource, ids, target, **extra):
+        return self.client.post(f'/api/activity/{resource}/bulk-status/', {'ids': ids, 'status': target, **extra},
+                                format='json')
+
+    def test_query_count_is_flat(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from .models import LeaveApplication, Notification
+
+        counts = []
+        # SQLite caps bound parameters at 999, which splits the notification
+        # insert beyond ~120 rows; other backends stay flat to the id limit
+        for size in (1, 100):
+            ids = [leave.pk for leave in self.make_leaves(size)]
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.bulk('leaves', ids, 'approved')
+            self.assertEqual(set(response.data['results'].values()), {'updated'})
+            counts.append(len(ctx))
+        self.assertEqual(counts[0], counts[1])
+        self.assertEqual(LeaveApplication.objects.filter(status='approved').count(), 101)
+        self.assertEqual(Notification.objects.count(), 101)
+        self.assertEqual(Notification.objects.first().message, 'Your leave from 2026-03-01 to 2026-03-02 has been approved.')
+
+    def test_per_id_results_and_scoping(self):
+        from .models import Document
+
+        docs = Document.objects.bulk_create([
+            Document(student=self.students[0], doc_type='aadhar', file='a.pdf'),
+            Document(student=self.students[1], doc_type='college_id', file='b.pdf', status='approved'),
+        ])
+        response = self.bulk('documents', [docs[0].pk, docs[1].pk, 999999], 'approved')
+        self.assertEqual(response.data['results'], {docs[0].pk: 'updated', docs[1].pk: 'unchanged', 999999: 'not_found'})
+
+        self.assertEqual(self.bulk('documents', [docs[0].pk], 'archived').status_code, 400)
+        self.assertEqual(self.bulk('documents', [], 'approved').status_code, 400)
+        student = APIClient()
+        student.force_authenticate(self.students[0].user)
+        response = student.post('/api/activity/documents/bulk-status/', {'ids': [docs[0].pk], 'status': 'rejected'},
+                                format='json')
+        self.assertEqual(response.status_code, 403)
+
+    def test_complaints_keep_workload_counters(self):
+        from .models import Complaint, StaffWorkload
+
+        fixer = User.objects.create(username='fixer', role='staff')
+        complaints = [Complaint.objects.create(student=self.students[0], title=f'C{i}', description='x', assigned_to=fixer)
+                      for i in range(3)]
+        self.assertEqual(StaffWorkload.objects.get(staff=fixer).open_complaints, 3)
+
+        staff = APIClient()
+        staff.force_authenticate(fixer)
+        response = staff.post('/api/activity/complaints/bulk-status/',
+                              {'ids': [c.pk for c in complaints[:2]], 'status': 'resolved', 'remarks': 'Fixed'},
+                              format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(StaffWorkload.objects.get(staff=fixer).open_complaints, 1)
+        self.assertEqual(Complaint.objects.get(pk=complaints[0].pk).remarks, 'Fixed')
+
+        self.bulk('complaints', [complaints[0].pk], 'in_progress')
+        self.assertEqual(StaffWorkload.objects.get(staff=fixer).open_complaints, 2)
+
+
+class EventStreamTests(TestCase):
+    def setUp(self):
+        self.student = make_students(1)[0]
+        self.staff = User.objects.create(username='fixer', role='staff')
+        self.published = []
+
+    def record(self):
+        from unittest import mock
+
+        broker = mock.Mock()
+        broker.publish.side_effect = lambda channel, message: self.published.append((channel, message))
+        return mock.patch('activity.events.get_broker', return_value=broker)
+
+    def test_status_changes_are_pushed_after_commit(self):
+        from .events import user_channel
+        from .models import Complaint, LeaveApplication
+
+        with self.record(), self.captureOnCommitCallbacks(execute=True):
+            complaint = Complaint.objects.create(student=self.student, title='Fan', description='x', assigned_to=self.staff)
+            complaint.remarks = 'Looking into it'
+            complaint.save()
+        self.assertEqual(self.published, [])
+
+        with self.record(), self.captureOnCommitCallbacks(execute=True):
+            complaint.status = 'in_progress'
+            complaint.save()
+        self.assertEqual({channel for channel, _ in self.published},
+                         {user_channel(self.student.user_id), user_channel(self.staff.pk)})
+        self.assertEqual(self.published[0][1], {'type': 'complaint.status', 'id': complaint.pk,
+                                                'status': 'in_progress', 'title': 'Fan'})
+
+        self.published.clear()
+        leave = LeaveApplication.objects.create(student=self.student, start_date=date(2026, 3, 1),
+                                                end_date=date(2026, 3, 2), reason='Home')
+        manager = APIClient()
+        manager.force_authenticate(User.objects.create(username='manager', role='manager'))
+        with self.record(), self.captureOnCommitCallbacks(execute=True):
+            manager.post('/api/activity/leaves/bulk-status/', {'ids': [leave.pk], 'status': 'approved'}, format='json')
+        self.assertEqual(self.published, [(user_channel(self.student.user_id), {
+            'type': 'leave.status', 'id': leave.pk, 'status': 'approved',
+            'start_date': '2026-03-01', 'end_date': '2026-03-02',
+        })])
+
+    def test_wsgi_requests_get_no_stream(self):
+        from rest_framework_simplejwt.tokens import AccessToken
+
+        token = str(AccessToken.for_user(self.student.user))
+        response = self.client.get('/api/activity/events/', {'token': token})
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(response.streaming)
+
+    async def test_stream_delivers_events(self):
+        import asyncio
+        from django.test import AsyncClient
+        from rest_framework_simplejwt.tokens import AccessToken
+        from core.pubsub import get_broker
+        from .events import user_channel
+
+        response = await AsyncClient().get('/api/activity/events/')
+        self.assertEqual(response.status_code, 401)
+
+        token = str(AccessToken.for_user(self.student.user))
+        response = await AsyncClient().get('/api/activity/events/', {'token': token})
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        stream = response.streaming_content
+        self.assertIn(b': connected', await anext(stream))
+
+        get_broker().publish(user_channel(self.student.user_id), {'type': 'rent.status', 'id': 7, 'status': 'paid'})
+        chunk = await asyncio.wait_for(anext(stream), 2)
+        self.assertEqual(chunk, b'event: rent.status\ndata: {"type": "rent.status", "id": 7, "status": "paid"}\n\n')
+        await stream.aclose()
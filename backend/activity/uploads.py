@@ -0,0 +1,218 @@
+import hashlib
+import os
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Document, UploadSession
+
+READ_SIZE = 64 * 1024
+BLOB_DIR = 'student_documents/sha256'
+
+
+class UploadError(Exception):
+    def __init__(self, message, status=400, received=None):
+        super().__init__(message)
+        self.status = status
+        self.received = received
+
+
+def chunk_size():
+    return getattr(settings, 'DOCUMENT_UPLOAD_CHUNK_SIZE', 1024 * 1024)
+
+
+def max_size():
+    return getattr(settings, 'DOCUMENT_UPLOAD_MAX_SIZE', 20 * 1024 * 1024)
+
+
+def temp_path(session):
+    directory = getattr(settings, 'DOCUMENT_UPLOAD_TEMP_DIR', settings.BASE_DIR / 'upload_tmp')
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, f'{session.pk}.part')
+
+
+def blob_name(digest, filename):
+    ext = os.path.splitext(filename)[1].lower()[:10]
+    return f'{BLOB_DIR}/{digest[:2]}/{digest}{ext}'
+
+
+def hash_chunks(chunks):
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def store_blob(digest, filename, content):
+    """Save content under its hash unless an identical blob is already stored. Returns the name."""
+    existing = Document.objects.filter(sha256=digest).values_list('file', flat=True).first()
+    if existing and default_storage.exists(existing):
+        return existing
+    name = blob_name(digest, filename)
+    if default_storage.exists(name):
+        return name
+    return default_storage.save(name, content)
+
+
+def store_upload(uploaded_file):
+    """Single-request upload: hash in chunks, then store deduplicated. Returns (name, digest)."""
+    digest = hash_chunks(uploaded_file.chunks())
+    uploaded_file.seek(0)
+    return store_blob(digest, uploaded_file.name, uploaded_file), digest
+
+
+def start_upload(student, doc_type, filename, size, sha256=None):
+    """
+    Open a session. A declared sha256 is only checked against the bytes at
+    completion: the content is always uploaded, and storage is deduplicated
+    on the hash computed here, never on one the client merely claims.
+    """
+    if doc_type not in dict(Document.DOC_TYPES):
+        raise UploadError('Unknown doc_type')
+    if not filename:
+        raise UploadError('filename is required')
+    try:
+        size = int(size)
+    except (TypeError, ValueError):
+        raise UploadError('size must be the total number of bytes')
+    if size <= 0 or size > max_size():
+        raise UploadError(f'size must be between 1 and {max_size()} bytes')
+    sha256 = (sha256 or '').lower() or None
+    if sha256 and len(sha256) != 64:
+        raise UploadError('sha256 must be a hex digest')
+
+    return UploadSession.objects.create(student=student, doc_type=doc_type, filename=os.path.basename(filename)[:255],
+                                        size=size, sha256=sha256)
+
+
+def _locked(session_id):
+    sessions = UploadSession.objects.all()
+    if connection.features.has_select_for_update:
+        sessions = sessions.select_for_update()
+    return sessions.get(pk=session_id)
+
+
+def append_chunk(session, offset, stream, length):
+    """
+    Append `length` bytes read from `stream` at `offset`. The offset must equal
+    what the server already has, so a client that lost a response asks
+    for the session and resumes from `received`.
+
+    The body is read from the client into a side file with no transaction
+    open; only the offset check, the bump of `received` (a conditional
+    UPDATE) and the local copy into the part file run under the row lock.
+    """
+    if length is None or length <= 0:
+        raise UploadError('Content-Length is required')
+    if length > chunk_size():
+        raise UploadError(f'Chunks may be at most {chunk_size()} bytes', status=413)
+    session = UploadSession.objects.get(pk=session.pk)
+    _check_offset(session, offset, length)
+
+    chunk_path = f'{temp_path(session)}.{uuid.uuid4().hex}'
+    try:
+        written = 0
+        with open(chunk_path, 'wb') as f:
+            while written < length:
+                data = stream.read(min(READ_SIZE, length - written))
+                if not data:
+                    break
+                f.write(data)
+                written += len(data)
+        if written < length:
+            raise UploadError('Connection closed before the chunk was complete', received=session.received)
+
+        with transaction.atomic():
+            claimed = UploadSession.objects.filter(pk=session.pk, status='open', received=offset).update(
+                received=F('received') + written, updated_at=timezone.now())
+            if not claimed:
+                # Another request for this offset won, or the session completed or expired meanwhile
+                current = UploadSession.objects.filter(pk=session.pk).first()
+                if current is None:
+                    raise UploadError('Upload session has expired', status=404)
+                _check_offset(current, offset, length)
+                raise UploadError('Offset does not match the bytes received', status=409, received=current.received)
+            with open(chunk_path, 'rb') as src, open(temp_path(session), 'r+b' if offset else 'wb') as dst:
+                dst.seek(offset)
+                while data := src.read(READ_SIZE):
+                    dst.write(data)
+                dst.truncate()
+    finally:
+        try:
+            os.remove(chunk_path)
+        except FileNotFoundError:
+            pass
+    session.refresh_from_db()
+    return session
+
+
+def _check_offset(session, offset, length):
+    if session.status != 'open':
+        raise UploadError('Upload is already complete', status=409, received=session.received)
+    if offset != session.received:
+        raise UploadError('Offset does not match the bytes received', status=409, received=session.received)
+    if session.received + length > session.size:
+        raise UploadError('Chunk runs past the declared size', received=session.received)
+
+
+def complete_upload(session):
+    """
+    Hash the assembled file, store it deduplicated and create the Document.
+    A file that does not match the declared sha256 can never be completed,
+    so its session and temp file are dropped and the client starts over.
+    """
+    with transaction.atomic():
+        session = _locked(session.pk)
+        if session.status == 'complete':
+            return session
+        if session.received != session.size:
+            raise UploadError('Upload is not finished', status=409, received=session.received)
+        path = temp_path(session)
+        with open(path, 'rb') as f:
+            digest = hash_chunks(iter(lambda: f.read(READ_SIZE), b''))
+        mismatch = session.sha256 and session.sha256 != digest
+        if mismatch:
+            session.delete()
+        else:
+            with open(path, 'rb') as f:
+                name = store_blob(digest, session.filename, File(f, name=session.filename))
+            _finish(session, name, digest)
+    os.remove(path)
+    if mismatch:
+        raise UploadError('Content does not match the declared sha256; start a new upload')
+    return session
+
+
+def _finish(session, name, digest):
+    session.document = Document.objects.create(student=session.student, doc_type=session.doc_type,
+                                               file=name, sha256=digest)
+    session.status, session.received, session.sha256 = 'complete', session.size, digest
+    session.save(update_fields=['document', 'status', 'received', 'sha256', 'updated_at'])
+
+
+def expire_uploads(max_age=timedelta(days=1)):
+    """
+    Drop open sessions idle for longer than max_age, with their temp files.
+    The DELETE re-checks the idle condition, and only files of rows it
+    actually removed are deleted, so a session resumed meanwhile survives
+    intact.
+    """
+    cutoff = timezone.now() - max_age
+    stale = UploadSession.objects.filter(status='open', updated_at__lt=cutoff)
+    pks = set(stale.values_list('pk', flat=True))
+    if not pks:
+        return 0
+    UploadSession.objects.filter(pk__in=pks, status='open', updated_at__lt=cutoff).delete()
+    deleted = pks - set(UploadSession.objects.filter(pk__in=pks).values_list('pk', flat=True))
+    for pk in deleted:
+        try:
+            os.remove(temp_path(UploadSession(pk=pk)))
+        except FileNotFoundError:
+            pass
+    return len(deleted)
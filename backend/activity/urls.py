@@ -1,20 +1,28 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
-    StudentProfileViewSet, DocumentViewSet, RentViewSet, 
+    StudentProfileViewSet, DocumentViewSet, DocumentUploadViewSet, RentViewSet, 
     PaymentViewSet, ComplaintViewSet, LeaveApplicationViewSet,
-    generate_invoice_pdf
+    generate_invoice_pdf, invoice_run, dashboard_stats, export_ledger,
+    payment_webhook, broadcast_notification, event_stream_view
 )
 
 router = DefaultRouter()
 router.register(r'profiles', StudentProfileViewSet)
 router.register(r'documents', DocumentViewSet)
+router.register(r'uploads', DocumentUploadViewSet, basename='upload')
 router.register(r'rents', RentViewSet)
 router.register(r'payments', PaymentViewSet)
 router.register(r'complaints', ComplaintViewSet)
 router.register(r'leaves', LeaveApplicationViewSet)
 
 urlpatterns = [
+    path('payments/webhook/', payment_webhook, name='payment_webhook'),
     path('', include(router.urls)),
     path('generate-invoice/<int:rent_id>/', generate_invoice_pdf, name='generate_invoice_pdf'),
+    path('invoice-run/', invoice_run, name='invoice_run'),
+    path('dashboard/', dashboard_stats, name='dashboard_stats'),
+    path('notifications/broadcast/', broadcast_notification, name='broadcast_notification'),
+    path('events/', event_stream_view, name='event_stream'),
+    path('exports/<str:kind>.<str:ext>', export_ledger, name='export_ledger'),
 ]
@@ -1,47 +1,124 @@
 
+import logging
+
 from rest_framework import viewsets, permissions, status, decorators
 from rest_framework.response import Response
-from .models import StudentProfile, Document, Rent, Payment, Complaint, LeaveApplication
+from .models import StudentProfile, Document, Rent, Payment, Complaint, LeaveApplication, UploadSession
 from .serializers import StudentProfileSerializer, DocumentSerializer, RentSerializer, PaymentSerializer, ComplaintSerializer, LeaveApplicationSerializer
 from django.conf import settings
-import razorpay
+from django.core.handlers.asgi import ASGIRequest
 from django.shortcuts import get_object_or_404
-from django.http import HttpResponse
-from reportlab.pdfgen import canvas
-from io import BytesIO
+from asgiref.sync import sync_to_async
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+from django.db import transaction
 from django.db.models import Q
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from accounts.authentication import ClaimsJWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from core.fieldsets import SparseFieldsetViewMixin
+from .allocation import AllocationError, allocate_beds, normalize_requests
+from .assignment import adjust_open, assign_complaint, auto_assign_enabled, is_open
+from .billing import parse_month
+from .bulk import BulkActionError, bulk_set_status, parse_bulk_request
+from .dashboard import get_dashboard
+from .events import event_stream
+from .exports import CONTENT_TYPES, ExportError, render_export
+from .headcount import HeadcountError, daily_headcount, parse_range
+from .invoices import INVOICE_RELATED, get_invoice_pdf, iter_month, stream_zip
+from .notifications import broadcast, send_notification
+from .payments import PaymentVerificationError, create_order, record_payment
+from .reconciliation import ingest_event
+from .uploads import UploadError, append_chunk, chunk_size, complete_upload, start_upload, store_upload
+
+logger = logging.getLogger(__name__)
+
+def profile_id(user):
+    """The caller's StudentProfile id: the token claim, else one lookup (profile created after login)."""
+    return getattr(user, 'profile_id', None) or (
+        StudentProfile.objects.filter(user=user).values_list('pk', flat=True).first()
+    )
+
+class BulkStatusMixin:
+    """
+    POST <resource>/bulk-status/ {"ids": [...], "status": ...} sets the status
+    of many rows with a single UPDATE and answers {"results": {id: outcome}},
+    outcome being updated, unchanged or not_found.
+    """
+    bulk_roles = ('manager',)
+    bulk_fields = ()
+    bulk_notification = None
+
+    def bulk_extra(self, request):
+        return {}
+
+    def bulk_after_update(self, rows):
+        pass
+
+    @decorators.action(detail=False, methods=['post'], url_path='bulk-status')
+    def bulk_status(self, request):
+        if request.user.role not in self.bulk_roles:
+            return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        model = self.get_queryset().model
+        try:
+            ids, target = parse_bulk_request(request.data, model._meta.get_field('status').choices)
+        except BulkActionError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        results = bulk_set_status(
+            self.get_queryset(), ids, target, fields=self.bulk_fields, extra=self.bulk_extra(request),
+            notification=self.bulk_notification, after_update=self.bulk_after_update,
+        )
+        return Response({'status': target, 'results': results})
 
-class StudentProfileViewSet(viewsets.ModelViewSet):
+class StudentProfileViewSet(SparseFieldsetViewMixin, viewsets.ModelViewSet):
     queryset = StudentProfile.objects.all()
     serializer_class = StudentProfileSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
+        queryset = super().get_queryset()
         user = self.request.user
         if hasattr(user, 'role') and user.role == 'manager':
-            return self.queryset
-        return self.queryset.filter(user=user)
+            return queryset
+        return queryset.filter(user=user)
 
     @decorators.action(detail=True, methods=['post'])
     def verify(self, request, pk=None):
         profile = self.get_object()
-        profile.is_verified = True
-        profile.save()
-        send_notification(profile.user, "Account Verified", "Your profile has been verified by the manager.")
+        with transaction.atomic():
+            profile.is_verified = True
+            profile.save()
+            send_notification(profile.user, "Account Verified", "Your profile has been verified by the manager.")
         return Response({'status': 'verified'})
 
     @decorators.action(detail=True, methods=['post'])
     def unverify(self, request, pk=None):
         profile = self.get_object()
-        profile.is_verified = False
-        profile.save()
-        send_notification(profile.user, "Account Unverified", "Your profile verification has been revoked. Please contact the manager.")
+        with transaction.atomic():
+            profile.is_verified = False
+            profile.save()
+            send_notification(profile.user, "Account Unverified", "Your profile verification has been revoked. Please contact the manager.")
         return Response({'status': 'unverified'})
 
-class DocumentViewSet(viewsets.ModelViewSet):
+    @decorators.action(detail=False, methods=['post'])
+    def allocate(self, request):
+        """
+        Batch bed allocation. Body: {"students": [profile ids or
+        {student, hostel, room_type, max_rent}], "hostel", "room_type", "max_rent"}.
+        """
+        if request.user.role != 'manager':
+            return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            requests = normalize_requests(request.data)
+        except AllocationError as e:
+            raise ValidationError({'detail': str(e)})
+        return Response(allocate_beds(requests))
+
+class DocumentViewSet(BulkStatusMixin, viewsets.ModelViewSet):
     queryset = Document.objects.all()
     serializer_class = DocumentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    bulk_fields = ('doc_type',)
+    bulk_notification = ('Document Review', 'Your {doc_type} document has been {status}.')
 
     def get_queryset(self):
         user = self.request.user
@@ -50,16 +127,77 @@ class DocumentViewSet(viewsets.ModelViewSet):
         return self.queryset.filter(student__user=user)
 
     def perform_create(self, serializer):
-        student_profile = StudentProfile.objects.get(user=self.request.user)
-        serializer.save(student=student_profile)
+        student_id = profile_id(self.request.user)
+        if student_id is None:
+            raise ValidationError({'detail': 'Student profile not found. Please complete your profile first.'})
+        name, digest = store_upload(serializer.validated_data['file'])
+        serializer.save(student_id=student_id, file=name, sha256=digest)
+
+class DocumentUploadViewSet(viewsets.ViewSet):
+    """
+    Resumable document upload:
+      POST   uploads/                {doc_type, filename, size, sha256?}
+      PUT    uploads/<id>/           raw chunk, Content-Range: bytes <start>-<end>/<size>
+                                     (or Upload-Offset: <start>)
+      GET    uploads/<id>/           how many bytes the server has, to resume
+      POST   uploads/<id>/complete/  hash, store and create the Document
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get_session(self, pk):
+        return get_object_or_404(UploadSession.objects.select_related('document'), pk=pk, student__user=self.request.user)
 
-from django.core.mail import send_mail
+    def session_response(self, session, status_code=status.HTTP_200_OK):
+        document = DocumentSerializer(session.document, context={'request': self.request}).data if session.document else None
+        return Response({
+            'id': session.pk, 'filename': session.filename, 'size': session.size, 'received': session.received,
+            'chunk_size': chunk_size(), 'status': session.status, 'document': document,
+        }, status=status_code, headers={'Upload-Offset': str(session.received)})
 
-def send_notification(user, subject, message):
-    """Mock notification helper"""
-    print(f"NOTIF to {user.email}: {subject} - {message}")
-    # In production, use send_mail
-    # send_mail(subject, message, settings.DEFAULT_FROM_EMAIL, [user.email])
+    def error_response(self, error):
+        data = {'detail': str(error)}
+        if error.received is not None:
+            data['received'] = error.received
+        return Response(data, status=error.status)
+
+    def create(self, request):
+        student = get_object_or_404(StudentProfile, user=request.user)
+        data = request.data
+        try:
+            session = start_upload(student, data.get('doc_type'), data.get('filename'), data.get('size'), data.get('sha256'))
+        except UploadError as e:
+            return self.error_response(e)
+        return self.session_response(session, status.HTTP_201_CREATED)
+
+    def retrieve(self, request, pk=None):
+        return self.session_response(self.get_session(pk))
+
+    def update(self, request, pk=None):
+        session = self.get_session(pk)
+        try:
+            length = int(request.META.get('CONTENT_LENGTH') or 0)
+            content_range = request.headers.get('Content-Range', '')
+            if content_range:
+                start = int(content_range.split()[1].split('-')[0])
+            else:
+                start = int(request.headers.get('Upload-Offset', ''))
+        except (IndexError, ValueError):
+            return Response({'detail': 'Send Content-Range: bytes <start>-<end>/<size> or Upload-Offset'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            # Read straight from the socket; never goes through request.data
+            session = append_chunk(session, start, request.stream, length)
+        except UploadError as e:
+            return self.error_response(e)
+        return self.session_response(session)
+
+    @decorators.action(detail=True, methods=['post'])
+    def complete(self, request, pk=None):
+        try:
+            session = complete_upload(self.get_session(pk))
+        except UploadError as e:
+            return self.error_response(e)
+        return self.session_response(session, status.HTTP_201_CREATED)
 
 class RentViewSet(viewsets.ModelViewSet):
     queryset = Rent.objects.all()
@@ -75,20 +213,11 @@ class RentViewSet(viewsets.ModelViewSet):
     @decorators.action(detail=True, methods=['post'], url_path='create-payment')
     def create_payment(self, request, pk=None):
         rent = self.get_object()
-        client = razorpay.Client(auth=(getattr(settings, 'RAZORPAY_KEY_ID', 'test'), getattr(settings, 'RAZORPAY_KEY_SECRET', 'test')))
-        
-        order_amount = int((rent.amount + rent.late_fee) * 100)
-        order_currency = 'INR'
-        order_receipt = f'rent_{rent.id}'
-        
+        if rent.status == 'paid':
+            return Response({'error': 'Rent is already paid'}, status=status.HTTP_400_BAD_REQUEST)
+
         try:
-            razorpay_order = client.order.create({
-                'amount': order_amount,
-                'currency': order_currency,
-                'receipt': order_receipt,
-                'payment_capture': '1'
-            })
-            return Response(razorpay_order)
+            return Response(create_order(rent))
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
 
@@ -99,35 +228,22 @@ class RentViewSet(viewsets.ModelViewSet):
         razorpay_order_id = request.data.get('razorpay_order_id')
         razorpay_signature = request.data.get('razorpay_signature')
 
-        client = razorpay.Client(auth=(getattr(settings, 'RAZORPAY_KEY_ID', 'test'), getattr(settings, 'RAZORPAY_KEY_SECRET', 'test')))
-
         try:
-            # Verify signature
-            client.utility.verify_payment_signature({
-                'razorpay_order_id': razorpay_order_id,
-                'razorpay_payment_id': razorpay_payment_id,
-                'razorpay_signature': razorpay_signature
+            with transaction.atomic():
+                payment, created = record_payment(rent, razorpay_order_id, razorpay_payment_id, razorpay_signature)
+                if created:
+                    send_notification(rent.student.user, "Rent Payment Received", f"Your payment of ₹{payment.amount} has been confirmed.")
+        except PaymentVerificationError as e:
+            logger.warning('Payment verification failed', extra={
+                'rent_id': rent.pk, 'order_id': razorpay_order_id, 'payment_id': razorpay_payment_id, 'error': str(e),
             })
-
-            # Update rent and create payment record
-            rent.status = 'paid'
-            rent.save()
-            
-            Payment.objects.create(
-                rent=rent,
-                transaction_id=razorpay_payment_id,
-                amount=rent.amount + rent.late_fee,
-                status='captured',
-                method='razorpay'
-            )
-
-            send_notification(rent.student.user, "Rent Payment Received", f"Your payment of ₹{rent.amount + rent.late_fee} has been confirmed.")
-
-            return Response({'status': 'payment verification successful'})
-        except Exception as e:
-            print(f"PAYMENT VERIFICATION ERROR: {str(e)}")
             return Response({'error': f'Payment verification failed: {str(e)}'}, status=status.HTTP_400_BAD_REQUEST)
 
+        if not created:
+            # Double submit or replay: the first request already recorded it
+            return Response({'status': 'payment already verified'})
+        return Response({'status': 'payment verification successful'})
+
 class PaymentViewSet(viewsets.ModelViewSet):
     queryset = Payment.objects.all()
     serializer_class = PaymentSerializer
@@ -139,31 +255,51 @@ class PaymentViewSet(viewsets.ModelViewSet):
             return self.queryset
         return self.queryset.filter(rent__student__user=user)
 
-class ComplaintViewSet(viewsets.ModelViewSet):
+class ComplaintViewSet(BulkStatusMixin, viewsets.ModelViewSet):
     queryset = Complaint.objects.all()
     serializer_class = ComplaintSerializer
     permission_classes = [permissions.IsAuthenticated]
+    bulk_roles = ('manager', 'staff')
+    bulk_fields = ('title', 'assigned_to')
+    bulk_notification = ('Complaint Update', 'Your complaint "{title}" is now {status}.')
+
+    def bulk_extra(self, request):
+        remarks = request.data.get('remarks')
+        return {'remarks': remarks} if remarks else {}
+
+    def bulk_after_update(self, rows):
+        # The UPDATE skips the signals that keep staff open counters in step
+        target_open = is_open(self.request.data.get('status'))
+        deltas = {}
+        for row in rows:
+            if row['assigned_to'] and is_open(row['status']) != target_open:
+                deltas[row['assigned_to']] = deltas.get(row['assigned_to'], 0) + (1 if target_open else -1)
+        adjust_open(deltas)
 
     def get_queryset(self):
         user = self.request.user
         if hasattr(user, 'role') and user.role == 'manager':
             return Complaint.objects.all()
         if user.role == 'staff':
+            # Unassigned complaints stay visible: auto-assign leaves them unassigned when no one is eligible
             return Complaint.objects.filter(Q(assigned_to=user) | Q(assigned_to__isnull=True))
         return Complaint.objects.filter(student__user=user)
 
     def perform_create(self, serializer):
-        try:
-            student_profile = StudentProfile.objects.get(user=self.request.user)
-            serializer.save(student=student_profile)
-        except StudentProfile.DoesNotExist:
-            from rest_framework.exceptions import ValidationError
+        student_id = profile_id(self.request.user)
+        if student_id is None:
             raise ValidationError({'detail': 'Student profile not found. Please complete your profile first.'})
+        with transaction.atomic():
+            complaint = serializer.save(student_id=student_id)
+            if auto_assign_enabled():
+                assign_complaint(complaint)
 
-class LeaveApplicationViewSet(viewsets.ModelViewSet):
+class LeaveApplicationViewSet(BulkStatusMixin, viewsets.ModelViewSet):
     queryset = LeaveApplication.objects.all()
     serializer_class = LeaveApplicationSerializer
     permission_classes = [permissions.IsAuthenticated]
+    bulk_fields = ('start_date', 'end_date')
+    bulk_notification = ('Leave Application', 'Your leave from {start_date} to {end_date} has been {status}.')
 
     def get_queryset(self):
         if hasattr(self.request.user, 'role') and self.request.user.role == 'manager':
@@ -171,63 +307,163 @@ class LeaveApplicationViewSet(viewsets.ModelViewSet):
         return self.queryset.filter(student__user=self.request.user)
 
     def perform_create(self, serializer):
-        print(f"DEBUG: Leave Create - Request Data: {self.request.data}")
-        print(f"DEBUG: Leave Create - Validated Data: {serializer.validated_data}")
-        try:
-            student_profile = StudentProfile.objects.get(user=self.request.user)
-            serializer.save(student=student_profile)
-        except StudentProfile.DoesNotExist:
-            from rest_framework.exceptions import ValidationError
+        student_id = profile_id(self.request.user)
+        if student_id is None:
             raise ValidationError({'detail': 'Student profile not found. Please complete your profile first.'})
+        leave = serializer.save(student_id=student_id)
+        logger.debug('Leave application created', extra={
+            'leave_id': leave.pk, 'student_id': student_id, 'start_date': leave.start_date, 'end_date': leave.end_date,
+        })
 
     def perform_update(self, serializer):
-        print(f"DEBUG: Leave Update - Request Data: {self.request.data}")
-        print(f"DEBUG: Leave Update - Validated Data: {serializer.validated_data}")
-        instance = serializer.save()
-        print(f"DEBUG: Leave Update - Final Status: {instance.status}")
+        leave = serializer.save()
+        logger.debug('Leave application updated', extra={
+            'leave_id': leave.pk, 'status': leave.status, 'user_id': self.request.user.pk,
+            'fields': sorted(serializer.validated_data),
+        })
+
+    @decorators.action(detail=False, methods=['get'])
+    def headcount(self, request):
+        """Per-day present/away counts per hostel for ?from=YYYY-MM-DD&to=YYYY-MM-DD[&hostel=<id>], today onwards."""
+        if request.user.role not in ('manager', 'staff'):
+            return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+        params = request.query_params
+        try:
+            start, end = parse_range(params.get('from'), params.get('to'))
+            hostel = int(params['hostel']) if params.get('hostel') else None
+        except (HeadcountError, ValueError) as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response({'from': start, 'to': end, 'hostels': daily_headcount(start, end, hostel)})
 
 @decorators.api_view(['GET'])
 @decorators.permission_classes([permissions.IsAuthenticated])
 def generate_invoice_pdf(request, rent_id):
-    rent = get_object_or_404(Rent, id=rent_id)
+    rent = get_object_or_404(Rent.objects.select_related(*INVOICE_RELATED), id=rent_id)
     if request.user.role != 'manager' and rent.student.user != request.user:
         return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
 
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer)
-    
-    p.setFont("Helvetica-Bold", 16)
-    p.drawString(100, 800, "RENT INVOICE")
-    
-    p.setFont("Helvetica", 12)
-    p.drawString(100, 770, f"Hostel: {rent.student.current_bed.room.floor.hostel.name if rent.student.current_bed else 'N/A'}")
-    p.drawString(100, 755, f"Student: {rent.student.user.get_full_name() or rent.student.user.username}")
-    p.drawString(100, 740, f"Month: {rent.month.strftime('%B %Y')}")
-    p.drawString(100, 725, f"Date: {rent.created_at.strftime('%d-%m-%Y')}")
-    
-    p.line(100, 715, 500, 715)
-    
-    p.drawString(100, 690, "Description")
-    p.drawString(400, 690, "Amount")
-    
-    p.drawString(100, 670, f"Monthly Rent for {rent.month.strftime('%B %Y')}")
-    p.drawString(400, 670, f"INR {rent.amount}")
-    
-    if rent.late_fee > 0:
-        p.drawString(100, 650, "Late Fee")
-        p.drawString(400, 650, f"INR {rent.late_fee}")
-        
-    p.line(100, 640, 500, 640)
-    
-    p.setFont("Helvetica-Bold", 12)
-    p.drawString(100, 620, "Total")
-    p.drawString(400, 620, f"INR {rent.amount + rent.late_fee}")
-    
-    p.setFont("Helvetica", 10)
-    p.drawString(100, 580, f"Status: {rent.get_status_display()}")
-    
-    p.showPage()
-    p.save()
-    
-    buffer.seek(0)
-    return HttpResponse(buffer, content_type='application/pdf', status=status.HTTP_200_OK)
+    return HttpResponse(get_invoice_pdf(rent), content_type='application/pdf', status=status.HTTP_200_OK)
+
+@decorators.api_view(['GET'])
+@decorators.permission_classes([permissions.IsAuthenticated])
+def invoice_run(request):
+    """
+    All invoices for ?month=YYYY-MM as a streamed ZIP. Missing invoices are
+    rendered in a process pool while the archive streams.
+    """
+    if request.user.role != 'manager':
+        return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+    try:
+        month = parse_month(request.query_params.get('month', ''))
+    except ValueError:
+        return Response({'detail': 'month must be given as YYYY-MM'}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(stream_zip(iter_month(month)), content_type='application/zip')
+    response['Content-Disposition'] = f'attachment; filename="invoices_{month.strftime("%Y_%m")}.zip"'
+    return response
+
+@decorators.api_view(['POST'])
+@decorators.authentication_classes([])
+@decorators.permission_classes([permissions.AllowAny])
+def payment_webhook(request):
+    """
+    Gateway webhook: verify the signature, store the event in the inbox and
+    return at once. `manage.py reconcile_payments` applies it later.
+    """
+    # Read the raw body before anything touches request.data
+    body = request.body
+    try:
+        event_id = ingest_event(body, request.headers.get('X-Razorpay-Signature'), request.headers.get('X-Razorpay-Event-Id'))
+    except PaymentVerificationError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response({'status': 'received', 'event_id': event_id})
+
+@decorators.api_view(['GET'])
+@decorators.permission_classes([permissions.IsAuthenticated])
+def dashboard_stats(request):
+    if request.user.role != 'manager':
+        return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+    return Response(get_dashboard())
+
+@decorators.api_view(['GET'])
+@decorators.permission_classes([permissions.IsAuthenticated])
+def export_ledger(request, kind, ext):
+    """
+    Streamed rents/payments/collections export. Filters: ?from=YYYY-MM,
+    ?to=YYYY-MM, ?hostel=<id>, ?status=<status>. The current_* location
+    columns and ?hostel= use the student's current allocation.
+    """
+    if request.user.role != 'manager':
+        return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+    params = request.query_params
+    try:
+        filters = {
+            'start': parse_month(params['from']) if params.get('from') else None,
+            'end': parse_month(params['to']) if params.get('to') else None,
+            'hostel': int(params['hostel']) if params.get('hostel') else None,
+            'status': params.get('status'),
+        }
+        stream = render_export(kind, ext, filters)
+    except ExportError as e:
+        return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except ValueError:
+        return Response({'detail': 'from/to must be YYYY-MM and hostel an id'}, status=status.HTTP_400_BAD_REQUEST)
+
+    response = StreamingHttpResponse(stream, content_type=CONTENT_TYPES[ext])
+    response['Content-Disposition'] = f'attachment; filename="{kind}.{ext}"'
+    return response
+
+@decorators.api_view(['POST'])
+@decorators.permission_classes([permissions.IsAuthenticated])
+def broadcast_notification(request):
+    """
+    Queue one message to every student, or only those housed in "hostel".
+    Delivery happens in `manage.py send_notifications`.
+    """
+    if request.user.role != 'manager':
+        return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+    subject = (request.data.get('subject') or '').strip()
+    message = (request.data.get('message') or '').strip()
+    if not subject or not message:
+        return Response({'detail': 'subject and message are required'}, status=status.HTTP_400_BAD_REQUEST)
+
+    students = StudentProfile.objects.all()
+    hostel = request.data.get('hostel')
+    if hostel:
+        students = students.filter(current_bed__room__floor__hostel_id=hostel)
+    queued = broadcast(students.values_list('user_id', flat=True).iterator(), subject[:200], message)
+    return Response({'queued': queued}, status=status.HTTP_202_ACCEPTED)
+
+
+def _stream_user(request):
+    """JWT from the Authorization header, or ?token= since EventSource can't send headers."""
+    auth = ClaimsJWTAuthentication()
+    header = auth.get_header(request)
+    raw = auth.get_raw_token(header) if header else request.GET.get('token')
+    if not raw:
+        return None
+    try:
+        return auth.get_user(auth.get_validated_token(raw))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+
+async def event_stream_view(request):
+    """
+    GET events/ — Server-Sent Events with status changes of the caller's
+    complaints, leaves and rents. Only served under ASGI: WSGI would read
+    the endless stream into memory while holding a worker thread, so there
+    the answer is 204, which tells EventSource not to reconnect.
+    """
+    if request.method != 'GET':
+        return JsonResponse({'detail': f'Method "{request.method}" not allowed.'}, status=status.HTTP_405_METHOD_NOT_ALLOWED)
+    if not isinstance(request, ASGIRequest):
+        return HttpResponse(status=status.HTTP_204_NO_CONTENT)
+    user = await sync_to_async(_stream_user)(request)
+    if user is None:
+        return JsonResponse({'detail': 'Authentication credentials were not provided or are invalid.'},
+                            status=status.HTTP_401_UNAUTHORIZED)
+    response = StreamingHttpResponse(event_stream(user.pk), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'
+    return response
@@ -0,0 +1,120 @@
+from rest_framework import permissions, serializers
+from rest_framework.exceptions import ValidationError
+
+
+def parse_fieldset(value):
+    """
+    Turn "id,user.username,rents.payments" into a tree:
+    {'id': {}, 'user': {'username': {}}, 'rents': {'payments': {}}}.
+    None (parameter absent) stays None.
+    """
+    if value is None:
+        return None
+    tree = {}
+    for path in value.split(','):
+        node = tree
+        for name in filter(None, (part.strip() for part in path.split('.'))):
+            node = node.setdefault(name, {})
+    return tree
+
+
+def _nested(field):
+    return field.child if isinstance(field, serializers.ListSerializer) else field
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer side of ?fields= / ?expand=.
+
+    `fields` keeps only the named fields (dotted names reach into nested
+    serializers). Relations listed in Meta.expandable are rendered only when
+    named in `expand`, otherwise they collapse to their primary key (if the
+    model field is a plain foreign key) or are left out. When neither
+    parameter is given the full representation is returned.
+
+    Meta.related maps each expandable field to the lookup the view should
+    select_related / prefetch_related when the field is rendered.
+    """
+    sparse_fields = None
+    sparse_expand = None
+
+    def get_fields(self):
+        fields = super().get_fields()
+        if self.parent is None or (isinstance(self.parent, serializers.ListSerializer) and self.parent.parent is None):
+            self.sparse_fields = self.context.get('fields')
+            self.sparse_expand = self.context.get('expand')
+        only, expand = self.sparse_fields, self.sparse_expand
+
+        if only:
+            unknown = set(only) - set(fields)
+            if unknown:
+                raise ValidationError({'fields': f"Unknown field(s): {', '.join(sorted(unknown))}"})
+            fields = {name: field for name, field in fields.items() if name in only}
+
+        expandable = getattr(self.Meta, 'expandable', ())
+        if expand is not None:
+            unknown = set(expand) - set(expandable)
+            if unknown:
+                raise ValidationError({'expand': f"Not expandable: {', '.join(sorted(unknown))}"})
+            for name in expandable:
+                if name in fields and name not in expand:
+                    collapsed = self._collapsed_field(name)
+                    if collapsed is None:
+                        del fields[name]
+                    else:
+                        fields[name] = collapsed
+
+        for name, field in fields.items():
+            child = _nested(field)
+            if isinstance(child, SparseFieldsetMixin):
+                child.sparse_fields = (only or {}).get(name) or None
+                child.sparse_expand = None if expand is None else expand.get(name, {})
+        return fields
+
+    def _collapsed_field(self, name):
+        model_field = next((f for f in self.Meta.model._meta.concrete_fields if f.name == name), None)
+        if model_field is None or not model_field.is_relation:
+            return None
+        return serializers.PrimaryKeyRelatedField(read_only=True)
+
+    def get_related_lookups(self, prefix='', prefetching=False):
+        """(select_related, prefetch_related) lookups for the fields this serializer will render."""
+        selects, prefetches = [], []
+        related = getattr(self.Meta, 'related', {})
+        for name, field in self.fields.items():
+            if name not in related or isinstance(field, serializers.RelatedField):
+                continue
+            lookup = prefix + related[name]
+            many = prefetching or isinstance(field, serializers.ListSerializer)
+            (prefetches if many else selects).append(lookup)
+            child = _nested(field)
+            if isinstance(child, SparseFieldsetMixin):
+                nested_selects, nested_prefetches = child.get_related_lookups(lookup + '__', many)
+                selects += nested_selects
+                prefetches += nested_prefetches
+        return selects, prefetches
+
+
+class SparseFieldsetViewMixin:
+    """
+    View side of ?fields= / ?expand=: passes the parsed shape to the
+    serializer on safe requests and select/prefetches exactly the relations
+    it will render, so list queries stay constant in the number of rows.
+    """
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.request.method in permissions.SAFE_METHODS:
+            params = self.request.query_params
+            context['fields'] = parse_fieldset(params.get('fields'))
+            context['expand'] = parse_fieldset(params.get('expand'))
+        return context
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        selects, prefetches = serializer.get_related_lookups()
+        if selects:
+            queryset = queryset.select_related(*selects)
+        if prefetches:
+            queryset = queryset.prefetch_related(*prefetches)
+        return queryset
@@ -0,0 +1,62 @@
+import io
+import os
+import pstats
+
+from django.core.management.base import BaseCommand, CommandError
+from core.profiling import list_profiles, profile_dir, profile_path
+
+SORT_KEYS = ('tottime', 'cumulative', 'ncalls')
+
+
+def top_frames(profile_id, sort='tottime', limit=3):
+    """[(function, calls, own seconds, cumulative seconds)] for the heaviest frames."""
+    stats = pstats.Stats(profile_path(profile_id))
+    column = {'tottime': 2, 'cumulative': 3, 'ncalls': 1}[sort]
+    rows = sorted(stats.stats.items(), key=lambda item: item[1][column], reverse=True)[:limit]
+    return [(pstats.func_std_string(func), nc, tt, ct) for func, (cc, nc, tt, ct, callers) in rows]
+
+
+class Command(BaseCommand):
+    help = 'List recent request profiles, or show the top frames of one'
+
+    def add_arguments(self, parser):
+        parser.add_argument('profile', nargs='?', help='Profile id (or a unique prefix) to show in detail')
+        parser.add_argument('--sort', choices=SORT_KEYS, default='tottime', help='Order frames by this column')
+        parser.add_argument('--limit', type=int, default=25, help='Frames to print for one profile')
+        parser.add_argument('--clear', action='store_true', help='Delete every stored profile')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            removed = 0
+            for profile in list_profiles():
+                for path in (profile_path(profile['id']), os.path.join(profile_dir(), f"{profile['id']}.json")):
+                    if os.path.exists(path):
+                        os.remove(path)
+                removed += 1
+            self.stdout.write(self.style.SUCCESS(f'Removed {removed} profiles'))
+            return
+
+        profiles = list_profiles()
+        if options['profile']:
+            matches = [p for p in profiles if p['id'].startswith(options['profile'])]
+            if len(matches) != 1:
+                raise CommandError(f"{len(matches)} profiles match {options['profile']!r}")
+            self.show(matches[0], options['sort'], options['limit'])
+            return
+
+        if not profiles:
+            self.stdout.write(f'No profiles in {profile_dir()}')
+            return
+        for profile in profiles:
+            self.stdout.write(f"{profile['id']}  {profile['method']} {profile['path']}  {profile['status']}  "
+                              f"{profile['duration_ms']:.0f} ms  ({profile['trigger']})")
+            for func, calls, own, cumulative in top_frames(profile['id'], options['sort']):
+                self.stdout.write(f'    {own * 1000:8.1f} ms own {cumulative * 1000:8.1f} ms cum {calls:>7}x  {func}')
+
+    def show(self, profile, sort, limit):
+        self.stdout.write(f"{profile['method']} {profile['path']} -> {profile['status']} in {profile['duration_ms']:.0f} ms "
+                          f"({profile['time']}, {profile['trigger']})")
+        output = io.StringIO()
+        stats = pstats.Stats(profile_path(profile['id']), stream=output)
+        stats.strip_dirs().sort_stats(sort).print_stats(limit)
+        self.stdout.write(output.getvalue())
@@ -0,0 +1,236 @@
+"""
+Per-endpoint request metrics kept in process memory and exported in the
+Prometheus text format at /api/metrics.
+
+Each (view name, method) pair gets histograms of wall time, query count,
+DB time and response size. Histograms use fixed log-spaced buckets, so
+memory per endpoint is constant and quantiles are accurate to one bucket
+(~15%).
+"""
+import hmac
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.http import HttpResponse
+
+slow_logger = logging.getLogger('core.metrics.slow')
+
+QUANTILES = (0.5, 0.95, 0.99)
+MAX_CAPTURED_QUERIES = 200
+MAX_LOGGED_SQL_CHARS = 2000
+UNMATCHED = '<unmatched>'
+# Query parameters never written to logs or profiles (the event stream takes its JWT as ?token=)
+SECRET_PARAMS = {'token', 'access', 'refresh', 'password', 'secret', 'signature', 'key'}
+
+
+def log_bounds(low, high, growth=1.15):
+    bounds = [low]
+    while bounds[-1] < high:
+        bounds.append(bounds[-1] * growth)
+    return bounds
+
+
+class Histogram:
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def quantile(self, q):
+        """Upper bound of the bucket holding the q-th observation (the largest bound for +Inf)."""
+        if not self.count:
+            return 0.0
+        rank, seen = q * self.count, 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count:
+                return self.bounds[min(index, len(self.bounds) - 1)]
+        return self.bounds[-1]
+
+
+# name -> (help text, bucket bounds)
+HISTOGRAMS = {
+    'http_request_duration_seconds': ('Wall time spent in the view and middleware.', log_bounds(0.0005, 120)),
+    'http_request_db_queries': ('Database queries run per request.', [0] + log_bounds(1, 10000)),
+    'http_request_db_seconds': ('Time spent waiting on the database per request.', log_bounds(0.0001, 120)),
+    'http_response_size_bytes': ('Response body size (non-streaming responses).', log_bounds(64, 512 * 1024 * 1024)),
+}
+
+
+class Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.histograms = {}  # (name, view, method) -> Histogram
+            self.requests = {}  # (view, method, status) -> count
+
+    def record(self, view, method, status, **values):
+        with self._lock:
+            self.requests[view, method, status] = self.requests.get((view, method, status), 0) + 1
+            for name, value in values.items():
+                if value is None:
+                    continue
+                histogram = self.histograms.get((name, view, method))
+                if histogram is None:
+                    histogram = self.histograms[name, view, method] = Histogram(HISTOGRAMS[name][1])
+                histogram.observe(value)
+
+    def render(self):
+        """The registry in the Prometheus text exposition format (0.0.4)."""
+        with self._lock:
+            requests = sorted(self.requests.items())
+            histograms = sorted(
+                (key, (h.count, h.sum, [h.quantile(q) for q in QUANTILES])) for key, h in self.histograms.items()
+            )
+        lines = ['# HELP http_requests_total Requests handled, by view, method and status code.',
+                 '# TYPE http_requests_total counter']
+        lines += [f'http_requests_total{_labels(view=v, method=m, status=s)} {n}' for (v, m, s), n in requests]
+        for name, (help_text, _) in HISTOGRAMS.items():
+            lines += [f'# HELP {name} {help_text}', f'# TYPE {name} summary']
+            for (metric, view, method), (count, total, quantiles) in histograms:
+                if metric != name:
+                    continue
+                for q, value in zip(QUANTILES, quantiles):
+                    lines.append(f'{name}{_labels(view=view, method=method, quantile=q)} {value:.6g}')
+                lines.append(f'{name}_sum{_labels(view=view, method=method)} {total:.6g}')
+                lines.append(f'{name}_count{_labels(view=view, method=method)} {count}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(**labels):
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for v in labels.values())
+    return '{' + ','.join(f'{k}="{v}"' for k, v in zip(labels, escaped)) + '}'
+
+
+registry = Registry()
+
+
+class QueryRecorder:
+    """execute_wrapper counting queries and DB time; keeps the SQL for the slow-request log."""
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.count += 1
+            self.seconds += elapsed
+            if len(self.queries) < MAX_CAPTURED_QUERIES:
+                self.queries.append((elapsed, sql))
+
+
+def _truncate(sql):
+    # Long IN lists and bulk INSERTs would otherwise make multi-megabyte log lines
+    if len(sql) <= MAX_LOGGED_SQL_CHARS:
+        return sql
+    return f'{sql[:MAX_LOGGED_SQL_CHARS]}... [{len(sql) - MAX_LOGGED_SQL_CHARS} more chars]'
+
+
+def redacted_path(request):
+    """The request path and query string with credential-like parameter values masked."""
+    if not request.GET:
+        return request.path
+    query = request.GET.copy()
+    for name in query:
+        if name.lower() in SECRET_PARAMS:
+            query.setlist(name, ['[redacted]'] * len(query.getlist(name)))
+    return f'{request.path}?{query.urlencode(safe="[]")}'
+
+
+def view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    return (match.view_name or match._func_path) if match else UNMATCHED
+
+
+class MetricsMiddleware:
+    """
+    Records every request into `registry`. Query counts cover the request's
+    thread, so async views (whose queries run in sync_to_async workers)
+    report wall time and size only. Requests slower than
+    SLOW_REQUEST_THRESHOLD_MS are logged to core.metrics.slow with their SQL.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        start, recorder = time.perf_counter(), QueryRecorder()
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(recorder))
+            response = self.get_response(request)
+        self.finish(request, response, time.perf_counter() - start, recorder)
+        return response
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        self.finish(request, response, time.perf_counter() - start, None)
+        return response
+
+    def finish(self, request, response, elapsed, recorder):
+        view = view_name(request)
+        size = None if response.streaming else len(response.content)
+        registry.record(
+            view, request.method, response.status_code,
+            http_request_duration_seconds=elapsed,
+            http_request_db_queries=recorder.count if recorder else None,
+            http_request_db_seconds=recorder.seconds if recorder else None,
+            http_response_size_bytes=size,
+        )
+        threshold = getattr(settings, 'SLOW_REQUEST_THRESHOLD_MS', None)
+        if threshold is not None and elapsed * 1000 >= threshold:
+            queries = sorted(recorder.queries, reverse=True) if recorder else []
+            slow_logger.warning(
+                'Slow request %s %s took %.0f ms', request.method, redacted_path(request), elapsed * 1000,
+                extra={
+                    'view': view, 'method': request.method, 'status': response.status_code,
+                    'duration_ms': round(elapsed * 1000, 1),
+                    'db_queries': recorder.count if recorder else None,
+                    'db_ms': round(recorder.seconds * 1000, 1) if recorder else None,
+                    'sql': [{'ms': round(t * 1000, 2), 'sql': _truncate(sql)} for t, sql in queries],
+                },
+            )
+
+
+def metrics_view(request):
+    """
+    GET /api/metrics — Prometheus text. Requires `Authorization: Bearer
+    <METRICS_TOKEN>` when that is set, else a caller in METRICS_ALLOWED_IPS;
+    with neither configured nobody gets in.
+    """
+    token = getattr(settings, 'METRICS_TOKEN', None)
+    if token:
+        allowed = hmac.compare_digest(request.headers.get('Authorization', '').encode(), f'Bearer {token}'.encode())
+    else:
+        allowed = request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+    if not allowed:
+        return HttpResponse('Forbidden\n', status=403, content_type='text/plain')
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,20 @@
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination over the primary key, which is unique, indexed and
+    follows creation order. Views can override the key with `cursor_ordering`.
+
+    Page size comes from ?page_size= or REST_FRAMEWORK['PAGE_SIZE']. While
+    PAGE_SIZE is unset, requests without ?page_size= stay unpaginated so
+    clients that expect a plain list keep working.
+    """
+    ordering = '-id'
+    page_size_query_param = 'page_size'
+    max_page_size = getattr(settings, 'API_MAX_PAGE_SIZE', 500)
+
+    def get_ordering(self, request, queryset, view):
+        ordering = getattr(view, 'cursor_ordering', self.ordering)
+        return (ordering,) if isinstance(ordering, str) else tuple(ordering)
@@ -0,0 +1,121 @@
+"""
+Opt-in cProfile hook for API requests.
+
+With PROFILING_ENABLED, a request is profiled when a manager sends the
+PROFILING_HEADER header (e.g. `X-Profile: 1`) or when it falls in the
+PROFILING_SAMPLE_RATE random sample. Profiles go to PROFILING_DIR as
+<id>.prof (pstats) plus <id>.json (request details); only the newest
+PROFILING_MAX_FILES are kept. `manage.py profiles` lists and summarises them.
+With PROFILING_ENABLED off the middleware removes itself at startup.
+"""
+import cProfile
+import json
+import os
+import random
+import re
+import threading
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from .metrics import redacted_path, view_name
+
+# One profiled request at a time per process: cProfile hooks the whole
+# interpreter on newer Pythons, and overlapping profiles would be noise
+_profiling = threading.Lock()
+
+
+def profile_dir():
+    return str(getattr(settings, 'PROFILING_DIR', settings.BASE_DIR / 'profiles'))
+
+
+def list_profiles():
+    """Metadata of the stored profiles, newest first."""
+    directory = profile_dir()
+    if not os.path.isdir(directory):
+        return []
+    profiles = []
+    for name in sorted(os.listdir(directory), reverse=True):
+        if name.endswith('.json'):
+            try:
+                with open(os.path.join(directory, name)) as f:
+                    profiles.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+    return profiles
+
+
+def profile_path(profile_id):
+    return os.path.join(profile_dir(), f'{profile_id}.prof')
+
+
+def _prune(directory, keep):
+    ids = sorted({os.path.splitext(name)[0] for name in os.listdir(directory) if name.endswith(('.prof', '.json'))})
+    for profile_id in ids[:-keep] if keep else ids:
+        for ext in ('.prof', '.json'):
+            try:
+                os.remove(os.path.join(directory, profile_id + ext))
+            except FileNotFoundError:
+                pass
+
+
+def save_profile(profiler, request, response, elapsed, trigger):
+    directory = profile_dir()
+    os.makedirs(directory, exist_ok=True)
+    now = datetime.now(timezone.utc)
+    view = view_name(request)
+    # Ids sort by time, so the ring is pruned by name
+    profile_id = f"{now:%Y%m%dT%H%M%S%f}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', view)[:60]}"
+    profiler.dump_stats(os.path.join(directory, f'{profile_id}.prof'))
+    with open(os.path.join(directory, f'{profile_id}.json'), 'w') as f:
+        json.dump({
+            'id': profile_id, 'time': now.isoformat(), 'method': request.method, 'path': redacted_path(request),
+            'view': view, 'status': response.status_code, 'duration_ms': round(elapsed * 1000, 1), 'trigger': trigger,
+        }, f)
+    _prune(directory, getattr(settings, 'PROFILING_MAX_FILES', 50))
+    return profile_id
+
+
+def requested_by_manager(request):
+    """Whether the profiling header came with a manager's JWT. Only runs when the header is present."""
+    from accounts.authentication import ClaimsJWTAuthentication
+    from rest_framework.exceptions import AuthenticationFailed
+    from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+    try:
+        result = ClaimsJWTAuthentication().authenticate(request)
+    except (AuthenticationFailed, InvalidToken, TokenError):
+        return False
+    return result is not None and result[0].role == 'manager'
+
+
+class ProfilingMiddleware:
+    def __init__(self, get_response):
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.header = 'HTTP_' + getattr(settings, 'PROFILING_HEADER', 'X-Profile').upper().replace('-', '_')
+        self.sample_rate = getattr(settings, 'PROFILING_SAMPLE_RATE', 0.0)
+
+    def trigger(self, request):
+        if request.META.get(self.header) and requested_by_manager(request):
+            return 'header'
+        if self.sample_rate and random.random() < self.sample_rate:
+            return 'sample'
+        return None
+
+    def __call__(self, request):
+        trigger = self.trigger(request)
+        if trigger is None or not _profiling.acquire(blocking=False):
+            return self.get_response(request)
+        try:
+            profiler = cProfile.Profile()
+            start = time.perf_counter()
+            response = profiler.runcall(self.get_response, request)
+            elapsed = time.perf_counter() - start
+        finally:
+            _profiling.release()
+        response['X-Profile-Id'] = save_profile(profiler, request, response, elapsed, trigger)
+        return response
@@ -0,0 +1,173 @@
+"""
+Publish/subscribe for pushing events to connected clients.
+
+The broker comes from settings.PUBSUB ({'BACKEND': dotted path, 'OPTIONS':
+{...}}). InProcessBroker reaches subscribers in the same process only, which
+is enough for a single ASGI worker; RedisBroker fans out across workers.
+"""
+import asyncio
+import json
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BACKEND = 'core.pubsub.InProcessBroker'
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+class SubscriptionLost(Exception):
+    """The subscriber fell too far behind and messages were dropped."""
+
+
+class Subscription:
+    """One subscriber's queue, bound to the event loop that created it."""
+
+    def __init__(self, max_queue):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(max_queue)
+        self.lost = False
+
+    def _put(self, message):
+        try:
+            self.queue.put_nowait(message)
+        except asyncio.QueueFull:
+            self.lost = True
+
+    def deliver(self, message):
+        """Thread-safe; may be called from any thread."""
+        try:
+            self.loop.call_soon_threadsafe(self._put, message)
+        except RuntimeError:  # loop already closed
+            pass
+
+    async def get(self, timeout=None):
+        """Next message, or None if nothing arrived within `timeout` seconds."""
+        if self.lost:
+            raise SubscriptionLost()
+        try:
+            return await asyncio.wait_for(self.queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+
+class Broker(ABC):
+    @abstractmethod
+    def publish(self, channel, message):
+        """Send a JSON-serialisable dict to every subscriber of `channel`. Callable from sync code."""
+
+    @abstractmethod
+    def subscribe(self, channel):
+        """Async context manager yielding a Subscription."""
+
+
+class InProcessBroker(Broker):
+    def __init__(self, max_queue=100):
+        self.max_queue = max_queue
+        self._channels = defaultdict(set)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._channels.get(channel, ()))
+        for subscription in subscriptions:
+            subscription.deliver(message)
+        return len(subscriptions)
+
+    def subscriber_count(self, channel=None):
+        with self._lock:
+            if channel is not None:
+                return len(self._channels.get(channel, ()))
+            return sum(len(s) for s in self._channels.values())
+
+    def subscribe(self, channel):
+        return _Subscribe(self, channel)
+
+    def _add(self, channel, subscription):
+        with self._lock:
+            self._channels[channel].add(subscription)
+
+    def _remove(self, channel, subscription):
+        with self._lock:
+            subscriptions = self._channels.get(channel)
+            if subscriptions is not None:
+                subscriptions.discard(subscription)
+                if not subscriptions:
+                    del self._channels[channel]
+
+
+class _Subscribe:
+    # A plain class rather than @asynccontextmanager: cleanup must not await,
+    # since a stream dropped by its client may be finalised outside the loop
+    def __init__(self, broker, channel):
+        self.broker, self.channel = broker, channel
+
+    async def __aenter__(self):
+        self.subscription = Subscription(self.broker.max_queue)
+        self.broker._add(self.channel, self.subscription)
+        return self.subscription
+
+    async def __aexit__(self, *exc_info):
+        self.broker._remove(self.channel, self.subscription)
+
+
+class RedisBroker(InProcessBroker):
+    """
+    Publishes through Redis; each process holds one pattern subscription and
+    hands messages to its local subscribers, so idle clients cost no Redis
+    connections. Requires the `redis` package.
+    """
+
+    def __init__(self, url='redis://localhost:6379/0', prefix='hostel:', max_queue=100):
+        import redis
+
+        super().__init__(max_queue)
+        self.prefix = prefix
+        self._client = redis.Redis.from_url(url)
+        self._listener = None
+
+    def publish(self, channel, message):
+        self._client.publish(self.prefix + channel, json.dumps(message, cls=DjangoJSONEncoder))
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = self._client.pubsub(ignore_subscribe_messages=True)
+                pubsub.psubscribe(f'{self.prefix}*')
+                for item in pubsub.listen():
+                    channel = item['channel'].decode()[len(self.prefix):]
+                    super().publish(channel, json.loads(item['data']))
+            except Exception:
+                logger.exception('Redis pub/sub listener failed; reconnecting')
+                time.sleep(1)
+
+    def subscribe(self, channel):
+        with self._lock:
+            if self._listener is None:
+                self._listener = threading.Thread(target=self._listen, name='pubsub-redis', daemon=True)
+                self._listener.start()
+        return super().subscribe(channel)
+
+
+def get_broker():
+    global _broker
+    if _broker is None:
+        with _broker_lock:
+            if _broker is None:
+                config = getattr(settings, 'PUBSUB', {})
+                backend = import_string(config.get('BACKEND', DEFAULT_BACKEND))
+                _broker = backend(**config.get('OPTIONS', {}))
+    return _broker
+
+
+def publish(channel, message):
+    get_broker().publish(channel, message)
@@ -56,13 +56,17 @@ INSTALLED_APPS = [
     'django.contrib.staticfiles',
     'rest_framework',
     'corsheaders',
+    'core',
     'accounts',
     'hostel',
     'activity',
     'inventory',
+    'search',
 ]
 
 MIDDLEWARE = [
+    'core.metrics.MetricsMiddleware',
+    'core.profiling.ProfilingMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -143,6 +147,11 @@ STATIC_URL = 'static/'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Rendered invoice PDFs, keyed by rent id and content version (not served publicly)
+INVOICE_CACHE_DIR = BASE_DIR / 'invoice_cache'
+# Process pool size for bulk invoice runs (None = one per CPU)
+INVOICE_WORKERS = None
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/4.2/ref/settings/#default-auto-field
 
@@ -150,14 +159,46 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 AUTH_USER_MODEL = 'accounts.User'
 
+# Cache
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+# Local memory is per process; switch to the file cache (or any shared
+# backend) when running several workers so invalidations reach all of them.
+
+CACHES = {
+    'default': {
+        'BACKEND': os.environ.get('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.environ.get('CACHE_LOCATION', 'hostel-pg'),
+    }
+}
+
+# Serialized hostel/room structure responses (see hostel/cache.py)
+HOSTEL_STRUCTURE_CACHE = 'default'
+HOSTEL_STRUCTURE_CACHE_TIMEOUT = 300
+# Manager dashboard aggregates (see activity/dashboard.py)
+DASHBOARD_CACHE_TIMEOUT = 60
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'accounts.authentication.ClaimsJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
     ],
+    'DEFAULT_PAGINATION_CLASS': 'core.pagination.KeysetPagination',
+    # Unset = paginate only when the client sends ?page_size=
+    'PAGE_SIZE': int(os.environ['API_PAGE_SIZE']) if os.environ.get('API_PAGE_SIZE') else None,
+}
+API_MAX_PAGE_SIZE = 500
+
+# Access tokens carry role, profile id and the user's token_version, so
+# requests authenticate without loading the user. Deactivation and role or
+# password changes bump token_version; other workers notice within
+# AUTH_TOKEN_STATE_TTL seconds.
+SIMPLE_JWT = {
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.tokens.TokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.tokens.TokenRefreshSerializer',
 }
+AUTH_TOKEN_STATE_TTL = 30
 
 
 import os
@@ -167,3 +208,100 @@ CORS_ALLOW_ALL_ORIGINS = True  # For development
 # Razorpay Settings
 RAZORPAY_KEY_ID = os.environ.get('RAZORPAY_KEY_ID', 'test')
 RAZORPAY_KEY_SECRET = os.environ.get('RAZORPAY_KEY_SECRET', 'test')
+
+# Payment gateway (see activity/payments.py). Set PAYMENT_GATEWAY to
+# activity.payments.FakeGateway to run or benchmark payments offline.
+PAYMENT_GATEWAY = os.environ.get('PAYMENT_GATEWAY', 'activity.payments.RazorpayGateway')
+RAZORPAY_WEBHOOK_SECRET = os.environ.get('RAZORPAY_WEBHOOK_SECRET', '')
+PAYMENT_GATEWAY_OPTIONS = {
+    'timeout': (3.05, 10),  # connect, read seconds
+    'pool_size': 20,
+}
+
+# Late fee policy applied by `manage.py apply_late_fees`.
+# mode: 'flat' (amount), 'per_day' (per_day * days overdue) or 'tiered'
+# (fee of the highest tier whose min_days is reached). cap limits any mode.
+LATE_FEE_POLICY = {
+    'mode': 'flat',
+    'amount': 200,
+    'per_day': 20,
+    'tiers': [
+        {'min_days': 1, 'fee': 100},
+        {'min_days': 8, 'fee': 200},
+        {'min_days': 31, 'fee': 500},
+    ],
+    'cap': 1000,
+}
+
+# Notifications are written to an outbox and delivered by
+# `manage.py send_notifications`; failures back off exponentially
+# (NOTIFICATION_RETRY_BASE_SECONDS * 2^attempt) until dead-lettered.
+EMAIL_BACKEND = os.environ.get('EMAIL_BACKEND', 'django.core.mail.backends.console.EmailBackend')
+DEFAULT_FROM_EMAIL = os.environ.get('DEFAULT_FROM_EMAIL', 'noreply@hostel.local')
+NOTIFICATION_MAX_ATTEMPTS = 5
+NOTIFICATION_RETRY_BASE_SECONDS = 60
+
+# New complaints go to the eligible staff member with the fewest open
+# complaints; `manage.py assign_complaints` rebalances periodically.
+COMPLAINT_AUTO_ASSIGN = True
+
+# Uploaded photos and complaint images are re-encoded without metadata and
+# get WebP variants (long side in px) on a background thread after commit.
+IMAGE_PROCESSING_ASYNC = True
+IMAGE_WORKERS = 2
+IMAGE_VARIANTS = {'thumb': 160, 'medium': 640}
+
+# Resumable document uploads (activity/uploads.py). Parts are assembled in
+# DOCUMENT_UPLOAD_TEMP_DIR, then stored once per SHA-256 under MEDIA_ROOT.
+DOCUMENT_UPLOAD_CHUNK_SIZE = 1024 * 1024
+DOCUMENT_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+DOCUMENT_UPLOAD_TEMP_DIR = BASE_DIR / 'upload_tmp'
+
+# Largest id list accepted by the bulk-status endpoints
+BULK_ACTION_MAX_IDS = 1000
+
+# Live status events (GET /api/activity/events/, Server-Sent Events). Serve
+# through ASGI (e.g. `uvicorn core.asgi:application`). The in-process broker
+# only reaches clients of the same worker; with several workers use
+# 'core.pubsub.RedisBroker' with OPTIONS {'url': ...}.
+PUBSUB = {
+    'BACKEND': os.environ.get('PUBSUB_BACKEND', 'core.pubsub.InProcessBroker'),
+    'OPTIONS': {'url': os.environ['PUBSUB_URL']} if os.environ.get('PUBSUB_URL') else {},
+}
+EVENT_STREAM_HEARTBEAT_SECONDS = 20
+
+# Request metrics (core/metrics.py), served in Prometheus format at
+# /api/metrics to callers sending "Authorization: Bearer <METRICS_TOKEN>"
+# when a token is set, else to the comma-separated METRICS_ALLOWED_IPS.
+# With neither the endpoint is closed (behind a reverse proxy every caller
+# looks like loopback, so there is no default allowlist). Requests slower
+# than SLOW_REQUEST_THRESHOLD_MS are logged with their SQL.
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
+METRICS_ALLOWED_IPS = tuple(ip.strip() for ip in os.environ.get('METRICS_ALLOWED_IPS', '').split(',') if ip.strip())
+SLOW_REQUEST_THRESHOLD_MS = int(os.environ.get('SLOW_REQUEST_THRESHOLD_MS', 1000))
+
+# Request profiling (core/profiling.py). Off by default, and then free. When
+# on, managers get a cProfile of any request sent with "X-Profile: 1", and
+# PROFILING_SAMPLE_RATE of all requests are profiled at random. The newest
+# PROFILING_MAX_FILES profiles are kept; see `manage.py profiles`.
+PROFILING_ENABLED = os.environ.get('PROFILING_ENABLED', '').lower() in ('1', 'true', 'yes')
+PROFILING_SAMPLE_RATE = float(os.environ.get('PROFILING_SAMPLE_RATE', 0))
+PROFILING_HEADER = 'X-Profile'
+PROFILING_DIR = BASE_DIR / 'profiles'
+PROFILING_MAX_FILES = 50
+
+# Application loggers write one JSON object per line (core/log.py)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {'()': 'core.log.JsonFormatter'},
+    },
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler', 'formatter': 'json'},
+    },
+    'loggers': {
+        name: {'handlers': ['console'], 'level': os.environ.get('LOG_LEVEL', 'INFO'), 'propagate': False}
+        for name in ('accounts', 'activity', 'core', 'hostel', 'inventory', 'search')
+    },
+}
@@ -0,0 +1,6 @@
+from django.dispatch import Signal
+
+# Sent after a queryset UPDATE / bulk_update that skipped the model signals.
+# Arguments: sender (model class), pks (list of changed primary keys),
+# fields (names of the columns written).
+rows_bulk_updated = Signal()
@@ -0,0 +1,131 @@
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.authentication import forget_token_state
+from accounts.models import User
+from accounts.tokens import TokenObtainPairSerializer
+from .log import JsonFormatter
+from .metrics import Histogram, log_bounds, registry
+
+
+class HistogramTests(TestCase):
+    def test_quantiles_fall_within_one_bucket(self):
+        histogram = Histogram(log_bounds(0.001, 10))
+        for ms in range(1, 1001):
+            histogram.observe(ms / 1000)
+        for q in (0.5, 0.95, 0.99):
+            self.assertAlmostEqual(histogram.quantile(q), q, delta=q * 0.15)
+        self.assertEqual(histogram.count, 1000)
+
+
+class MetricsTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='manager', role='manager'))
+
+    def test_requests_are_recorded_per_view(self):
+        for _ in range(3):
+            self.assertEqual(self.client.get('/api/activity/leaves/').status_code, 200)
+        self.client.get('/api/no-such-endpoint/')
+
+        with override_settings(METRICS_ALLOWED_IPS=('127.0.0.1',)):
+            response = self.client.get('/api/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        text = response.content.decode()
+        self.assertIn('http_requests_total{view="leaveapplication-list",method="GET",status="200"} 3', text)
+        self.assertIn('http_requests_total{view="<unmatched>",method="GET",status="404"} 1', text)
+        self.assertIn('http_request_duration_seconds{view="leaveapplication-list",method="GET",quantile="0.99"}', text)
+        self.assertIn('http_request_db_queries_count{view="leaveapplication-list",method="GET"} 3', text)
+        self.assertIn('# TYPE http_response_size_bytes summary', text)
+
+    @override_settings(METRICS_TOKEN='s3cret', METRICS_ALLOWED_IPS=('127.0.0.1',))
+    def test_endpoint_needs_the_token_when_set(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer s3cret').status_code, 200)
+
+    @override_settings(METRICS_TOKEN=None, METRICS_ALLOWED_IPS=())
+    def test_endpoint_is_closed_unless_configured(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        with self.assertLogs('core.metrics.slow', 'WARNING') as logs:
+            self.client.get('/api/activity/leaves/')
+        record = logs.records[0]
+        self.assertEqual((record.view, record.status), ('leaveapplication-list', 200))
+        self.assertEqual(len(record.sql), record.db_queries)
+        self.assertIn('activity_leaveapplication', ' '.join(q['sql'] for q in record.sql))
+
+        with self.assertLogs('core.metrics.slow', 'WARNING') as logs:
+            with mock.patch('core.metrics.MAX_LOGGED_SQL_CHARS', 20):
+                self.client.get('/api/activity/leaves/')
+        self.assertTrue(all(len(q['sql']) < 60 for q in logs.records[0].sql))
+        self.assertIn('more chars]', logs.records[0].sql[0]['sql'])
+
+        line = json.loads(JsonFormatter().format(record))
+        self.assertEqual((line['level'], line['logger'], line['view']), ('WARNING', 'core.metrics.slow', 'leaveapplication-list'))
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=0)
+    def test_credentials_in_the_query_string_are_not_logged(self):
+        with self.assertLogs('core.metrics.slow', 'WARNING') as logs:
+            self.client.get('/api/activity/leaves/', {'token': 'eyJhbGciOi', 'status': 'pending'})
+        message = logs.records[0].getMessage()
+        self.assertIn('/api/activity/leaves/?token=[redacted]&status=pending', message)
+        self.assertNotIn('eyJhbGciOi', message)
+
+
+class ProfilingTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        forget_token_state()
+        self.manager = User.objects.create_user(username='manager', role='manager')
+        self.student = User.objects.create_user(username='student')
+
+    def get(self, user=None, **headers):
+        if user is not None:
+            headers['HTTP_AUTHORIZATION'] = f'Bearer {TokenObtainPairSerializer.get_token(user).access_token}'
+        return APIClient().get('/api/activity/leaves/', **headers)
+
+    def test_disabled_by_default(self):
+        response = self.get(self.manager, HTTP_X_PROFILE='1')
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('X-Profile-Id', response)
+
+    def test_header_profiles_manager_requests_only(self):
+        with self.settings(PROFILING_ENABLED=True, PROFILING_DIR=self.directory):
+            self.assertNotIn('X-Profile-Id', self.get(self.manager))
+            self.assertNotIn('X-Profile-Id', self.get(self.student, HTTP_X_PROFILE='1'))
+            self.assertNotIn('X-Profile-Id', self.get(HTTP_X_PROFILE='1'))
+            response = self.get(self.manager, HTTP_X_PROFILE='1')
+        profile_id = response['X-Profile-Id']
+        self.assertEqual(sorted(os.listdir(self.directory)), [f'{profile_id}.json', f'{profile_id}.prof'])
+        with open(os.path.join(self.directory, f'{profile_id}.json')) as f:
+            meta = json.load(f)
+        self.assertEqual((meta['view'], meta['status'], meta['trigger']), ('leaveapplication-list', 200, 'header'))
+
+    def test_sampled_profiles_are_kept_in_a_bounded_ring(self):
+        with self.settings(PROFILING_ENABLED=True, PROFILING_SAMPLE_RATE=1.0, PROFILING_DIR=self.directory,
+                           PROFILING_MAX_FILES=2):
+            ids = [self.get(self.student)['X-Profile-Id'] for _ in range(3)]
+            self.assertEqual(len(os.listdir(self.directory)), 4)
+            out = StringIO()
+            call_command('profiles', stdout=out)
+            listing = out.getvalue()
+            self.assertNotIn(ids[0], listing)
+            self.assertIn(f'{ids[2]}  GET /api/activity/leaves/  200', listing)
+            self.assertIn(' ms own ', listing)
+
+            out = StringIO()
+            call_command('profiles', ids[2][:22], '--sort', 'cumulative', '--limit', '5', stdout=out)
+            self.assertIn('Ordered by: cumulative time', out.getvalue())
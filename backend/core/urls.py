@@ -19,12 +19,16 @@ from django.urls import path, include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from core.metrics import metrics_view
+
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('api/accounts/', include('accounts.urls')),
     path('api/hostel/', include('hostel.urls')),
     path('api/activity/', include('activity.urls')),
     path('api/inventory/', include('inventory.urls')),
+    path('api/search/', include('search.urls')),
+    path('api/metrics', metrics_view, name='metrics'),
 ]
 
 if settings.DEBUG:
@@ -3,16 +3,16 @@ from .models import Hostel, Floor, Room, Bed
 
 @admin.register(Hostel)
 class HostelAdmin(admin.ModelAdmin):
-    list_display = ['name', 'address']
+    list_display = ['name', 'address', 'total_beds', 'occupied_beds']
 
 @admin.register(Floor)
 class FloorAdmin(admin.ModelAdmin):
-    list_display = ['number', 'hostel']
+    list_display = ['number', 'hostel', 'total_beds', 'occupied_beds']
     list_filter = ['hostel']
 
 @admin.register(Room)
 class RoomAdmin(admin.ModelAdmin):
-    list_display = ['number', 'floor', 'room_type', 'rent_amount', 'capacity', 'is_available']
+    list_display = ['number', 'floor', 'room_type', 'rent_amount', 'capacity', 'occupied_beds', 'is_available']
     list_filter = ['floor', 'room_type', 'is_available']
 
 @admin.register(Bed)
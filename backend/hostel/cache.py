@@ -0,0 +1,79 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from rest_framework.response import Response
+
+VERSION_KEY = 'hostel:structure:version'
+
+
+def _cache():
+    return caches[getattr(settings, 'HOSTEL_STRUCTURE_CACHE', 'default')]
+
+
+def get_structure_version():
+    """Millisecond timestamp of the last structure change; doubles as Last-Modified."""
+    version = _cache().get(VERSION_KEY)
+    if version is None:
+        version = int(time.time() * 1000)
+        # add() so concurrent first readers agree on one version
+        _cache().add(VERSION_KEY, version, timeout=None)
+        version = _cache().get(VERSION_KEY, version)
+    return version
+
+
+def _bump():
+    cache = _cache()
+    current = cache.get(VERSION_KEY) or 0
+    cache.set(VERSION_KEY, max(int(time.time() * 1000), current + 1), timeout=None)
+
+
+def bump_structure_version():
+    """
+    Invalidate every cached structure response. Bumped now and again on commit,
+    so a reader that cached the pre-commit state under the new version is dropped.
+    """
+    _bump()
+    transaction.on_commit(_bump)
+
+
+class CachedStructureMixin:
+    """
+    Caches list/retrieve payloads under the structure version and answers
+    conditional GETs (If-None-Match / If-Modified-Since) with 304.
+    """
+
+    def cached_response(self, request, build):
+        version = get_structure_version()
+        key = 'hostel:structure:' + hashlib.md5(f'{version}:{request.get_full_path()}'.encode()).hexdigest()
+        etag = f'"{key.rsplit(":", 1)[1]}"'
+        last_modified = version // 1000
+
+        not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+        if not_modified is not None:
+            return not_modified
+
+        cache = _cache()
+        data = cache.get(key)
+        if data is None:
+            response = build()
+            if response.status_code != 200:
+                return response
+            data = response.data
+            cache.set(key, data, getattr(settings, 'HOSTEL_STRUCTURE_CACHE_TIMEOUT', 300))
+
+        response = Response(data)
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified)
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedStructureMixin, self).list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(request, lambda: super(CachedStructureMixin, self).retrieve(request, *args, **kwargs))
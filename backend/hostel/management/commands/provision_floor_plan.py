@@ -0,0 +1,35 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from hostel.models import Hostel
+from hostel.provisioning import FloorPlanError, parse_floor_plan, provision_floor_plan
+
+class Command(BaseCommand):
+    help = 'Create floors, rooms and beds for a hostel from a JSON or CSV floor plan'
+
+    def add_arguments(self, parser):
+        parser.add_argument('hostel', help='Hostel id or name')
+        parser.add_argument('path', help='Floor plan file (.json or .csv)')
+        parser.add_argument('--format', choices=['json', 'csv'], help='Override format detection')
+
+    def handle(self, *args, **options):
+        ref = options['hostel']
+        hostel = Hostel.objects.filter(pk=ref).first() if ref.isdigit() else Hostel.objects.filter(name=ref).first()
+        if hostel is None:
+            raise CommandError(f'Hostel "{ref}" not found.')
+
+        path = Path(options['path'])
+        fmt = options['format'] or {'.json': 'json', '.csv': 'csv'}.get(path.suffix.lower())
+        try:
+            rows = parse_floor_plan(path.read_bytes(), fmt=fmt)
+        except OSError as e:
+            raise CommandError(str(e))
+        except FloorPlanError as e:
+            raise CommandError(f'Invalid floor plan: {e}')
+
+        report = provision_floor_plan(hostel, rows)
+        self.stdout.write(self.style.SUCCESS(
+            f"Provisioned {hostel.name}: {report['floors_created']} floors, {report['rooms_created']} rooms, "
+            f"{report['beds_created']} beds created ({report['rooms_skipped']} rooms already existed) "
+            f"in {report['seconds']}s ({report['rooms_per_second']} rooms/s)"
+        ))
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from hostel.models import Hostel
+from hostel.occupancy import rebuild_counters
+
+class Command(BaseCommand):
+    help = 'Rebuild room, floor and hostel occupancy counters from the bed table'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sync-beds', action='store_true',
+            help='Re-derive Bed.is_occupied from student allocations before counting',
+        )
+
+    def handle(self, *args, **options):
+        rebuild_counters(sync_beds=options['sync_beds'])
+
+        for hostel in Hostel.objects.order_by('name'):
+            self.stdout.write(f'{hostel.name}: {hostel.occupied_beds}/{hostel.total_beds} beds occupied, {hostel.free_beds} free')
+        self.stdout.write(self.style.SUCCESS('Successfully rebuilt occupancy counters.'))
@@ -0,0 +1,80 @@
+# Generated by Django 4.2.27 on 2026-10-18 08:39
+
+from django.db import migrations, models
+from django.db.models import BooleanField, Count, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def _subtotal(queryset, group_by, aggregate):
+    return Coalesce(
+        Subquery(queryset.values(group_by).annotate(n=aggregate).values('n'), output_field=IntegerField()),
+        Value(0),
+    )
+
+
+def rebuild_counters(apps, schema_editor):
+    # Frozen copy of hostel.occupancy.rebuild_counters as of this migration
+    Hostel = apps.get_model('hostel', 'Hostel')
+    Floor = apps.get_model('hostel', 'Floor')
+    Room = apps.get_model('hostel', 'Room')
+    Bed = apps.get_model('hostel', 'Bed')
+
+    beds = Bed.objects.filter(room=OuterRef('pk')).order_by()
+    Room.objects.update(
+        total_beds=_subtotal(beds, 'room', Count('pk')),
+        occupied_beds=_subtotal(beds.filter(is_occupied=True), 'room', Count('pk')),
+    )
+    Room.objects.update(is_available=ExpressionWrapper(Q(occupied_beds__lt=F('total_beds')), output_field=BooleanField()))
+
+    rooms = Room.objects.filter(floor=OuterRef('pk')).order_by()
+    Floor.objects.update(
+        total_beds=_subtotal(rooms, 'floor', Sum('total_beds')),
+        occupied_beds=_subtotal(rooms, 'floor', Sum('occupied_beds')),
+    )
+
+    floors = Floor.objects.filter(hostel=OuterRef('pk')).order_by()
+    Hostel.objects.update(
+        total_beds=_subtotal(floors, 'hostel', Sum('total_beds')),
+        occupied_beds=_subtotal(floors, 'hostel', Sum('occupied_beds')),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='floor',
+            name='occupied_beds',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='floor',
+            name='total_beds',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='hostel',
+            name='occupied_beds',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='hostel',
+            name='total_beds',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='occupied_beds',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='room',
+            name='total_beds',
+            field=models.IntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(rebuild_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,81 @@
+# Generated by Django 4.2.27 on 2026-10-18 08:40
+
+from django.db import migrations, models
+from django.db.models import IntegerField, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+
+def _duplicates(model, parent, name):
+    """[[pk, ...]] per (parent, name) that occurs more than once, lowest pk first."""
+    groups = {}
+    for pk, parent_id, value in model.objects.order_by('pk').values_list('pk', parent, name):
+        groups.setdefault((parent_id, value), []).append(pk)
+    return [pks for pks in groups.values() if len(pks) > 1]
+
+
+def _rename_duplicates(model, parent, name):
+    """Keep the oldest row's name and suffix the others ("A", "A~2", ...) so no row is lost."""
+    max_length = model._meta.get_field(name).max_length
+    for pks in _duplicates(model, parent, name):
+        keeper = model.objects.get(pk=pks[0])
+        taken = set(model.objects.filter(**{parent: getattr(keeper, parent)}).values_list(name, flat=True))
+        base, n = getattr(keeper, name), 1
+        for pk in pks[1:]:
+            while True:
+                n += 1
+                suffix = f'~{n}'
+                candidate = base[:max_length - len(suffix)] + suffix
+                if candidate not in taken:
+                    break
+            taken.add(candidate)
+            model.objects.filter(pk=pk).update(**{name: candidate})
+
+
+def dedupe_floor_plan(apps, schema_editor):
+    """
+    Existing data may break the new constraints. A repeated floor number is
+    the same floor entered twice, so its rooms move to the oldest row; rooms
+    and beds that share a number are distinct things, so the later ones are
+    renamed instead.
+    """
+    Floor = apps.get_model('hostel', 'Floor')
+    Room = apps.get_model('hostel', 'Room')
+    Bed = apps.get_model('hostel', 'Bed')
+
+    merged = []
+    for pks in _duplicates(Floor, 'hostel_id', 'number'):
+        Room.objects.filter(floor_id__in=pks[1:]).update(floor_id=pks[0])
+        Floor.objects.filter(pk__in=pks[1:]).delete()
+        merged.append(pks[0])
+    if merged:
+        rooms = Room.objects.filter(floor=OuterRef('pk')).order_by().values('floor')
+        Floor.objects.filter(pk__in=merged).update(**{
+            field: Coalesce(Subquery(rooms.annotate(n=Sum(field)).values('n'), output_field=IntegerField()), Value(0))
+            for field in ('total_beds', 'occupied_beds')
+        })
+
+    _rename_duplicates(Room, 'floor_id', 'number')
+    _rename_duplicates(Bed, 'room_id', 'identifier')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hostel', '0002_occupancy_counters'),
+    ]
+
+    operations = [
+        migrations.RunPython(dedupe_floor_plan, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='bed',
+            constraint=models.UniqueConstraint(fields=('room', 'identifier'), name='unique_bed_per_room'),
+        ),
+        migrations.AddConstraint(
+            model_name='floor',
+            constraint=models.UniqueConstraint(fields=('hostel', 'number'), name='unique_floor_per_hostel'),
+        ),
+        migrations.AddConstraint(
+            model_name='room',
+            constraint=models.UniqueConstraint(fields=('floor', 'number'), name='unique_room_per_floor'),
+        ),
+    ]
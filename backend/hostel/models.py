@@ -1,6 +1,21 @@
 from django.db import models
 
-class Hostel(models.Model):
+class OccupancyCounters(models.Model):
+    """
+    Denormalized bed counters, kept in sync by hostel.occupancy.
+    Rebuild with `manage.py rebuild_occupancy` after bulk edits.
+    """
+    total_beds = models.IntegerField(default=0, editable=False)
+    occupied_beds = models.IntegerField(default=0, editable=False)
+
+    class Meta:
+        abstract = True
+
+    @property
+    def free_beds(self):
+        return self.total_beds - self.occupied_beds
+
+class Hostel(OccupancyCounters):
     name = models.CharField(max_length=100)
     address = models.TextField()
     description = models.TextField(blank=True, null=True)
@@ -8,14 +23,19 @@ class Hostel(models.Model):
     def __str__(self):
         return self.name
 
-class Floor(models.Model):
+class Floor(OccupancyCounters):
     hostel = models.ForeignKey(Hostel, related_name='floors', on_delete=models.CASCADE)
     number = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['hostel', 'number'], name='unique_floor_per_hostel'),
+        ]
+
     def __str__(self):
         return f"{self.hostel.name} - Floor {self.number}"
 
-class Room(models.Model):
+class Room(OccupancyCounters):
     ROOM_TYPES = (
         ('single', 'Single'),
         ('double', 'Double'),
@@ -28,6 +48,11 @@ class Room(models.Model):
     capacity = models.IntegerField()
     is_available = models.BooleanField(default=True)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['floor', 'number'], name='unique_room_per_floor'),
+        ]
+
     def __str__(self):
         return f"Room {self.number} ({self.get_room_type_display()})"
 
@@ -36,5 +61,10 @@ class Bed(models.Model):
     identifier = models.CharField(max_length=10) # e.g., A, B, C
     is_occupied = models.BooleanField(default=False)
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'identifier'], name='unique_bed_per_room'),
+        ]
+
     def __str__(self):
         return f"{self.room.number} - Bed {self.identifier}"
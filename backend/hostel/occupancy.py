@@ -0,0 +1,117 @@
+from django.apps import apps as global_apps
+from django.db import transaction
+from django.db.models import BooleanField, Case, Count, ExpressionWrapper, F, IntegerField, OuterRef, Q, Subquery, Sum, Value, When
+from django.db.models.functions import Coalesce
+
+from .cache import bump_structure_version
+from .models import Hostel, Floor, Room, Bed
+
+
+def _room_available(total_delta, occupied_delta):
+    # UPDATE reads pre-update column values, so apply the deltas in the comparison
+    return ExpressionWrapper(
+        Q(occupied_beds__lt=F('total_beds') + (total_delta - occupied_delta)),
+        output_field=BooleanField(),
+    )
+
+
+def adjust_counters(room_id, total=0, occupied=0):
+    """Shift room, floor and hostel counters by the given bed deltas."""
+    if not total and not occupied:
+        return
+    changes = {
+        'total_beds': F('total_beds') + total,
+        'occupied_beds': F('occupied_beds') + occupied,
+    }
+    with transaction.atomic():
+        Room.objects.filter(pk=room_id).update(is_available=_room_available(total, occupied), **changes)
+        Floor.objects.filter(rooms=room_id).update(**changes)
+        Hostel.objects.filter(floors__rooms=room_id).update(**changes)
+        bump_structure_version()
+
+
+def _shift(field, deltas):
+    return F(field) + Case(
+        *(When(pk=pk, then=Value(delta)) for pk, delta in deltas.items()),
+        default=Value(0), output_field=IntegerField(),
+    )
+
+
+def apply_occupied_deltas(room_deltas):
+    """
+    Batch form of adjust_counters for occupied beds: {room_id: delta} is rolled
+    up to floors and hostels and written with one UPDATE per level.
+    """
+    room_deltas = {pk: d for pk, d in room_deltas.items() if d}
+    if not room_deltas:
+        return
+    floor_deltas, hostel_deltas = {}, {}
+    for room_id, floor_id, hostel_id in Room.objects.filter(pk__in=room_deltas).values_list('pk', 'floor_id', 'floor__hostel_id'):
+        floor_deltas[floor_id] = floor_deltas.get(floor_id, 0) + room_deltas[room_id]
+        hostel_deltas[hostel_id] = hostel_deltas.get(hostel_id, 0) + room_deltas[room_id]
+    with transaction.atomic():
+        Room.objects.filter(pk__in=room_deltas).update(occupied_beds=_shift('occupied_beds', room_deltas))
+        Room.objects.filter(pk__in=room_deltas).update(is_available=_room_available(0, 0))
+        Floor.objects.filter(pk__in=floor_deltas).update(occupied_beds=_shift('occupied_beds', floor_deltas))
+        Hostel.objects.filter(pk__in=hostel_deltas).update(occupied_beds=_shift('occupied_beds', hostel_deltas))
+        bump_structure_version()
+
+
+def set_bed_occupied(bed_id, occupied):
+    """Flip Bed.is_occupied; counters only move if the flag actually changed."""
+    with transaction.atomic():
+        room_id = Bed.objects.filter(pk=bed_id).values_list('room_id', flat=True).first()
+        changed = Bed.objects.filter(pk=bed_id, is_occupied=not occupied).update(is_occupied=occupied)
+        if changed:
+            adjust_counters(room_id, occupied=1 if occupied else -1)
+    return bool(changed)
+
+
+def _count(queryset, group_by):
+    return Coalesce(
+        Subquery(queryset.values(group_by).annotate(n=Count('pk')).values('n'), output_field=IntegerField()),
+        Value(0),
+    )
+
+
+def _sum(queryset, group_by, field):
+    return Coalesce(
+        Subquery(queryset.values(group_by).annotate(n=Sum(field)).values('n'), output_field=IntegerField()),
+        Value(0),
+    )
+
+
+def rebuild_counters(sync_beds=False, apps=global_apps):
+    """
+    Recompute every counter from the bed table in a handful of UPDATEs.
+    With sync_beds, Bed.is_occupied is first re-derived from student allocations.
+    """
+    Hostel = apps.get_model('hostel', 'Hostel')
+    Floor = apps.get_model('hostel', 'Floor')
+    Room = apps.get_model('hostel', 'Room')
+    Bed = apps.get_model('hostel', 'Bed')
+
+    with transaction.atomic():
+        if sync_beds:
+            Bed.objects.filter(occupied_by__isnull=False).update(is_occupied=True)
+            Bed.objects.filter(occupied_by__isnull=True).update(is_occupied=False)
+
+        beds = Bed.objects.filter(room=OuterRef('pk')).order_by()
+        Room.objects.update(
+            total_beds=_count(beds, 'room'),
+            occupied_beds=_count(beds.filter(is_occupied=True), 'room'),
+        )
+        Room.objects.update(is_available=_room_available(0, 0))
+
+        rooms = Room.objects.filter(floor=OuterRef('pk')).order_by()
+        Floor.objects.update(
+            total_beds=_sum(rooms, 'floor', 'total_beds'),
+            occupied_beds=_sum(rooms, 'floor', 'occupied_beds'),
+        )
+
+        floors = Floor.objects.filter(hostel=OuterRef('pk')).order_by()
+        Hostel.objects.update(
+            total_beds=_sum(floors, 'hostel', 'total_beds'),
+            occupied_beds=_sum(floors, 'hostel', 'occupied_beds'),
+        )
+        bump_structure_version()
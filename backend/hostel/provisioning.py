@@ -0,0 +1,157 @@
+import csv
+import io
+import json
+import time
+from decimal import Decimal, InvalidOperation
+
+from django.db import transaction
+from django.db.models import F
+
+from .cache import bump_structure_version
+from .models import Hostel, Floor, Room, Bed
+
+ROOM_TYPES = {key for key, _ in Room.ROOM_TYPES}
+
+# Accepted column / key names for each floor-plan field
+COLUMN_ALIASES = {
+    'floor': ('floor', 'floor_number'),
+    'room': ('room', 'number', 'room_number'),
+    'room_type': ('room_type', 'type'),
+    'rent_amount': ('rent_amount', 'rent'),
+    'capacity': ('capacity', 'beds'),
+}
+
+
+class FloorPlanError(ValueError):
+    pass
+
+
+def bed_identifiers(capacity):
+    return [chr(65 + i) for i in range(capacity)]  # A, B, C...
+
+
+def _pick(row, field):
+    for key in COLUMN_ALIASES[field]:
+        value = row.get(key)
+        if value not in (None, ''):
+            return value
+    raise FloorPlanError(f"missing '{field}'")
+
+
+def parse_row(row):
+    try:
+        floor = int(_pick(row, 'floor'))
+        number = str(_pick(row, 'room')).strip()
+        room_type = str(_pick(row, 'room_type')).strip().lower()
+        rent_amount = Decimal(str(_pick(row, 'rent_amount')))
+        capacity = int(_pick(row, 'capacity'))
+    except (TypeError, ValueError, InvalidOperation) as e:
+        raise FloorPlanError(str(e) or 'invalid value')
+    if room_type not in ROOM_TYPES:
+        raise FloorPlanError(f"unknown room type '{room_type}'")
+    if not 0 < capacity <= 26:
+        raise FloorPlanError('capacity must be between 1 and 26')
+    if len(number) > Room._meta.get_field('number').max_length:
+        raise FloorPlanError(f"room number '{number}' is too long")
+    return {'floor': floor, 'number': number, 'room_type': room_type,
+            'rent_amount': rent_amount, 'capacity': capacity}
+
+
+def parse_floor_plan(data, fmt=None):
+    """
+    Turn a JSON list (or {"rooms": [...]}) or CSV text into validated room rows.
+    Errors are collected per row so a bad file is reported in one go.
+    """
+    if isinstance(data, bytes):
+        data = data.decode('utf-8-sig')
+    if isinstance(data, str):
+        if fmt is None:
+            fmt = 'json' if data.lstrip()[:1] in ('[', '{') else 'csv'
+        if fmt == 'json':
+            try:
+                data = json.loads(data)
+            except json.JSONDecodeError as e:
+                raise FloorPlanError(f'Invalid JSON: {e}')
+        else:
+            data = list(csv.DictReader(io.StringIO(data)))
+            data = [{(k or '').strip().lower(): (v or '').strip() for k, v in row.items()} for row in data]
+    if isinstance(data, dict):
+        data = data.get('rooms')
+    if not isinstance(data, list):
+        raise FloorPlanError('Floor plan must be a list of rooms.')
+
+    rows, errors, seen = [], [], set()
+    for line, row in enumerate(data, start=1):
+        try:
+            if not isinstance(row, dict):
+                raise FloorPlanError('expected an object')
+            parsed = parse_row(row)
+        except FloorPlanError as e:
+            errors.append(f'row {line}: {e}')
+            continue
+        key = (parsed['floor'], parsed['number'])
+        if key in seen:
+            errors.append(f"row {line}: duplicate room {parsed['number']} on floor {parsed['floor']}")
+            continue
+        seen.add(key)
+        rows.append(parsed)
+    if errors:
+        raise FloorPlanError('; '.join(errors))
+    return rows
+
+
+def provision_floor_plan(hostel, rows):
+    """
+    Create the floors, rooms and beds in `rows` that don't exist yet, using one
+    bulk_create per level inside a single transaction. Existing rooms are left
+    untouched, so re-running the same plan is a no-op.
+    """
+    started = time.perf_counter()
+    with transaction.atomic():
+        # Lock the hostel row so concurrent imports of the same plan serialize
+        Hostel.objects.select_for_update().filter(pk=hostel.pk).first()
+
+        floors = {f.number: f for f in Floor.objects.filter(hostel=hostel)}
+        new_floors = Floor.objects.bulk_create(
+            Floor(hostel=hostel, number=n) for n in sorted({r['floor'] for r in rows} - set(floors))
+        )
+        floors.update((f.number, f) for f in new_floors)
+
+        existing_rooms = set(
+            Room.objects.filter(floor__hostel=hostel).values_list('floor__number', 'number')
+        )
+        pending = [r for r in rows if (r['floor'], r['number']) not in existing_rooms]
+        new_rooms = Room.objects.bulk_create(
+            Room(
+                floor=floors[r['floor']], number=r['number'], room_type=r['room_type'],
+                rent_amount=r['rent_amount'], capacity=r['capacity'],
+                total_beds=r['capacity'], is_available=True,
+            )
+            for r in pending
+        )
+        new_beds = Bed.objects.bulk_create(
+            (Bed(room=room, identifier=identifier)
+             for room in new_rooms for identifier in bed_identifiers(room.capacity)),
+            batch_size=2000,
+        )
+
+        # bulk_create skips the counter signals, so roll the new beds up by hand
+        floor_beds = {}
+        for room in new_rooms:
+            floor_beds[room.floor_id] = floor_beds.get(room.floor_id, 0) + room.total_beds
+        for floor_id, beds in floor_beds.items():
+            Floor.objects.filter(pk=floor_id).update(total_beds=F('total_beds') + beds)
+        if new_beds:
+            Hostel.objects.filter(pk=hostel.pk).update(total_beds=F('total_beds') + len(new_beds))
+        if new_floors or new_rooms:
+            bump_structure_version()
+
+    elapsed = time.perf_counter() - started
+    return {
+        'floors_created': len(new_floors),
+        'rooms_created': len(new_rooms),
+        'rooms_skipped': len(rows) - len(new_rooms),
+        'beds_created': len(new_beds),
+        'seconds': round(elapsed, 3),
+        'rooms_per_second': round(len(rows) / elapsed, 1) if elapsed else None,
+    }
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from .models import Hostel, Floor, Room, Bed
+from core.fieldsets import SparseFieldsetMixin
 
-class BedSerializer(serializers.ModelSerializer):
+class BedSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     room_number = serializers.CharField(source='room.number', read_only=True)
     room_type = serializers.CharField(source='room.get_room_type_display', read_only=True)
     floor_number = serializers.IntegerField(source='room.floor.number', read_only=True)
@@ -13,13 +14,15 @@ class BedSerializer(serializers.ModelSerializer):
 
 class RoomSerializer(serializers.ModelSerializer):
     beds = BedSerializer(many=True, read_only=True)
-    
+    free_beds = serializers.IntegerField(read_only=True)
+
     class Meta:
         model = Room
         fields = '__all__'
 
 class FloorSerializer(serializers.ModelSerializer):
     rooms = RoomSerializer(many=True, read_only=True)
+    free_beds = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Floor
@@ -27,7 +30,40 @@ class FloorSerializer(serializers.ModelSerializer):
 
 class HostelSerializer(serializers.ModelSerializer):
     floors = FloorSerializer(many=True, read_only=True)
+    free_beds = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Hostel
         fields = '__all__'
+
+# Compact "tree" representation: parent fields are implied by nesting,
+# so beds and rooms don't repeat them.
+
+class BedTreeSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Bed
+        fields = ['id', 'identifier', 'is_occupied']
+
+class RoomTreeSerializer(serializers.ModelSerializer):
+    beds = BedTreeSerializer(many=True, read_only=True)
+    free_beds = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Room
+        fields = ['id', 'number', 'room_type', 'rent_amount', 'capacity', 'is_available', 'total_beds', 'occupied_beds', 'free_beds', 'beds']
+
+class FloorTreeSerializer(serializers.ModelSerializer):
+    rooms = RoomTreeSerializer(many=True, read_only=True)
+    free_beds = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Floor
+        fields = ['id', 'number', 'total_beds', 'occupied_beds', 'free_beds', 'rooms']
+
+class HostelTreeSerializer(serializers.ModelSerializer):
+    floors = FloorTreeSerializer(many=True, read_only=True)
+    free_beds = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Hostel
+        fields = ['id', 'name', 'address', 'description', 'total_beds', 'occupied_beds', 'free_beds', 'floors']
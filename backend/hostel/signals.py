@@ -0,0 +1,54 @@
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
+from django.dispatch import receiver
+
+from .cache import bump_structure_version
+from .models import Hostel, Floor, Room, Bed
+from .occupancy import adjust_counters
+
+
+@receiver(post_save, sender=Hostel)
+@receiver(post_save, sender=Floor)
+@receiver(post_save, sender=Room)
+@receiver(post_save, sender=Bed)
+@receiver(post_delete, sender=Hostel)
+@receiver(post_delete, sender=Floor)
+@receiver(post_delete, sender=Room)
+@receiver(post_delete, sender=Bed)
+def invalidate_structure_cache(sender, raw=False, **kwargs):
+    if not raw:
+        bump_structure_version()
+
+
+@receiver(pre_save, sender=Bed)
+def remember_bed_state(sender, instance, raw=False, **kwargs):
+    instance._previous_state = None
+    if instance.pk and not raw:
+        instance._previous_state = Bed.objects.filter(pk=instance.pk).values('room_id', 'is_occupied').first()
+
+
+@receiver(post_save, sender=Bed)
+def update_counters_on_bed_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    previous = getattr(instance, '_previous_state', None)
+    if created or previous is None:
+        adjust_counters(instance.room_id, total=1, occupied=int(instance.is_occupied))
+    elif previous['room_id'] != instance.room_id:
+        adjust_counters(previous['room_id'], total=-1, occupied=-int(previous['is_occupied']))
+        adjust_counters(instance.room_id, total=1, occupied=int(instance.is_occupied))
+    elif previous['is_occupied'] != instance.is_occupied:
+        adjust_counters(instance.room_id, occupied=1 if instance.is_occupied else -1)
+
+
+@receiver(pre_delete, sender=Bed)
+def refresh_bed_state(sender, instance, **kwargs):
+    # The instance being deleted may be stale if the flag was flipped with update()
+    instance._previous_state = Bed.objects.filter(pk=instance.pk).values('room_id', 'is_occupied').first()
+
+
+@receiver(post_delete, sender=Bed)
+def update_counters_on_bed_delete(sender, instance, **kwargs):
+    previous = getattr(instance, '_previous_state', None) or {
+        'room_id': instance.room_id, 'is_occupied': instance.is_occupied,
+    }
+    adjust_counters(previous['room_id'], total=-1, occupied=-int(previous['is_occupied']))
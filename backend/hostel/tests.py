@@ -1,3 +1,193 @@
-from django.test import TestCase
+from decimal import Decimal
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from .models import Hostel, Floor, Room, Bed
+
+
+def build_campus(hostels=2, floors=10, rooms=125, beds=4):
+    """Bulk-create hostels * floors * rooms * beds beds (10k by default)."""
+    hostel_objs = Hostel.objects.bulk_create(
+        Hostel(name=f"Hostel {h}", address="Campus") for h in range(hostels)
+    )
+    floor_objs = Floor.objects.bulk_create(
+        Floor(hostel=h, number=f) for h in hostel_objs for f in range(1, floors + 1)
+    )
+    room_objs = Room.objects.bulk_create(
+        Room(floor=f, number=f"{f.number}{r:02d}", room_type='double',
+             rent_amount=Decimal('5000.00'), capacity=beds)
+        for f in floor_objs for r in range(rooms)
+    )
+    Bed.objects.bulk_create(
+        Bed(room=r, identifier=chr(65 + b)) for r in room_objs for b in range(beds)
+    )
+
+
+# Large trees on purpose: keep the slow-request log out of the test output
+@override_settings(SLOW_REQUEST_THRESHOLD_MS=60 * 1000)
+class HostelTreeQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        build_campus()
+        cls.manager = User.objects.create_user(username='manager', password='pass', role='manager')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.manager)
+
+    def test_hostel_list_queries_are_constant(self):
+        self.assertEqual(Bed.objects.count(), 10000)
+        # hostels, floors, rooms, beds
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/hostel/hostels/')
+        self.assertEqual(response.status_code, 200)
+        bed = response.data[0]['floors'][0]['rooms'][0]['beds'][0]
+        self.assertEqual(bed['hostel_name'], 'Hostel 0')
+        self.assertEqual(bed['floor_number'], 1)
+
+    def test_hostel_tree_is_compact(self):
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/hostel/hostels/', {'tree': 'true'})
+        self.assertEqual(response.status_code, 200)
+        bed = response.data[0]['floors'][0]['rooms'][0]['beds'][0]
+        self.assertEqual(set(bed), {'id', 'identifier', 'is_occupied'})
+
+    def test_floor_and_room_lists_are_constant(self):
+        # floors (joined with hostel), rooms, beds
+        with self.assertNumQueries(3):
+            self.client.get('/api/hostel/floors/')
+        # rooms (joined with floor and hostel), beds
+        with self.assertNumQueries(2):
+            self.client.get('/api/hostel/rooms/', {'tree': 'true'})
+
+    def test_bed_list_joins_parents(self):
+        with self.assertNumQueries(1):
+            self.client.get('/api/hostel/beds/')
+
+
+class OccupancyCounterTests(TestCase):
+    def setUp(self):
+        self.hostel = Hostel.objects.create(name="Hostel Alpha", address="Campus")
+        self.floor = Floor.objects.create(hostel=self.hostel, number=1)
+        self.room = Room.objects.create(floor=self.floor, number="101", room_type='double',
+                                        rent_amount=Decimal('4000.00'), capacity=2)
+        self.bed_a = Bed.objects.create(room=self.room, identifier='A')
+        self.bed_b = Bed.objects.create(room=self.room, identifier='B')
+
+    def assertCounters(self, obj, total, occupied):
+        obj.refresh_from_db()
+        self.assertEqual((obj.total_beds, obj.occupied_beds, obj.free_beds), (total, occupied, total - occupied))
+
+    def test_allocation_moves_counters(self):
+        from activity.models import StudentProfile
+
+        user = User.objects.create_user(username='student', password='pass')
+        profile = StudentProfile.objects.create(user=user, current_bed=self.bed_a)
+        for obj in (self.room, self.floor, self.hostel):
+            self.assertCounters(obj, 2, 1)
+
+        profile.current_bed = self.bed_b
+        profile.save()
+        self.bed_a.refresh_from_db()
+        self.assertFalse(self.bed_a.is_occupied)
+        self.assertCounters(self.hostel, 2, 1)
+
+        other = StudentProfile.objects.create(user=User.objects.create_user(username='other'), current_bed=self.bed_a)
+        self.assertCounters(self.room, 2, 2)
+        self.assertFalse(self.room.is_available)
+
+        other.delete()
+        self.bed_b.delete()
+        self.assertCounters(self.room, 1, 0)
+        self.assertTrue(self.room.is_available)
+        self.assertCounters(self.hostel, 1, 0)
+
+    def test_rebuild_command(self):
+        from django.core.management import call_command
+
+        Bed.objects.filter(pk=self.bed_a.pk).update(is_occupied=True)
+        Hostel.objects.update(total_beds=0, occupied_beds=0)
+        call_command('rebuild_occupancy', stdout=StringIO())
+        for obj in (self.room, self.floor, self.hostel):
+            self.assertCounters(obj, 2, 1)
+
+
+class FloorPlanProvisioningTests(TestCase):
+    def setUp(self):
+        self.hostel = Hostel.objects.create(name="Block C", address="Campus")
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='manager', role='manager'))
+
+    def test_bulk_provision_is_idempotent(self):
+        plan = [
+            {'floor': f, 'room': f"{f}{r:02d}", 'room_type': 'triple', 'rent_amount': '3500', 'capacity': 3}
+            for f in range(1, 7) for r in range(100)
+        ]
+        url = f'/api/hostel/hostels/{self.hostel.pk}/provision/'
+        response = self.client.post(url, plan, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['rooms_created'], 600)
+        self.assertEqual(response.data['beds_created'], 1800)
+
+        response = self.client.post(url, plan, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rooms_skipped'], 600)
+        self.assertEqual(Bed.objects.filter(room__floor__hostel=self.hostel).count(), 1800)
+
+        self.hostel.refresh_from_db()
+        self.assertEqual(self.hostel.total_beds, 1800)
+        self.assertEqual(self.hostel.floors.get(number=1).total_beds, 300)
+
+    def test_csv_upload_and_validation(self):
+        from django.core.files.uploadedfile import SimpleUploadedFile
+
+        csv_text = b"floor,room,type,rent,capacity\n1,101,single,6000,1\n1,102,double,4500,2\n"
+        url = f'/api/hostel/hostels/{self.hostel.pk}/provision/'
+        response = self.client.post(url, {'file': SimpleUploadedFile('plan.csv', csv_text)})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['beds_created'], 3)
+
+        response = self.client.post(url, [{'floor': 1, 'room': '103', 'room_type': 'suite', 'rent': 1, 'capacity': 1}], format='json')
+        self.assertEqual(response.status_code, 400)
+
+
+class StructureCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.hostel = Hostel.objects.create(name="Hostel Alpha", address="Campus")
+        self.floor = Floor.objects.create(hostel=self.hostel, number=1)
+        self.client = APIClient()
+        self.client.force_authenticate(User.objects.create_user(username='manager', role='manager'))
+
+    def test_cached_list_and_conditional_get(self):
+        first = self.client.get('/api/hostel/hostels/')
+        etag = first['ETag']
+        self.assertTrue(first.has_header('Last-Modified'))
+        with self.assertNumQueries(0):
+            again = self.client.get('/api/hostel/hostels/')
+        self.assertEqual(again.data, first.data)
+
+        with self.assertNumQueries(0):
+            not_modified = self.client.get('/api/hostel/hostels/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(not_modified.status_code, 304)
+
+        # tree and full representations are cached separately
+        self.assertNotEqual(self.client.get('/api/hostel/hostels/', {'tree': 'true'})['ETag'], etag)
+
+    def test_writes_invalidate(self):
+        etag = self.client.get('/api/hostel/rooms/')['ETag']
+        room = Room.objects.create(floor=self.floor, number="101", room_type='single',
+                                   rent_amount=Decimal('5000.00'), capacity=1)
+        response = self.client.get('/api/hostel/rooms/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+
+        etag = response['ETag']
+        Bed.objects.create(room=room, identifier='A')
+        response = self.client.get('/api/hostel/rooms/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.data[0]['total_beds'], 1)
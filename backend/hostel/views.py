@@ -1,6 +1,14 @@
-from rest_framework import viewsets, permissions
+from rest_framework import viewsets, permissions, status, decorators
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from .cache import CachedStructureMixin
 from .models import Hostel, Floor, Room, Bed
-from .serializers import HostelSerializer, FloorSerializer, RoomSerializer, BedSerializer
+from .occupancy import adjust_counters
+from .provisioning import FloorPlanError, bed_identifiers, parse_floor_plan, provision_floor_plan
+from .serializers import (
+    HostelSerializer, FloorSerializer, RoomSerializer, BedSerializer,
+    HostelTreeSerializer, FloorTreeSerializer, RoomTreeSerializer,
+)
 
 class IsManagerOrReadOnly(permissions.BasePermission):
     def has_permission(self, request, view):
@@ -8,29 +16,75 @@ class IsManagerOrReadOnly(permissions.BasePermission):
             return True
         return request.user.is_authenticated and request.user.role == 'manager'
 
-class HostelViewSet(viewsets.ModelViewSet):
-    queryset = Hostel.objects.all()
+class TreeReadMixin:
+    """
+    Serves the compact tree representation on safe requests with ?tree=true.
+    Querysets are prefetched top-down, so each level is one query and the
+    bed -> room -> floor -> hostel back-references are resolved in memory.
+    """
+    tree_serializer_class = None
+
+    def is_tree_request(self):
+        return (
+            self.request.method in permissions.SAFE_METHODS
+            and self.request.query_params.get('tree', '').lower() in ('1', 'true', 'yes')
+        )
+
+    def get_serializer_class(self):
+        if self.tree_serializer_class is not None and self.is_tree_request():
+            return self.tree_serializer_class
+        return super().get_serializer_class()
+
+class HostelViewSet(CachedStructureMixin, TreeReadMixin, viewsets.ModelViewSet):
+    queryset = Hostel.objects.prefetch_related('floors__rooms__beds')
     serializer_class = HostelSerializer
+    tree_serializer_class = HostelTreeSerializer
     permission_classes = [IsManagerOrReadOnly]
+    cursor_ordering = 'id'
+
+    @decorators.action(detail=True, methods=['post'])
+    def provision(self, request, pk=None):
+        """
+        Bulk-create floors, rooms and beds from a floor plan: a JSON list of
+        {floor, room, room_type, rent_amount, capacity} (or {"rooms": [...]}),
+        or a CSV upload in `file` with the same columns.
+        """
+        hostel = self.get_object()
+        upload = request.FILES.get('file')
+        try:
+            if upload is not None:
+                rows = parse_floor_plan(upload.read())
+            else:
+                rows = parse_floor_plan(request.data)
+        except FloorPlanError as e:
+            raise ValidationError({'detail': str(e)})
+        report = provision_floor_plan(hostel, rows)
+        created = report['rooms_created'] or report['floors_created']
+        return Response(report, status=status.HTTP_201_CREATED if created else status.HTTP_200_OK)
 
-class FloorViewSet(viewsets.ModelViewSet):
-    queryset = Floor.objects.all()
+class FloorViewSet(TreeReadMixin, viewsets.ModelViewSet):
+    queryset = Floor.objects.select_related('hostel').prefetch_related('rooms__beds')
     serializer_class = FloorSerializer
+    tree_serializer_class = FloorTreeSerializer
     permission_classes = [IsManagerOrReadOnly]
+    cursor_ordering = 'id'
 
-class RoomViewSet(viewsets.ModelViewSet):
-    queryset = Room.objects.all()
+class RoomViewSet(CachedStructureMixin, TreeReadMixin, viewsets.ModelViewSet):
+    queryset = Room.objects.select_related('floor__hostel').prefetch_related('beds')
     serializer_class = RoomSerializer
+    tree_serializer_class = RoomTreeSerializer
     permission_classes = [IsManagerOrReadOnly]
+    cursor_ordering = 'id'
 
     def perform_create(self, serializer):
         room = serializer.save()
         # Automatically create beds based on capacity
-        for i in range(room.capacity):
-            identifier = chr(65 + i) # A, B, C...
-            Bed.objects.create(room=room, identifier=identifier)
+        Bed.objects.bulk_create(Bed(room=room, identifier=identifier) for identifier in bed_identifiers(room.capacity))
+        adjust_counters(room.id, total=room.capacity)
+        room.refresh_from_db(fields=['total_beds', 'occupied_beds', 'is_available'])
 
 class BedViewSet(viewsets.ModelViewSet):
-    queryset = Bed.objects.all()
+    queryset = Bed.objects.select_related('room__floor__hostel')
     serializer_class = BedSerializer
     permission_classes = [IsManagerOrReadOnly]
+    cursor_ordering = 'id'
@@ -0,0 +1,190 @@
+import re
+
+from django.apps import apps as global_apps
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.db.models.expressions import RawSQL
+
+from .models import SearchDocument
+
+FTS_TABLE = 'search_fts'
+# Generated tsvector column on PostgreSQL
+PG_VECTOR_COLUMN = 'search_vector'
+# bm25 column weights: a hit in the title counts ten times one in the body
+TITLE_WEIGHT, BODY_WEIGHT = 10.0, 1.0
+REBUILD_CHUNK = 2000
+MAX_TERMS = 8
+
+
+def _join(*parts):
+    return ' '.join(str(p) for p in parts if p)
+
+
+def _user(user):
+    return {
+        'title': _join(user.first_name, user.last_name) or user.username,
+        'body': _join(user.username, user.email, user.phone),
+        'category': user.role, 'owner_id': None,
+    }
+
+
+def _complaint(complaint):
+    return {
+        'title': complaint.title,
+        'body': _join(complaint.description, complaint.remarks),
+        'category': complaint.status, 'owner_id': complaint.assigned_to_id,
+    }
+
+
+def _inventory(item):
+    return {
+        'title': item.item_name,
+        'body': item.description or '',
+        'category': item.condition, 'owner_id': None,
+    }
+
+
+# kind -> (model label, document builder)
+SOURCES = {
+    'user': (settings.AUTH_USER_MODEL, _user),
+    'complaint': ('activity.Complaint', _complaint),
+    'inventory': ('inventory.Inventory', _inventory),
+}
+
+
+def kind_for(model):
+    return next((kind for kind, (label, _) in SOURCES.items() if label == model._meta.label), None)
+
+
+def index_object(kind, obj):
+    SearchDocument.objects.update_or_create(kind=kind, object_id=obj.pk, defaults=SOURCES[kind][1](obj))
+
+
+def remove_object(kind, pk):
+    SearchDocument.objects.filter(kind=kind, object_id=pk).delete()
+
+
+def index_objects(kind, pks):
+    """Refresh the documents for these ids after a bulk UPDATE bypassed the signals."""
+    label, build = SOURCES[kind]
+    objects = {obj.pk: obj for obj in global_apps.get_model(label).objects.filter(pk__in=pks)}
+    with transaction.atomic():
+        existing = {d.object_id: d for d in SearchDocument.objects.filter(kind=kind, object_id__in=objects)}
+        changed = []
+        for pk, obj in objects.items():
+            if pk not in existing:
+                SearchDocument.objects.create(kind=kind, object_id=pk, **build(obj))
+                continue
+            document = existing[pk]
+            for field, value in build(obj).items():
+                setattr(document, field, value)
+            changed.append(document)
+        # bulk_update issues UPDATEs, so the FTS triggers still fire
+        SearchDocument.objects.bulk_update(changed, ['title', 'body', 'category', 'owner_id'], batch_size=500)
+
+
+def rebuild(kinds=None, apps=global_apps):
+    """Recreate the documents (and the FTS index) from the source tables. Returns counts per kind."""
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    counts = {}
+    with transaction.atomic():
+        for kind in kinds or SOURCES:
+            label, build = SOURCES[kind]
+            SearchDocument.objects.filter(kind=kind).delete()
+            batch, counts[kind] = [], 0
+            for obj in apps.get_model(label).objects.order_by('pk').iterator(chunk_size=REBUILD_CHUNK):
+                batch.append(SearchDocument(kind=kind, object_id=obj.pk, **build(obj)))
+                if len(batch) >= REBUILD_CHUNK:
+                    SearchDocument.objects.bulk_create(batch)
+                    counts[kind] += len(batch)
+                    batch = []
+            SearchDocument.objects.bulk_create(batch)
+            counts[kind] += len(batch)
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('rebuild')")
+                cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES('optimize')")
+    return counts
+
+
+def terms(query):
+    """Words of the query, lowercased; anything that could be FTS syntax is dropped."""
+    return re.findall(r'\w+', query.lower())[:MAX_TERMS]
+
+
+def search(query, kinds=None, owner_id=None, limit=20):
+    """
+    Ranked prefix search: every term must match the start of a word in the
+    title or body ("ani sha" finds "Anita Sharma"). Returns SearchDocuments
+    with a `score` (higher is better).
+    """
+    words = terms(query)
+    if not words:
+        return []
+    if connection.vendor == 'sqlite':
+        return _search_fts5(words, kinds, owner_id, limit)
+    return _search_fallback(words, kinds, owner_id, limit)
+
+
+def _search_fts5(words, kinds, owner_id, limit):
+    match = ' '.join(f'"{word}"*' for word in words)
+    sql = [
+        f'SELECT d.id, d.kind, d.object_id, d.title, d.category, -bm25({FTS_TABLE}, %s, %s) AS score',
+        f'FROM {FTS_TABLE} JOIN {SearchDocument._meta.db_table} d ON d.id = {FTS_TABLE}.rowid',
+        f'WHERE {FTS_TABLE} MATCH %s',
+    ]
+    params = [TITLE_WEIGHT, BODY_WEIGHT, match]
+    if kinds:
+        sql.append(f"AND d.kind IN ({', '.join(['%s'] * len(kinds))})")
+        params += list(kinds)
+    if owner_id is not None:
+        sql.append('AND d.owner_id = %s')
+        params.append(owner_id)
+    sql.append(f'ORDER BY bm25({FTS_TABLE}, %s, %s) LIMIT %s')
+    params += [TITLE_WEIGHT, BODY_WEIGHT, limit]
+    with connection.cursor() as cursor:
+        cursor.execute('\n'.join(sql), params)
+        rows = cursor.fetchall()
+    results = []
+    for pk, kind, object_id, title, category, score in rows:
+        document = SearchDocument(pk=pk, kind=kind, object_id=object_id, title=title, category=category)
+        document.score = round(score, 4)
+        results.append(document)
+    return results
+
+
+def _search_postgres(documents, words, limit):
+    """Prefix tsquery against the stored, GIN-indexed search_vector column (migration 0003)."""
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVectorField
+
+    vector = RawSQL(f'{SearchDocument._meta.db_table}.{PG_VECTOR_COLUMN}', (), output_field=SearchVectorField())
+    query = SearchQuery(' & '.join(f'{word}:*' for word in words), search_type='raw', config='simple')
+    return list(
+        documents.annotate(document=vector).filter(document=query)
+        .annotate(score=SearchRank(F('document'), query)).order_by('-score')[:limit]
+    )
+
+
+def _search_fallback(words, kinds, owner_id, limit):
+    """
+    PostgreSQL full-text search, else word-prefix regex matching with title
+    hits first. The regex path scans the table and is only meant for
+    backends without a full-text index (neither SQLite nor PostgreSQL).
+    """
+    documents = SearchDocument.objects.all()
+    if kinds:
+        documents = documents.filter(kind__in=kinds)
+    if owner_id is not None:
+        documents = documents.filter(owner_id=owner_id)
+    if connection.vendor == 'postgresql':
+        return _search_postgres(documents, words, limit)
+
+    for word in words:
+        pattern = rf'(^|\W){re.escape(word)}'
+        documents = documents.filter(Q(title__iregex=pattern) | Q(body__iregex=pattern))
+    results = list(documents.order_by('title')[:limit * 5])
+    for document in results:
+        document.score = float(sum(word in document.title.lower() for word in words))
+    results.sort(key=lambda d: -d.score)
+    return results[:limit]
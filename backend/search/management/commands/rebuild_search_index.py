@@ -0,0 +1,16 @@
+import time
+
+from django.core.management.base import BaseCommand
+from search.index import SOURCES, rebuild
+
+class Command(BaseCommand):
+    help = 'Rebuild the search documents and full-text index from users, complaints and inventory'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--kind', action='append', choices=list(SOURCES), help='Only rebuild this kind (repeatable)')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        counts = rebuild(kinds=options['kind'])
+        summary = ', '.join(f'{count} {kind}' for kind, count in counts.items())
+        self.stdout.write(self.style.SUCCESS(f'Indexed {summary} ({time.perf_counter() - started:.2f}s)'))
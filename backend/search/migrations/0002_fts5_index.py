@@ -0,0 +1,83 @@
+from django.db import migrations
+
+FTS_SQL = [
+    "CREATE VIRTUAL TABLE search_fts USING fts5("
+    "title, body, content='search_searchdocument', content_rowid='id', "
+    "tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+    "CREATE TRIGGER search_fts_ai AFTER INSERT ON search_searchdocument BEGIN "
+    "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+    "CREATE TRIGGER search_fts_ad AFTER DELETE ON search_searchdocument BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); END",
+    "CREATE TRIGGER search_fts_au AFTER UPDATE OF title, body ON search_searchdocument BEGIN "
+    "INSERT INTO search_fts(search_fts, rowid, title, body) VALUES ('delete', old.id, old.title, old.body); "
+    "INSERT INTO search_fts(rowid, title, body) VALUES (new.id, new.title, new.body); END",
+]
+DROP_SQL = [
+    "DROP TRIGGER IF EXISTS search_fts_au",
+    "DROP TRIGGER IF EXISTS search_fts_ad",
+    "DROP TRIGGER IF EXISTS search_fts_ai",
+    "DROP TABLE IF EXISTS search_fts",
+]
+
+
+def _join(*parts):
+    return ' '.join(str(p) for p in parts if p)
+
+
+# Frozen copies of the search.index document builders as of this migration:
+# kind -> (app label, model name, builder)
+SOURCES = {
+    'user': ('accounts', 'User', lambda u: {
+        'title': _join(u.first_name, u.last_name) or u.username,
+        'body': _join(u.username, u.email, u.phone), 'category': u.role, 'owner_id': None,
+    }),
+    'complaint': ('activity', 'Complaint', lambda c: {
+        'title': c.title, 'body': _join(c.description, c.remarks),
+        'category': c.status, 'owner_id': c.assigned_to_id,
+    }),
+    'inventory': ('inventory', 'Inventory', lambda i: {
+        'title': i.item_name, 'body': i.description or '', 'category': i.condition, 'owner_id': None,
+    }),
+}
+
+
+def index_documents(apps):
+    SearchDocument = apps.get_model('search', 'SearchDocument')
+    for kind, (app_label, model_name, build) in SOURCES.items():
+        SearchDocument.objects.filter(kind=kind).delete()
+        batch = []
+        for obj in apps.get_model(app_label, model_name).objects.order_by('pk').iterator(chunk_size=2000):
+            batch.append(SearchDocument(kind=kind, object_id=obj.pk, **build(obj)))
+            if len(batch) >= 2000:
+                SearchDocument.objects.bulk_create(batch)
+                batch = []
+        SearchDocument.objects.bulk_create(batch)
+
+
+def create_fts(apps, schema_editor):
+    # FTS5 is SQLite only; search/index.py has the fallback for other backends
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in FTS_SQL:
+            schema_editor.execute(statement)
+    # The triggers index every inserted document
+    index_documents(apps)
+
+
+def drop_fts(apps, schema_editor):
+    if schema_editor.connection.vendor == 'sqlite':
+        for statement in DROP_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_search_document'),
+        ('activity', '0010_leave_interval_index'),
+        ('inventory', '0001_initial'),
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_fts, drop_fts),
+    ]
@@ -0,0 +1,37 @@
+from django.db import migrations
+
+# Stored, weighted tsvector kept in step by PostgreSQL itself (12+), so
+# queries hit the GIN index instead of running to_tsvector per row
+VECTOR_SQL = [
+    "ALTER TABLE search_searchdocument ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ("
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(body, '')), 'B')) STORED",
+    "CREATE INDEX search_document_vector_gin ON search_searchdocument USING GIN (search_vector)",
+]
+DROP_SQL = [
+    "DROP INDEX IF EXISTS search_document_vector_gin",
+    "ALTER TABLE search_searchdocument DROP COLUMN IF EXISTS search_vector",
+]
+
+
+def create_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in VECTOR_SQL:
+            schema_editor.execute(statement)
+
+
+def drop_vector(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        for statement in DROP_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_fts5_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_vector, drop_vector),
+    ]
@@ -0,0 +1,31 @@
+from django.db import models
+
+class SearchDocument(models.Model):
+    """
+    One searchable object. On SQLite the search_fts FTS5 table mirrors
+    title/body through triggers; on PostgreSQL a generated, GIN-indexed
+    search_vector column does (see migrations). Other backends query this
+    table directly.
+    """
+    KIND_CHOICES = (
+        ('user', 'User'),
+        ('complaint', 'Complaint'),
+        ('inventory', 'Inventory'),
+    )
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    object_id = models.BigIntegerField()
+    title = models.CharField(max_length=255)
+    body = models.TextField(blank=True)
+    # Role for users, status for complaints, condition for inventory
+    category = models.CharField(max_length=20, blank=True)
+    # Who may see it besides managers (assigned staff for complaints)
+    owner_id = models.BigIntegerField(null=True, blank=True, db_index=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['kind', 'object_id'], name='unique_search_document'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.object_id}: {self.title}"
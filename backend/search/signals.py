@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from activity.models import Complaint
+from core.signals import rows_bulk_updated
+from inventory.models import Inventory
+from .index import index_object, index_objects, kind_for, remove_object
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_save, sender=Complaint)
+@receiver(post_save, sender=Inventory)
+def index_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        index_object(kind_for(sender), instance)
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=Complaint)
+@receiver(post_delete, sender=Inventory)
+def remove_on_delete(sender, instance, **kwargs):
+    remove_object(kind_for(sender), instance.pk)
+
+
+@receiver(rows_bulk_updated)
+def reindex_bulk_update(sender, pks, **kwargs):
+    kind = kind_for(sender)
+    if kind is not None:
+        index_objects(kind, pks)
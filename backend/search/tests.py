@@ -0,0 +1,86 @@
+import time
+
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from accounts.models import User
+from activity.models import Complaint, StudentProfile
+from inventory.models import Inventory
+from .index import rebuild, search
+from .models import SearchDocument
+
+
+class SearchTests(TestCase):
+    def setUp(self):
+        self.manager = User.objects.create(username='warden', role='manager')
+        self.fixer = User.objects.create(username='fixer', role='staff', first_name='Ravi', last_name='Kumar')
+        anita = User.objects.create(username='anita_s', first_name='Anita', last_name='Sharma',
+                                    email='anita@college.edu', phone='9876543210')
+        User.objects.create(username='sharmila', first_name='Sharmila', last_name='Rao')
+        self.profile = StudentProfile.objects.create(user=anita)
+        self.leak = Complaint.objects.create(student=self.profile, title='Water leak in bathroom',
+                                             description='Tap near the sharma room leaks', assigned_to=self.fixer)
+        Complaint.objects.create(student=self.profile, title='Fan not working', description='Ceiling fan is noisy')
+        Inventory.objects.create(item_name='Ceiling Fan', description='Bajaj 1200mm')
+        self.client = APIClient()
+
+    def titles(self, query, **kwargs):
+        return [d.title for d in search(query, **kwargs)]
+
+    def test_prefix_ranking_and_sync(self):
+        self.assertEqual(self.titles('ani sha'), ['Anita Sharma'])
+        # Title hits outrank body hits
+        self.assertEqual(set(self.titles('sharm')[:2]), {'Anita Sharma', 'Sharmila Rao'})
+        self.assertEqual(self.titles('sharm')[-1], 'Water leak in bathroom')
+        self.assertEqual(self.titles('9876'), ['Anita Sharma'])
+        self.assertEqual(set(self.titles('fan', kinds=['inventory'])), {'Ceiling Fan'})
+
+        self.leak.remarks = 'Plumber replaced washer'
+        self.leak.save()
+        self.assertEqual(self.titles('washer'), ['Water leak in bathroom'])
+        self.leak.delete()
+        self.assertEqual(self.titles('washer'), [])
+        # FTS syntax in user input is treated as plain words
+        self.assertEqual(self.titles('"fan*'), self.titles('fan'))
+        self.assertEqual(self.titles('fan OR NEAR('), [])
+
+    def test_bulk_updates_are_reindexed(self):
+        self.client.force_authenticate(self.manager)
+        self.client.post('/api/activity/complaints/bulk-status/',
+                         {'ids': [self.leak.pk], 'status': 'resolved', 'remarks': 'Gasket swapped'}, format='json')
+        self.assertEqual(self.titles('gasket'), ['Water leak in bathroom'])
+        self.assertEqual(SearchDocument.objects.get(kind='complaint', object_id=self.leak.pk).category, 'resolved')
+
+    def test_api_scoping(self):
+        self.client.force_authenticate(self.manager)
+        response = self.client.get('/api/search/?q=fan&kind=complaint,inventory')
+        self.assertEqual({r['kind'] for r in response.data}, {'complaint', 'inventory'})
+        self.assertEqual(self.client.get('/api/search/?q=fan&kind=rents').status_code, 400)
+
+        self.client.force_authenticate(self.fixer)
+        response = self.client.get('/api/search/?q=leak fan')
+        self.assertEqual(response.data, [])
+        response = self.client.get('/api/search/?q=leak')
+        self.assertEqual([(r['kind'], r['id']) for r in response.data], [('complaint', self.leak.pk)])
+
+        self.client.force_authenticate(self.profile.user)
+        self.assertEqual(self.client.get('/api/search/?q=leak').status_code, 403)
+
+    def test_rebuild_at_scale(self):
+        from django.test.utils import CaptureQueriesContext
+
+        Inventory.objects.bulk_create(
+            Inventory(item_name=f'Item {i} {"chair" if i % 100 else "stool"}', description=f'Batch {i % 37}')
+            for i in range(20000)
+        )
+        counts = rebuild()
+        self.assertEqual(counts['inventory'], 20001)
+        with CaptureQueriesContext(connection) as ctx:
+            started = time.perf_counter()
+            results = search('stoo', limit=5)
+            elapsed = time.perf_counter() - started
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(len(results), 5)
+        self.assertTrue(all('stool' in d.title for d in results))
+        self.assertLess(elapsed, 0.1)
@@ -0,0 +1,38 @@
+from rest_framework import decorators, permissions, status
+from rest_framework.response import Response
+
+from .index import search as run_search
+from .models import SearchDocument
+
+MAX_LIMIT = 100
+
+
+@decorators.api_view(['GET'])
+@decorators.permission_classes([permissions.IsAuthenticated])
+def search(request):
+    """
+    Ranked prefix search: ?q=<words>[&kind=user,complaint,inventory][&limit=20].
+    Managers search everything; staff search the complaints assigned to them.
+    """
+    user = request.user
+    if user.role not in ('manager', 'staff'):
+        return Response({'detail': 'Not authorized'}, status=status.HTTP_403_FORBIDDEN)
+
+    params = request.query_params
+    kinds = [k for k in params.get('kind', '').split(',') if k]
+    if set(kinds) - set(dict(SearchDocument.KIND_CHOICES)):
+        return Response({'detail': 'kind must be user, complaint or inventory'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(int(params.get('limit', 20)), MAX_LIMIT)
+    except ValueError:
+        return Response({'detail': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+
+    owner_id = None
+    if user.role == 'staff':
+        kinds, owner_id = ['complaint'], user.pk
+
+    results = run_search(params.get('q', ''), kinds=kinds, owner_id=owner_id, limit=limit)
+    return Response([
+        {'kind': d.kind, 'id': d.object_id, 'title': d.title, 'category': d.category, 'score': d.score}
+        for d in results
+    ])
@@ -0,0 +1,49 @@
+import api from '../api';
+
+const MAX_RETRIES = 5;
+
+const sha256Hex = async (file) => {
+    if (!window.crypto?.subtle) return undefined;
+    const digest = await window.crypto.subtle.digest('SHA-256', await file.arrayBuffer());
+    return Array.from(new Uint8Array(digest)).map(b => b.toString(16).padStart(2, '0')).join('');
+};
+
+// Uploads a document through activity/uploads/ in chunks. A failed chunk is
+// retried from the offset the server reports, so only the missing bytes are resent.
+const useChunkedUpload = () => {
+    const uploadDocument = async (file, docType, onProgress) => {
+        const sha256 = await sha256Hex(file);
+        let { data: session } = await api.post('activity/uploads/', {
+            doc_type: docType, filename: file.name, size: file.size, sha256,
+        });
+
+        let retries = 0;
+        while (session.status === 'open' && session.received < session.size) {
+            const start = session.received;
+            const end = Math.min(start + session.chunk_size, file.size);
+            try {
+                ({ data: session } = await api.put(`activity/uploads/${session.id}/`, file.slice(start, end), {
+                    headers: {
+                        'Content-Type': 'application/octet-stream',
+                        'Content-Range': `bytes ${start}-${end - 1}/${file.size}`,
+                    },
+                }));
+                retries = 0;
+                onProgress?.(session.received / session.size);
+            } catch (err) {
+                if (++retries > MAX_RETRIES) throw err;
+                await new Promise(resolve => setTimeout(resolve, 1000 * retries));
+                ({ data: session } = await api.get(`activity/uploads/${session.id}/`));
+            }
+        }
+
+        if (session.status === 'open') {
+            ({ data: session } = await api.post(`activity/uploads/${session.id}/complete/`));
+        }
+        return session.document;
+    };
+
+    return { uploadDocument };
+};
+
+export default useChunkedUpload;
@@ -0,0 +1,25 @@
+import { useEffect, useRef } from 'react';
+import api from '../api';
+
+// Subscribes to activity/events/ (Server-Sent Events) and calls onEvent for
+// each status change of the given types. EventSource reconnects by itself;
+// a "reset" (events were dropped) is passed on so the page can reload. A
+// server without ASGI answers 204, which closes the stream for good: the
+// page then simply has no live updates.
+const useEventStream = (types, onEvent) => {
+    const handler = useRef(onEvent);
+    handler.current = onEvent;
+    const key = types.join(',');
+
+    useEffect(() => {
+        const token = localStorage.getItem('token');
+        if (!token || !window.EventSource) return undefined;
+        const url = `${api.defaults.baseURL}activity/events/?token=${encodeURIComponent(token)}`;
+        const source = new EventSource(url);
+        const listener = (e) => handler.current(e.type === 'reset' ? { type: 'reset' } : JSON.parse(e.data));
+        [...key.split(','), 'reset'].forEach(type => source.addEventListener(type, listener));
+        return () => source.close();
+    }, [key]);
+};
+
+export default useEventStream;
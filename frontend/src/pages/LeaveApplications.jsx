@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import api from '../api';
+import useEventStream from '../hooks/useEventStream';
 import { PlaneTakeoff, Plus, Calendar, Clock, CheckCircle2, AlertCircle, FileText } from 'lucide-react';
 
 const LeaveApplications = () => {
@@ -16,6 +17,8 @@ const LeaveApplications = () => {
         fetchLeaves();
     }, []);
 
+    useEventStream(['leave.status'], () => fetchLeaves());
+
     const fetchLeaves = async () => {
         try {
             const res = await api.get('activity/leaves/');
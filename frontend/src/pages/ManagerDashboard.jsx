@@ -75,27 +75,40 @@ const ManagerDashboard = () => {
     const [stats, setStats] = useState({
         totalStudents: 0,
         occupiedRooms: 0,
+        freeBeds: 0,
         pendingComplaints: 0,
         monthlyRevenue: 0,
         occupancyRate: 0,
+        revenueByMonth: [],
+        recentActivity: [],
     });
 
     useEffect(() => {
-        // Mock data for demo
-        setStats({
-            totalStudents: 48,
-            occupiedRooms: 18,
-            pendingComplaints: 5,
-            monthlyRevenue: 245000,
-            occupancyRate: 85,
-        });
+        const fetchStats = async () => {
+            try {
+                const { data } = await api.get('activity/dashboard/');
+                setStats({
+                    totalStudents: data.active_students,
+                    occupiedRooms: data.beds.occupied,
+                    freeBeds: data.beds.free,
+                    pendingComplaints: data.open_issues,
+                    monthlyRevenue: Number(data.monthly_revenue),
+                    occupancyRate: data.occupancy_rate,
+                    revenueByMonth: data.revenue_by_month,
+                    recentActivity: data.recent_activity,
+                });
+            } catch (err) {
+                console.error("Failed to fetch dashboard stats", err);
+            }
+        };
+        fetchStats();
     }, []);
 
     const revenueData = {
-        labels: ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun'],
+        labels: stats.revenueByMonth.map(r => new Date(`${r.month}-01`).toLocaleString('default', { month: 'short' })),
         datasets: [{
             label: 'Monthly Revenue',
-            data: [180000, 210000, 195000, 240000, 230000, 245000],
+            data: stats.revenueByMonth.map(r => Number(r.total)),
             borderColor: '#6366f1',
             backgroundColor: 'rgba(99, 102, 241, 0.1)',
             fill: true,
@@ -111,7 +124,7 @@ const ManagerDashboard = () => {
     const occupancyData = {
         labels: ['Occupied', 'Vacant'],
         datasets: [{
-            data: [85, 15],
+            data: [stats.occupiedRooms, stats.freeBeds],
             backgroundColor: ['#6366f1', '#f1f5f9'],
             hoverBackgroundColor: ['#4f46e5', '#e2e8f0'],
             borderWidth: 0,
@@ -207,14 +220,14 @@ const ManagerDashboard = () => {
                                 <div style={{ width: '12px', height: '12px', borderRadius: '4px', background: '#6366f1' }}></div>
                                 <span style={{ color: 'var(--text-muted)', fontSize: '0.9375rem', fontWeight: '600' }}>Occupied Beds</span>
                             </div>
-                            <span style={{ fontWeight: '800', color: 'var(--text-main)' }}>51 Units</span>
+                            <span style={{ fontWeight: '800', color: 'var(--text-main)' }}>{stats.occupiedRooms} Units</span>
                         </div>
                         <div style={{ display: 'flex', justifyContent: 'space-between', alignItems: 'center' }}>
                             <div style={{ display: 'flex', alignItems: 'center', gap: '0.75rem' }}>
                                 <div style={{ width: '12px', height: '12px', borderRadius: '4px', background: '#f1f5f9' }}></div>
                                 <span style={{ color: 'var(--text-muted)', fontSize: '0.9375rem', fontWeight: '600' }}>Available Units</span>
                             </div>
-                            <span style={{ fontWeight: '800', color: 'var(--text-main)' }}>9 Units</span>
+                            <span style={{ fontWeight: '800', color: 'var(--text-main)' }}>{stats.freeBeds} Units</span>
                         </div>
                     </div>
                 </div>
@@ -226,11 +239,7 @@ const ManagerDashboard = () => {
                     <button style={{ color: 'var(--primary)', fontWeight: '700', fontSize: '0.875rem' }}>View History Logs</button>
                 </div>
                 <div style={{ display: 'flex', flexDirection: 'column', gap: '0.5rem' }}>
-                    {[
-                        { user: 'Rahul Verma', action: 'applied for Leave', date: '2 hours ago', status: 'pending', id: 'RV-102' },
-                        { user: 'Amit Sahni', action: 'submitted a Complaint', date: '5 hours ago', status: 'new', id: 'AS-404' },
-                        { user: 'Sneha Gupta', action: 'paid Monthly Rent', date: 'Yesterday', status: 'confirmed', id: 'SG-205' }
-                    ].map((activity, i) => (
+                    {stats.recentActivity.map((activity, i) => (
                         <div key={i} style={{
                             display: 'flex',
                             alignItems: 'center',
@@ -260,7 +269,7 @@ const ManagerDashboard = () => {
                                         <div style={{ fontSize: '0.75rem', color: 'var(--text-light)', fontWeight: '600' }}>#{activity.id}</div>
                                     </div>
                                     <div style={{ fontSize: '0.8125rem', color: 'var(--text-muted)', marginTop: '0.125rem' }}>
-                                        {activity.action} <span style={{ color: 'var(--text-light)' }}>• {activity.date}</span>
+                                        {activity.action} <span style={{ color: 'var(--text-light)' }}>• {new Date(activity.date).toLocaleString()}</span>
                                     </div>
                                 </div>
                             </div>
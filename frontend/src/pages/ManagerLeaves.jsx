@@ -32,6 +32,17 @@ const ManagerLeaves = () => {
         }
     };
 
+    const handleBulkAction = async (ids, status) => {
+        if (ids.length === 0) return;
+        try {
+            await api.post('activity/leaves/bulk-status/', { ids, status });
+            fetchLeaves();
+        } catch (err) {
+            console.error('Bulk action failed:', err.response?.data || err.message);
+            alert(`Bulk action failed: ${JSON.stringify(err.response?.data) || err.message}`);
+        }
+    };
+
     const filteredLeaves = leaves.filter(l =>
         l.student_name?.toLowerCase().includes(search.toLowerCase()) ||
         l.reason.toLowerCase().includes(search.toLowerCase())
@@ -51,6 +62,14 @@ const ManagerLeaves = () => {
                     <h1 style={{ fontSize: '1.875rem', fontWeight: '800', letterSpacing: '-0.025em', color: 'var(--text-main)' }}>Leave Approvals</h1>
                     <p style={{ color: 'var(--text-muted)', fontSize: '1rem' }}>Review and manage student out-of-station requests.</p>
                 </div>
+                {filteredLeaves.some(l => l.status === 'pending') && (
+                    <button
+                        className="btn btn-primary"
+                        onClick={() => handleBulkAction(filteredLeaves.filter(l => l.status === 'pending').map(l => l.id), 'approved')}
+                    >
+                        Approve all pending ({filteredLeaves.filter(l => l.status === 'pending').length})
+                    </button>
+                )}
             </div>
 
             <div className="card" style={{ padding: '0', overflow: 'hidden' }}>
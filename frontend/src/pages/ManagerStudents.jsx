@@ -15,7 +15,9 @@ const ManagerStudents = () => {
 
     const fetchStudents = async () => {
         try {
-            const res = await api.get('activity/profiles/');
+            const res = await api.get('activity/profiles/', {
+                params: { fields: 'id,is_verified,current_bed,user,current_bed_details', expand: 'user,current_bed_details' }
+            });
             setStudents(res.data);
         } catch (err) {
             console.error(err);
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import api from '../api';
+import useEventStream from '../hooks/useEventStream';
 import { MessageSquare, CheckCircle2, Save, Edit, XCircle, Clock } from 'lucide-react';
 
 const StaffDashboard = () => {
@@ -12,6 +13,8 @@ const StaffDashboard = () => {
         fetchComplaints();
     }, []);
 
+    useEventStream(['complaint.status'], () => fetchComplaints());
+
     const fetchComplaints = async () => {
         try {
             const res = await api.get('activity/complaints/');
@@ -1,5 +1,6 @@
 import { useState, useEffect } from 'react';
 import api from '../api';
+import useEventStream from '../hooks/useEventStream';
 import usePayment from '../hooks/usePayment';
 import { CreditCard, Download, CheckCircle, Clock, AlertCircle } from 'lucide-react';
 
@@ -11,6 +12,8 @@ const StudentPayments = () => {
         fetchRents();
     }, []);
 
+    useEventStream(['rent.status'], () => fetchRents());
+
     const fetchRents = async () => {
         try {
             const res = await api.get('activity/rents/');
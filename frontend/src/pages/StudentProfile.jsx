@@ -1,11 +1,13 @@
 import { useState, useEffect } from 'react';
 import api from '../api';
+import useChunkedUpload from '../hooks/useChunkedUpload';
 import { User, Camera, FileText, CheckCircle, Clock, AlertCircle, Upload } from 'lucide-react';
 
 const StudentProfile = () => {
     const [profile, setProfile] = useState(null);
     const [loading, setLoading] = useState(true);
     const [uploading, setUploading] = useState(false);
+    const { uploadDocument } = useChunkedUpload();
 
     useEffect(() => {
         fetchProfile();
@@ -29,19 +31,15 @@ const StudentProfile = () => {
         if (!file) return;
 
         setUploading(true);
-        const formData = new FormData();
-        formData.append(type === 'photo' ? 'photo' : 'file', file);
-        if (type === 'doc') formData.append('doc_type', 'aadhar');
-
         try {
             if (type === 'photo') {
+                const formData = new FormData();
+                formData.append('photo', file);
                 await api.patch(`activity/profiles/${profile.id}/`, formData, {
                     headers: { 'Content-Type': 'multipart/form-data' }
                 });
             } else {
-                await api.post('activity/documents/', formData, {
-                    headers: { 'Content-Type': 'multipart/form-data' }
-                });
+                await uploadDocument(file, 'aadhar');
             }
             fetchProfile();
         } catch (err) {
@@ -88,7 +86,7 @@ const StudentProfile = () => {
                             boxShadow: '0 15px 30px rgba(0,0,0,0.25)'
                         }}>
                             {profile?.photo ? (
-                                <img src={profile.photo} alt="Profile" style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
+                                <img src={profile.photo_variants?.medium || profile.photo} alt="Profile" style={{ width: '100%', height: '100%', objectFit: 'cover' }} />
                             ) : (
                                 <User size={70} color="rgba(255,255,255,0.2)" />
                             )}